@@ -0,0 +1,33 @@
+"""
+Benchmark: dashboard API endpoints through the Flask test client.
+"""
+from common import FakeSampler, measure
+
+from ram_sentinel.core.process_monitor import ProcessMonitor, ProcessSnapshot
+from ram_sentinel.dashboard.collector import StatsCollector
+
+def run(quick=False):
+    from ram_sentinel.dashboard import server
+
+    results = []
+    client = server.app.test_client()
+    original = server.process_monitor, server.collector
+    counts = [2000] if quick else [2000, 10000]
+    try:
+        for count in counts:
+            for label, max_age in (('cold', 0), ('cached', 3600)):
+                server.process_monitor = ProcessMonitor(snapshot=ProcessSnapshot(max_age=max_age),
+                                                        sampler=FakeSampler(count))
+                # cold: every request rebuilds the collector snapshot
+                server.collector = StatsCollector(server.process_monitor, server.list_tabs,
+                                                  interval=1e-9 if label == 'cold' else 3600)
+                for endpoint in ('/api/stats', '/api/processes'):
+                    def call(endpoint=endpoint):
+                        response = client.get(endpoint)
+                        assert response.status_code == 200
+                    results.append({'suite': 'api', 'name': f"GET {endpoint}",
+                                    'params': {'processes': count, 'snapshot': label},
+                                    **measure(call, repeat=5 if quick else 20)})
+    finally:
+        server.process_monitor, server.collector = original
+    return results
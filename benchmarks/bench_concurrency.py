@@ -0,0 +1,198 @@
+"""
+Stress test: dashboard state under concurrent requests.
+Fires bursts of simultaneous requests at the Flask app (in-process, one
+thread per client) and checks that they coalesce into one unit of
+sampling work, then toggles the optimizer from many threads at once and
+checks the state machine: never more than one purger session open, every
+session opened and closed on the same thread, and a clean final state.
+Exits non-zero (AssertionError) on any violation.
+
+    python benchmarks/bench_concurrency.py --clients 64 --bursts 20
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import FakeSampler
+
+class CountingMonitor:
+    """Wraps a ProcessMonitor, counting (and slowing down) the calls that walk the process table."""
+    def __init__(self, monitor, delay):
+        self.monitor = monitor
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.monitor, name)
+        if not name.startswith('get_top_'):
+            return attr
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.calls[name] = self.calls.get(name, 0) + 1
+            time.sleep(self.delay)
+            return attr(*args, **kwargs)
+        return counted
+
+class FakePurger:
+    """TabPurger stand-in that records which thread opened and closed each session."""
+    active = 0
+    max_active = 0
+    violations = []
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.context = None
+        self.last_tabs = []
+        self.thread = None
+
+    def start_session(self, headless=False):
+        time.sleep(random.uniform(0, 0.02))
+        with FakePurger.lock:
+            FakePurger.active += 1
+            FakePurger.max_active = max(FakePurger.max_active, FakePurger.active)
+        self.thread = threading.current_thread()
+        self.context = object()
+
+    def scan_and_purge(self, dry_run=False):
+        if threading.current_thread() is not self.thread:
+            FakePurger.violations.append('scan on foreign thread')
+        time.sleep(random.uniform(0, 0.01))
+        return 0
+
+    def idle(self, seconds):
+        time.sleep(seconds)
+        return False
+
+    def stop_session(self):
+        if threading.current_thread() is not self.thread:
+            FakePurger.violations.append('session closed on foreign thread')
+        with FakePurger.lock:
+            FakePurger.active -= 1
+        self.context = None
+
+class FakeScheduler:
+    def __init__(self):
+        self._stop = threading.Event()
+
+    def wait(self, reclaimed=0, idle=None):
+        self._stop.wait(0.005)
+
+    def stop(self):
+        self._stop.set()
+
+def burst(client, path, clients):
+    """GET path from `clients` threads released at the same instant."""
+    barrier = threading.Barrier(clients)
+    statuses = []
+
+    def worker():
+        barrier.wait()
+        statuses.append(client.get(path).status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(s == 200 for s in statuses), f"{path}: {statuses}"
+
+def run_coalescing(clients=64, bursts=20, processes=2000, delay=0.02):
+    from ram_sentinel.core.process_monitor import ProcessMonitor
+    from ram_sentinel.dashboard import server
+    from ram_sentinel.dashboard.collector import StatsCollector
+
+    original = server.process_monitor, server.collector
+    monitor = CountingMonitor(ProcessMonitor(sampler=FakeSampler(processes)), delay)
+    # No background thread: requests drive collection, the case a burst used to multiply
+    server.process_monitor = monitor
+    server.collector = StatsCollector(monitor, server.list_tabs, interval=0.05)
+    client = server.app.test_client()
+    results = []
+    try:
+        for path, method in (('/api/stats', 'get_top_processes'),
+                             ('/api/applications?count=15', 'get_top_applications')):
+            monitor.calls.clear()
+            start = time.perf_counter()
+            for _ in range(bursts):
+                burst(client, path, clients)
+                time.sleep(0.06)  # Let the snapshot go stale so each burst needs one collection
+            elapsed = time.perf_counter() - start
+            calls = monitor.calls.get(method, 0)
+            # Each burst may straddle one refresh, so allow two walks per burst
+            assert calls <= bursts * 2, f"{path}: {calls} walks for {bursts} bursts of {clients}"
+            results.append({'suite': 'concurrency', 'name': 'burst', 'params': {'path': path, 'clients': clients},
+                            'requests': clients * bursts, 'walks': calls,
+                            'median_ms': elapsed / bursts * 1000})
+    finally:
+        server.process_monitor, server.collector = original
+    return results
+
+def run_toggle_storm(threads=32, toggles=50):
+    from ram_sentinel.dashboard import server
+    from ram_sentinel.dashboard.state import DashboardState, STOPPED
+
+    original = server.state
+    state = server.state = DashboardState(purger_factory=FakePurger, scheduler_factory=FakeScheduler)
+    client = server.app.test_client()
+    FakePurger.active = FakePurger.max_active = 0
+    FakePurger.violations = []
+    errors = []
+    try:
+        start = time.perf_counter()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(toggles):
+                action = rng.choice(('start', 'stop'))
+                response = client.post(f'/api/control/optimizer/{action}')
+                body = response.get_json()
+                if response.status_code != 200 or body['state'] not in ('stopped', 'starting', 'running', 'stopping'):
+                    errors.append((action, response.status_code, body))
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        state.stop_optimizer(timeout=5)
+        deadline = time.time() + 5
+        while state.optimizer != STOPPED and time.time() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        assert not errors, errors[:5]
+        assert not FakePurger.violations, FakePurger.violations[:5]
+        assert FakePurger.max_active <= 1, f"{FakePurger.max_active} purger sessions open at once"
+        assert FakePurger.active == 0, f"{FakePurger.active} sessions left open"
+        assert state.optimizer == STOPPED and state.tab_purger is None, state.control_state()
+        return [{'suite': 'concurrency', 'name': 'optimizer_toggles', 'params': {'threads': threads},
+                 'requests': threads * toggles, 'starts': state.optimizer_starts,
+                 'median_ms': elapsed * 1000}]
+    finally:
+        server.state = original
+
+def run(quick=False):
+    return (run_coalescing(clients=32 if quick else 64, bursts=5 if quick else 20)
+            + run_toggle_storm(threads=16 if quick else 32, toggles=20 if quick else 50))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard concurrency stress test")
+    parser.add_argument("--clients", type=int, default=64, help="Simultaneous requests per burst")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=32, help="Threads toggling the optimizer")
+    parser.add_argument("--toggles", type=int, default=50, help="Start/stop requests per thread")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("ram_sentinel").setLevel(logging.WARNING)
+    for result in run_coalescing(args.clients, args.bursts) + run_toggle_storm(args.threads, args.toggles):
+        extra = f"{result['walks']} walks" if 'walks' in result else f"{result['starts']} starts"
+        print(f"{result['name']:<18} {str(result['params']):<48} {result['requests']:>6} requests  {extra}")
+    print("OK")
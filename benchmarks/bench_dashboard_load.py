@@ -0,0 +1,155 @@
+"""
+Benchmark: dashboard throughput under concurrent clients.
+Starts the dashboard in a subprocess (development server, then waitress
+in production mode) backed by a synthetic process population, and drives
+it with keep-alive HTTP clients, reporting p50/p99 latency and requests/sec.
+
+    python benchmarks/bench_dashboard_load.py --clients 1 10 100 --seconds 5
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import FakeSampler
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def serve(mode, port, processes):
+    """Subprocess entry point: run the dashboard against a fake process table."""
+    import logging
+    logging.getLogger("ram_sentinel").setLevel(logging.WARNING)
+    from ram_sentinel.core.process_monitor import ProcessMonitor
+    from ram_sentinel.dashboard import server
+    from ram_sentinel.dashboard.collector import StatsCollector
+
+    server.process_monitor = ProcessMonitor(sampler=FakeSampler(processes))
+    server.collector = StatsCollector(server.process_monitor, server.list_tabs)
+    server.run_server(port=port, production=mode == 'production')
+
+def start_server(mode, processes=2000):
+    """Launch a dashboard subprocess and wait until it answers. Returns (process, port)."""
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode,
+                             '--port', str(port), '--processes', str(processes)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/system')
+            conn.getresponse().read()
+            conn.close()
+            return proc, port
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"dashboard ({mode}) did not start")
+
+def run_load(port, path='/api/stats', clients=10, seconds=5.0, headers=None, host='127.0.0.1'):
+    """
+    Hammer path with `clients` keep-alive connections for `seconds`.
+    Returns latency percentiles (ms), requests/sec and error count.
+    """
+    headers = headers if headers is not None else {'Accept-Encoding': 'gzip'}
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    start_event = threading.Event()
+    deadline = [0.0]
+
+    def client(i):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        start_event.wait()
+        while time.perf_counter() < deadline[0]:
+            t0 = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[i] += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies[i].append((time.perf_counter() - t0) * 1000)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    began = time.perf_counter()
+    deadline[0] = began + seconds
+    start_event.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    samples = sorted(x for per_client in latencies for x in per_client)
+    if not samples:
+        return {'clients': clients, 'requests': 0, 'errors': sum(errors), 'rps': 0.0,
+                'median_ms': None, 'p99_ms': None}
+    return {
+        'clients': clients,
+        'requests': len(samples),
+        'errors': sum(errors),
+        'rps': len(samples) / elapsed,
+        'median_ms': samples[len(samples) // 2],
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    }
+
+def modes():
+    try:
+        import waitress  # noqa: F401
+        return ['dev', 'production']
+    except ImportError:
+        return ['dev']
+
+def run(quick=False, clients=None, seconds=None, path='/api/stats'):
+    clients = clients or ([1, 10] if quick else [1, 10, 100])
+    seconds = seconds or (1.0 if quick else 5.0)
+    results = []
+    for mode in modes():
+        proc, port = start_server(mode)
+        try:
+            for n in clients:
+                stats = run_load(port, path, clients=n, seconds=seconds)
+                results.append({'suite': 'dashboard_load', 'name': f"GET {path} ({mode})",
+                                'params': {'clients': n}, **stats})
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard load benchmark")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--path", default="/api/stats")
+    parser.add_argument("--serve", choices=['dev', 'production'], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--processes", type=int, default=2000, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.processes)
+    else:
+        print(f"{'Server':<12} {'Clients':>8} {'Req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'Errors':>7}")
+        for r in run(clients=args.clients, seconds=args.seconds, path=args.path):
+            p50 = f"{r['median_ms']:.2f}" if r['median_ms'] is not None else '-'
+            p99 = f"{r['p99_ms']:.2f}" if r['p99_ms'] is not None else '-'
+            print(f"{r['name'].rsplit('(')[-1].rstrip(')'):<12} {r['clients']:>8} {r['rps']:>10.0f} "
+                  f"{p50:>9} {p99:>9} {r['errors']:>7}")
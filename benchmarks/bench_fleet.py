@@ -0,0 +1,153 @@
+"""
+Benchmark: fleet aggregator polling many agents.
+A subprocess serves N stand-in agents (one asyncio server per port, each
+returning a realistic /api/stats payload that changes every 2 s, with ETag
+and gzip like the real dashboard). The aggregator polls them in this
+process; we report cycle latency and the aggregator's own CPU use.
+
+    python benchmarks/bench_fleet.py --agents 200 --seconds 20
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+
+from common import NAMES
+
+def agent_payload(seed, version):
+    """A /api/stats body like an agent's, varying with version."""
+    rng = random.Random(seed * 1000 + version)
+    processes = sorted(({'pid': rng.randint(100, 60000), 'name': rng.choice(NAMES),
+                         'memory_mb': rng.lognormvariate(5, 1), 'cpu_percent': rng.random() * 30}
+                        for _ in range(15)), key=lambda p: p['memory_mb'], reverse=True)
+    total = 16.0
+    used = total * rng.uniform(0.3, 0.95)
+    return {
+        'system': {'total_gb': total, 'used_gb': used, 'available_gb': total - used,
+                   'percent': used / total * 100, 'cpu_percent': rng.random() * 100},
+        'processes': processes,
+        'tabs': [{'title': f"Tab {i}", 'url': f"https://example.com/{i}"} for i in range(rng.randint(0, 20))],
+        'purger_running': False, 'vault_mounted': False, 'connection_mode': 'offline',
+        'host': f"agent-{seed}", 'version': version
+    }
+
+def serve_agents(count, dead):
+    """Subprocess entry point: serve `count` agents, print their ports as JSON, run forever."""
+    cache = {}
+
+    def body_for(seed):
+        version = int(time.time() / 2)
+        entry = cache.get(seed)
+        if entry is None or entry[0] != version:
+            body = json.dumps(agent_payload(seed, version)).encode()
+            entry = cache[seed] = (version, body, gzip.compress(body, 5), f'"{zlib.crc32(body):08x}"')
+        return entry
+
+    def handler(seed):
+        async def handle(reader, writer):
+            try:
+                while True:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    headers = head.decode('latin-1').lower()
+                    _, body, gz, etag = body_for(seed)
+                    if f"if-none-match: {etag}" in headers:
+                        writer.write(f"HTTP/1.1 304 NOT MODIFIED\r\nETag: {etag}\r\nContent-Length: 0\r\n\r\n".encode())
+                    else:
+                        use_gzip = 'gzip' in headers
+                        payload = gz if use_gzip else body
+                        writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nETag: {etag}\r\n"
+                                      + ("Content-Encoding: gzip\r\n" if use_gzip else "")
+                                      + f"Content-Length: {len(payload)}\r\n\r\n").encode() + payload)
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+        return handle
+
+    async def main():
+        ports = []
+        for seed in range(count):
+            server = await asyncio.start_server(handler(seed), '127.0.0.1', 0)
+            ports.append(server.sockets[0].getsockname()[1])
+        for _ in range(dead):
+            # Reserved then released: connection refused, exercising backoff
+            with socket.socket() as s:
+                s.bind(('127.0.0.1', 0))
+                ports.append(s.getsockname()[1])
+        print(json.dumps(ports), flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+def run_fleet(agents=200, dead=0, seconds=10.0, interval=2.0):
+    from ram_sentinel.dashboard.fleet import FleetAggregator
+
+    # One "unreachable" warning per dead agent is expected here
+    logging.getLogger("ram_sentinel").setLevel(logging.ERROR)
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve-agents', str(agents),
+                             '--dead', str(dead)], stdout=subprocess.PIPE, text=True)
+    try:
+        ports = json.loads(proc.stdout.readline())
+        aggregator = FleetAggregator([f"127.0.0.1:{port}" for port in ports], interval=interval)
+        cycles = []
+
+        async def drive():
+            deadline = time.monotonic() + seconds
+            next_tick = time.monotonic()
+            while time.monotonic() < deadline:
+                await aggregator.poll_once()
+                cycles.append(aggregator.last_cycle_ms)
+                next_tick += interval
+                await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        asyncio.run(drive())
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        view = aggregator.get_view()
+        stats = aggregator.stats()
+        cycles.sort()
+        return {
+            'agents': len(ports),
+            'dead_agents': dead,
+            'interval_s': interval,
+            'cycles': len(cycles),
+            'median_ms': statistics.median(cycles),
+            'p99_ms': cycles[min(len(cycles) - 1, int(len(cycles) * 0.99))],
+            'cpu_percent': cpu / wall * 100,
+            'agents_up': view['agents_up'],
+            'not_modified_share': stats['not_modified'] / stats['polls'] if stats['polls'] else 0.0
+        }
+    finally:
+        proc.kill()
+        proc.wait()
+
+def run(quick=False):
+    agents = 50 if quick else 200
+    result = run_fleet(agents=agents, dead=agents // 20, seconds=6 if quick else 20)
+    return [{'suite': 'fleet', 'name': 'poll_cycle', 'params': {'agents': result.pop('agents'),
+                                                                'dead': result.pop('dead_agents')},
+             **result}]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fleet aggregator benchmark")
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--dead", type=int, default=10, help="Unreachable agents included in the fleet")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--serve-agents", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_agents:
+        serve_agents(args.serve_agents, args.dead)
+    else:
+        result = run_fleet(args.agents, args.dead, args.seconds, args.interval)
+        for key, value in result.items():
+            print(f"{key:<20} {value:.2f}" if isinstance(value, float) else f"{key:<20} {value}")
@@ -0,0 +1,387 @@
+"""
+Dashboard load-test harness.
+Runs the real dashboard app in a subprocess against a simulated machine:
+a fake process table (configurable size and churn) and a simulated browser
+with N pages, scanned by the real TabPurger. Clients then drive the HTTP
+endpoints the way dashboards do: polling at an interval (or flat out),
+holding /api/stream connections open, and toggling controls. Reports
+per-endpoint latency percentiles and throughput, plus the server's own
+CPU and RSS, i.e. the dashboard's footprint on the machine it watches.
+
+    python benchmarks/bench_loadtest.py --clients 50 --interval 2 --seconds 30
+    python benchmarks/bench_loadtest.py --clients 20 --interval 0 --paths /api/stats /api/processes
+    python benchmarks/bench_loadtest.py --processes 20000 --churn 0.05 --tabs 200 --optimizer
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_dashboard_load import free_port
+from common import FakeContext, FakePage, FakeSampler
+
+CONTROL_ACTIONS = [
+    ('POST', '/api/control/connection/online'),
+    ('POST', '/api/control/connection/offline'),
+    ('POST', '/api/control/optimizer/start'),
+    ('POST', '/api/control/optimizer/stop'),
+]
+
+def serve(args):
+    """Subprocess entry point: the dashboard wired to a simulated machine."""
+    import logging
+    logging.getLogger("ram_sentinel").setLevel(logging.WARNING)
+    from ram_sentinel.core.config import settings
+    settings.READ_LATER_DIR = tempfile.mkdtemp(prefix="loadtest_readlater_")
+    from ram_sentinel.core.pressure import ReclaimScheduler
+    from ram_sentinel.core.process_monitor import ProcessMonitor
+    from ram_sentinel.dashboard import server
+    from ram_sentinel.dashboard.collector import StatsCollector
+    from ram_sentinel.dashboard.state import DashboardState
+    from ram_sentinel.optimizer.tab_purger import TabPurger
+
+    class SimulatedPurger(TabPurger):
+        """The real TabPurger over fake pages; purged pages are replaced so the tab count holds."""
+        def start_session(self, headless=False):
+            self.context = FakeContext(args.tabs, idle_share=args.idle_share, latency=args.page_latency)
+            self.next_index = args.tabs
+
+        def stop_session(self):
+            self.context = None
+
+        def scan_and_purge(self, dry_run=False):
+            purged = super().scan_and_purge(dry_run=dry_run)
+            context = self.context
+            while context and len(context._pages) < args.tabs:
+                idle = random.uniform(3 * 3600, 6 * 3600) if random.random() < args.idle_share else 60.0
+                context._pages.append(FakePage(context, self.next_index, idle, args.page_latency))
+                self.next_index += 1
+            return purged
+
+    server.state = DashboardState(
+        purger_factory=SimulatedPurger,
+        scheduler_factory=lambda: ReclaimScheduler(base_interval=args.scan_interval,
+                                                   max_interval=args.scan_interval))
+    server.list_tabs = server.state.list_tabs
+    server.process_monitor = ProcessMonitor(sampler=FakeSampler(args.processes, churn=args.churn))
+    server.collector = StatsCollector(server.process_monitor, server.list_tabs)
+    if args.optimizer:
+        server.state.start_optimizer()
+    server.run_server(port=args.port, production=args.mode == 'production', threads=args.threads)
+
+def start_server(args):
+    """Launch the simulated dashboard and wait until it answers. Returns (process, port)."""
+    port = free_port()
+    argv = [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port),
+            '--mode', args.mode, '--processes', str(args.processes), '--churn', str(args.churn),
+            '--tabs', str(args.tabs), '--idle-share', str(args.idle_share),
+            '--page-latency', str(args.page_latency), '--scan-interval', str(args.scan_interval)]
+    if args.threads:
+        argv += ['--threads', str(args.threads)]
+    if args.optimizer:
+        argv.append('--optimizer')
+    proc = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/stats')
+            conn.getresponse().read()
+            conn.close()
+            return proc, port
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("simulated dashboard did not start")
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else None
+
+class Recorder:
+    """Latencies and status codes per endpoint, shared by all client threads."""
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+        self.events = 0
+        self._lock = threading.Lock()
+
+    def record(self, path, status, ms):
+        with self._lock:
+            self.latencies.setdefault(path, []).append(ms)
+            counts = self.statuses.setdefault(path, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def error(self, path):
+        with self._lock:
+            self.errors[path] = self.errors.get(path, 0) + 1
+
+    def summary(self, elapsed):
+        rows = []
+        for path in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(path, []))
+            statuses = self.statuses.get(path, {})
+            rows.append({
+                'path': path,
+                'requests': len(samples),
+                'errors': self.errors.get(path, 0) + sum(n for s, n in statuses.items() if s >= 400),
+                'not_modified_share': statuses.get(304, 0) / len(samples) if samples else 0.0,
+                'rps': len(samples) / elapsed,
+                'median_ms': percentile(samples, 0.5),
+                'p90_ms': percentile(samples, 0.9),
+                'p99_ms': percentile(samples, 0.99),
+                'max_ms': samples[-1] if samples else None
+            })
+        return rows
+
+def poller(port, paths, interval, deadline, recorder, offset, use_etag):
+    """One dashboard client: GET each path in turn every `interval` seconds (0 = back to back)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    etags = {}
+    next_at = time.perf_counter() + offset
+    i = 0
+    while True:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if time.perf_counter() >= deadline:
+            break
+        path = paths[i % len(paths)]
+        i += 1
+        headers = {'Accept-Encoding': 'gzip'}
+        if use_etag and path in etags:
+            headers['If-None-Match'] = etags[path]
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            recorder.error(path)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        else:
+            recorder.record(path, response.status, (time.perf_counter() - t0) * 1000)
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+        next_at = max(next_at + interval, time.perf_counter()) if interval else time.perf_counter()
+    conn.close()
+
+def streamer(port, deadline, recorder, sockets):
+    """
+    One /api/stream client: count events until the deadline (its socket is
+    shut down then). Turned away (503), it polls /api/stats like the page does.
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        t0 = time.perf_counter()
+        conn.request('GET', '/api/stream')
+        sockets.append(conn.sock)
+        response = conn.getresponse()
+        if response.status != 200:
+            response.read()
+            recorder.record('/api/stream', response.status, (time.perf_counter() - t0) * 1000)
+            conn.close()
+            poller(port, ['/api/stats'], 2.0, deadline, recorder, 0, True)
+            return
+        while time.perf_counter() < deadline:
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b'event:'):
+                with recorder._lock:
+                    recorder.events += 1
+    except (OSError, ValueError, http.client.HTTPException):
+        if time.perf_counter() < deadline:
+            recorder.error('/api/stream')
+    finally:
+        conn.close()
+
+def controller(port, interval, deadline, recorder):
+    """Fire a random control action every `interval` seconds."""
+    rng = random.Random(1)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.perf_counter() + interval < deadline:
+        time.sleep(interval)
+        method, path = rng.choice(CONTROL_ACTIONS)
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path)
+            response = conn.getresponse()
+            response.read()
+            recorder.record(path, response.status, (time.perf_counter() - t0) * 1000)
+        except (OSError, http.client.HTTPException):
+            recorder.error(path)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.close()
+
+def watch_server(pid, stop, samples, period=0.5):
+    """Sample the server's CPU % and RSS until stop is set."""
+    proc = psutil.Process(pid)
+    proc.cpu_percent()
+    while not stop.wait(period):
+        try:
+            with proc.oneshot():
+                samples.append((proc.cpu_percent(), proc.memory_info().rss, proc.num_threads()))
+        except psutil.Error:
+            break
+
+def run_scenario(args):
+    """Start the server, apply the configured load, return {'endpoints': [...], 'server': {...}}."""
+    proc, port = start_server(args)
+    try:
+        rss_idle = psutil.Process(proc.pid).memory_info().rss
+        time.sleep(args.warmup)
+        recorder = Recorder()
+        samples = []
+        stop = threading.Event()
+        watcher = threading.Thread(target=watch_server, args=(proc.pid, stop, samples), daemon=True)
+        watcher.start()
+
+        start = time.perf_counter()
+        deadline = start + args.seconds
+        threads = [threading.Thread(target=poller, daemon=True,
+                                    args=(port, args.paths, args.interval, deadline, recorder,
+                                          args.interval * i / max(1, args.clients), not args.no_etag))
+                   for i in range(args.clients)]
+        stream_sockets = []
+        threads += [threading.Thread(target=streamer, args=(port, deadline, recorder, stream_sockets), daemon=True)
+                    for _ in range(args.stream_clients)]
+        if args.control_interval:
+            threads.append(threading.Thread(target=controller, daemon=True,
+                                            args=(port, args.control_interval, deadline, recorder)))
+        for t in threads:
+            t.start()
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+        for sock in stream_sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for t in threads:
+            t.join(30)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        watcher.join()
+
+        cpu = [c for c, _, _ in samples] or [0.0]
+        rss = [r for _, r, _ in samples] or [rss_idle]
+        return {
+            'endpoints': recorder.summary(elapsed),
+            'server': {
+                'mode': args.mode,
+                'cpu_percent_mean': sum(cpu) / len(cpu),
+                'cpu_percent_max': max(cpu),
+                'rss_idle_mb': rss_idle / 1024 ** 2,
+                'rss_peak_mb': max(rss) / 1024 ** 2,
+                'rss_end_mb': rss[-1] / 1024 ** 2,
+                'threads_max': max((n for _, _, n in samples), default=0),
+                'stream_events': recorder.events
+            }
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Dashboard load-test harness")
+    load = parser.add_argument_group("load")
+    load.add_argument("--clients", type=int, default=20, help="Polling clients")
+    load.add_argument("--interval", type=float, default=2.0, help="Seconds between a client's requests (0 = flat out)")
+    load.add_argument("--paths", nargs="+", default=['/api/stats'], help="Endpoints each client cycles through")
+    load.add_argument("--stream-clients", type=int, default=0, help="Clients holding /api/stream open")
+    load.add_argument("--control-interval", type=float, default=0.0,
+                      help="Seconds between random control actions (0 = none)")
+    load.add_argument("--no-etag", action="store_true", help="Don't send If-None-Match")
+    load.add_argument("--seconds", type=float, default=15.0)
+    load.add_argument("--warmup", type=float, default=1.0, help="Seconds between server start and load")
+    load.add_argument("--json", help="Also write the results to this file")
+    machine = parser.add_argument_group("simulated machine")
+    machine.add_argument("--mode", choices=['dev', 'production'], default='production')
+    machine.add_argument("--threads", type=int, help="Server worker threads (default DASHBOARD_THREADS)")
+    machine.add_argument("--processes", type=int, default=2000)
+    machine.add_argument("--churn", type=float, default=0.01, help="Share of processes replaced per sample")
+    machine.add_argument("--tabs", type=int, default=50, help="Pages in the simulated browser")
+    machine.add_argument("--idle-share", type=float, default=0.3, help="Share of pages idle long enough to purge")
+    machine.add_argument("--page-latency", type=float, default=0.0, help="Seconds per simulated page call")
+    machine.add_argument("--scan-interval", type=float, default=5.0, help="Purger cadence while the optimizer runs")
+    machine.add_argument("--optimizer", action="store_true", help="Start the optimizer with the server")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    return parser
+
+def run(quick=False):
+    from ram_sentinel.core.config import settings
+    seconds = '5' if quick else '20'
+    scenarios = [
+        ('mixed', ['--clients', '20', '--interval', '0.5', '--stream-clients', '5',
+                   '--control-interval', '1', '--optimizer', '--seconds', seconds]),
+        # More open dashboards than worker threads: streams past the cap poll, controls still answer
+        ('stream_saturation', ['--clients', '5', '--interval', '0.5',
+                               '--stream-clients', str(settings.DASHBOARD_THREADS + 4),
+                               '--control-interval', '0.5', '--seconds', seconds]),
+    ]
+    try:
+        import waitress  # noqa: F401
+    except ImportError:
+        waitress = None
+    rows = []
+    for scenario, argv in scenarios:
+        args = build_parser().parse_args(argv)
+        if waitress is None:
+            args.mode = 'dev'
+        result = run_scenario(args)
+        params = {'scenario': scenario, 'clients': args.clients, 'stream_clients': args.stream_clients,
+                  'interval': args.interval, 'processes': args.processes, 'tabs': args.tabs}
+        if scenario == 'stream_saturation':
+            control = [row for row in result['endpoints'] if row['path'].startswith('/api/control')]
+            assert control and all(row['errors'] == 0 for row in control), \
+                f"control requests failed with {args.stream_clients} streams open: {control}"
+        rows += [{'suite': 'loadtest',
+                  'name': f"{'POST' if row['path'].startswith('/api/control') else 'GET'} {row.pop('path')}",
+                  'params': params, **row}
+                 for row in result['endpoints'] if not row['path'].startswith('/api/control')
+                 or scenario == 'stream_saturation']
+        rows.append({'suite': 'loadtest', 'name': 'server', 'params': params, 'median_ms': None,
+                     **result['server']})
+    return rows
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.serve:
+        serve(args)
+        sys.exit(0)
+
+    result = run_scenario(args)
+    print(f"{'Endpoint':<34} {'Requests':>8} {'Err':>5} {'304':>5} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for row in result['endpoints']:
+        fmt = lambda v: f"{v:>8.2f}" if v is not None else f"{'-':>8}"
+        print(f"{row['path'][:34]:<34} {row['requests']:>8} {row['errors']:>5} "
+              f"{row['not_modified_share'] * 100:>4.0f}% {row['rps']:>8.1f} "
+              f"{fmt(row['median_ms'])} {fmt(row['p90_ms'])} {fmt(row['p99_ms'])} {fmt(row['max_ms'])}")
+    server = result['server']
+    print(f"\nServer ({server['mode']}): CPU {server['cpu_percent_mean']:.1f}% mean, "
+          f"{server['cpu_percent_max']:.1f}% max; RSS {server['rss_idle_mb']:.1f} MB idle, "
+          f"{server['rss_peak_mb']:.1f} MB peak, {server['rss_end_mb']:.1f} MB at end; "
+          f"{server['threads_max']} threads max; {server['stream_events']} stream events")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
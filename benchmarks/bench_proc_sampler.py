@@ -0,0 +1,170 @@
+"""
+Benchmark: psutil vs. /proc process sampling
+Builds a synthetic /proc tree with N fake processes and times one full
+sample with each backend. psutil is pointed at the same tree through
+psutil.PROCFS_PATH so both read identical data.
+
+`--check` instead runs both samplers over a fake tree (including a name
+longer than the kernel's 15-char comm) and over the real /proc, and fails
+unless they agree on pid, ppid, name and RSS.
+
+    python benchmarks/bench_proc_sampler.py [--sizes 1000 5000 20000]
+    python benchmarks/bench_proc_sampler.py --check
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from ram_sentinel.core.proc_sampler import ProcfsSampler, PsutilSampler
+
+NAMES = ["chrome", "python3", "code", "systemd", "bash", "postgres", "nginx", "java"]
+
+def write_fake_process(root, pid, name, ppid=1, rss_pages=1000):
+    """One /proc/[pid] with stat (comm truncated to 15 chars, as the kernel does), statm, status and cmdline."""
+    pid_dir = os.path.join(root, str(pid))
+    os.mkdir(pid_dir)
+    comm = name[:15]
+    fields = ["S", str(ppid), str(pid), str(pid), "0", "-1", "4194304", "0", "0", "0", "0",
+              str(pid % 500), str(pid % 300), "0", "0", "20", "0", "1", "0", "100",
+              str(rss_pages * 4096), str(rss_pages)] + ["0"] * 30
+    with open(os.path.join(pid_dir, "stat"), "w") as f:
+        f.write(f"{pid} ({comm}) {' '.join(fields)}\n")
+    with open(os.path.join(pid_dir, "statm"), "w") as f:
+        f.write(f"{rss_pages * 2} {rss_pages} 100 10 0 {rss_pages} 0\n")
+    with open(os.path.join(pid_dir, "status"), "w") as f:
+        f.write(f"Name:\t{comm}\nPPid:\t{ppid}\nUid:\t1000\t1000\t1000\t1000\n")
+    with open(os.path.join(pid_dir, "cmdline"), "wb") as f:
+        f.write(f"/usr/bin/{name}\0".encode())
+
+def build_fake_proc(root, count):
+    """Write a minimal /proc tree: /proc/stat plus stat/statm/status/cmdline per pid."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  1 0 1 1 0 0 0 0 0 0\nbtime 1700000000\n")
+    for pid in range(1, count + 1):
+        write_fake_process(root, pid, NAMES[pid % len(NAMES)], rss_pages=1000 + (pid * 37) % 200000)
+
+def time_sampler(sampler, repeat):
+    """Best-of-N wall time of one full sample, after a warm-up sample."""
+    sampler.sample()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = sampler.sample()
+        best = min(best, time.perf_counter() - start)
+    return best, len(records)
+
+def run(sizes, repeat=3):
+    results = []
+    for count in sizes:
+        root = tempfile.mkdtemp(prefix="fake_proc_")
+        try:
+            build_fake_proc(root, count)
+            procfs_time, procfs_count = time_sampler(ProcfsSampler(proc_root=root), repeat)
+
+            original = psutil.PROCFS_PATH
+            psutil.PROCFS_PATH = root
+            try:
+                psutil_time, psutil_count = time_sampler(PsutilSampler(), repeat)
+            finally:
+                psutil.PROCFS_PATH = original
+
+            results.append({
+                "processes": count,
+                "psutil_ms": psutil_time * 1000,
+                "procfs_ms": procfs_time * 1000,
+                "speedup": psutil_time / procfs_time if procfs_time else None,
+                "records": (psutil_count, procfs_count)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def table_rows(table):
+    """{pid: (ppid, name, rss_mb)} of a ProcessTable."""
+    names = table.name_pool.names
+    return {table.pids[i]: (table.ppids[i], names[table.name_idx[i]], table.rss_mb[i]) for i in range(len(table))}
+
+def compare(procfs, reference, rss_tolerance, min_overlap=1.0):
+    """Mismatches between two table_rows() results over their common pids."""
+    common = procfs.keys() & reference.keys()
+    problems = []
+    if len(common) < min_overlap * max(len(procfs), len(reference)):
+        problems.append(f"only {len(common)} common pids ({len(procfs)} /proc, {len(reference)} psutil)")
+    for pid in sorted(common):
+        (ppid, name, rss), (ref_ppid, ref_name, ref_rss) = procfs[pid], reference[pid]
+        if ppid != ref_ppid:
+            problems.append(f"pid {pid}: ppid {ppid} != {ref_ppid}")
+        if name != ref_name:
+            problems.append(f"pid {pid}: name {name!r} != {ref_name!r}")
+        if abs(rss - ref_rss) > rss_tolerance(ref_rss):
+            problems.append(f"pid {pid}: rss {rss:.1f} MB != {ref_rss:.1f} MB")
+    return problems
+
+def check_parity():
+    """
+    Differences between the /proc and psutil samplers: on a fake tree they
+    must match exactly; on the live /proc, processes may change between
+    the two walks, so RSS gets some slack and only most pids must overlap.
+    """
+    problems = []
+    root = tempfile.mkdtemp(prefix="fake_proc_")
+    try:
+        build_fake_proc(root, 50)
+        write_fake_process(root, 51, "gnome-shell-calendar-server", ppid=7, rss_pages=5000)
+        procfs = table_rows(ProcfsSampler(proc_root=root).sample())
+        original = psutil.PROCFS_PATH
+        psutil.PROCFS_PATH = root
+        # process_iter caches Process objects by pid; fake and real pids overlap
+        psutil.process_iter.cache_clear()
+        try:
+            reference = table_rows(PsutilSampler().sample())
+        finally:
+            psutil.PROCFS_PATH = original
+            psutil.process_iter.cache_clear()
+        problems += [f"fake /proc: {p}" for p in compare(procfs, reference, lambda mb: 1e-6)]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if ProcfsSampler.is_available():
+        procfs = table_rows(ProcfsSampler().sample())
+        reference = table_rows(PsutilSampler().sample())
+        problems += [f"/proc: {p}" for p in compare(procfs, reference, lambda mb: max(2.0, mb * 0.05),
+                                                     min_overlap=0.9)]
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="psutil vs. /proc sampler benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if the /proc sampler's records differ from psutil's")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        print("The /proc sampler is Linux-only.")
+        return
+
+    if args.check:
+        problems = check_parity()
+        for problem in problems[:20]:
+            print(problem)
+        if problems:
+            print(f"/proc and psutil samplers disagree ({len(problems)} differences)")
+            sys.exit(1)
+        print("/proc and psutil samplers agree on pid, ppid, name and RSS")
+        sys.exit(0)
+
+    print(f"{'Processes':<12} {'psutil (ms)':<14} {'/proc (ms)':<14} {'Speedup':<8}")
+    print("-" * 50)
+    for r in run(args.sizes, args.repeat):
+        print(f"{r['processes']:<12} {r['psutil_ms']:<14.1f} {r['procfs_ms']:<14.1f} {r['speedup']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: ProcessMonitor hot paths on a synthetic process population,
+and history range queries over a fully populated store.
+"""
+import random
+import time
+from common import FakeSampler, measure
+
+from ram_sentinel.core.history import HistoryStore, pack_query
+from ram_sentinel.core.process_monitor import ProcessMonitor, ProcessSnapshot
+
+def filled_history(days=7, step=5):
+    """HistoryStore with `days` of system samples every `step` seconds."""
+    history = HistoryStore()
+    rng = random.Random(1)
+    start = time.time() - days * 86400
+    for key in history.SYSTEM_SERIES:
+        series = history.system[key]
+        for offset in range(0, days * 86400, step):
+            series.add(start + offset, 40 + rng.random() * 20)
+    return history
+
+def run(quick=False):
+    results = []
+    sizes = [1000, 5000] if quick else [1000, 5000, 20000]
+    repeat = 3 if quick else 10
+    for count in sizes:
+        # max_age=0: every call pays for a full walk, like the pre-snapshot code
+        cold = ProcessMonitor(snapshot=ProcessSnapshot(max_age=0), sampler=FakeSampler(count))
+        cached = ProcessMonitor(snapshot=ProcessSnapshot(max_age=3600), sampler=FakeSampler(count))
+        cases = [
+            ('get_all_processes', cold.get_all_processes),
+            ('get_top_processes', lambda: cold.get_top_processes(15)),
+            ('get_top_processes_cached', lambda: cached.get_top_processes(15)),
+            ('get_ram_hogs', cold.get_ram_hogs),
+            ('get_top_applications', lambda: cold.get_top_applications(15)),
+            ('generate_report', cold.generate_report),
+        ]
+        for name, fn in cases:
+            results.append({'suite': 'process_monitor', 'name': name, 'params': {'processes': count},
+                            **measure(fn, repeat=repeat)})
+
+    history = filled_history(days=2 if quick else 7)
+    for label, seconds in (('1h', 3600), ('24h', 86400), ('7d', 7 * 86400)):
+        def query(seconds=seconds):
+            now = time.time()
+            return pack_query(history.query(list(history.SYSTEM_SERIES), now - seconds, now, 300))
+        results.append({'suite': 'process_monitor', 'name': 'history_query', 'params': {'range': label, 'points': 300},
+                        **measure(query, repeat=repeat)})
+    return results
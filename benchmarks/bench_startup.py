@@ -0,0 +1,101 @@
+"""
+Benchmark: entry point startup cost.
+Each module is imported in a fresh interpreter with -X importtime, so the
+numbers are cold-import totals rather than whatever this process already
+loaded. `--check` fails if the CLI import pulls in the heavy dependencies
+(Playwright, Flask, Rich) that subcommands are meant to load on demand.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --check
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['ram_sentinel.cli', 'ram_sentinel.dashboard.server', 'ram_sentinel.tray_app']
+# Must not be imported just to parse the command line
+HEAVY = ['playwright', 'flask', 'rich', 'waitress', 'PIL', 'pystray']
+
+def python(*args):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+def import_profile(module):
+    """(total ms, {package: cumulative ms of direct imports}) for a cold import of module."""
+    result = python('-X', 'importtime', '-c', f"import {module}")
+    packages = {}
+    total_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:].rstrip()  # Keep the nesting indent
+        if name == module:
+            total_us = int(cumulative)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if depth == 1:  # Direct dependencies, grouped by top-level package
+            package = name.strip().split('.')[0]
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1000
+    if total_us is None:
+        # Import failed (e.g. no display for pystray); report what loaded before it did
+        return None, packages
+    return total_us / 1000, packages
+
+def loaded_heavy(module):
+    """Heavy packages present in sys.modules after importing module."""
+    result = python('-c', f"import sys, {module}; print(' '.join(sorted(sys.modules)))")
+    modules = set(result.stdout.split())
+    return [name for name in HEAVY if name in modules]
+
+def wall_ms(args, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        python(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run(quick=False):
+    repeat = 3 if quick else 10
+    results = []
+    for module in MODULES:
+        totals = [import_profile(module)[0] for _ in range(repeat)]
+        totals = [t for t in totals if t is not None]
+        results.append({'suite': 'startup', 'name': 'import', 'params': {'module': module},
+                        'median_ms': statistics.median(totals) if totals else None,
+                        'heavy_modules': loaded_heavy(module)})
+    for args in (['-m', 'ram_sentinel', '--help'], ['-c', 'pass']):
+        results.append({'suite': 'startup', 'name': 'process', 'params': {'args': ' '.join(args)},
+                        'median_ms': wall_ms(args, repeat)})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entry point startup benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if importing the CLI loads a heavy dependency")
+    args = parser.parse_args()
+
+    if args.check:
+        heavy = loaded_heavy('ram_sentinel.cli')
+        if heavy:
+            print(f"ram_sentinel.cli imports {', '.join(heavy)} at startup")
+            sys.exit(1)
+        print("ram_sentinel.cli imports no heavy dependencies")
+        sys.exit(0)
+
+    for module in MODULES:
+        total, packages = import_profile(module)
+        top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:5]
+        label = f"{total:.1f} ms" if total is not None else "import failed"
+        print(f"{module:<32} {label:>14}   " + ", ".join(f"{name} {ms:.0f}" for name, ms in top))
+        heavy = loaded_heavy(module)
+        if heavy:
+            print(f"{'':<32} {'':>14}   loads: {', '.join(heavy)}")
+    print(f"{'python -m ram_sentinel --help':<32} {wall_ms(['-m', 'ram_sentinel', '--help'], args.repeat):>11.1f} ms")
+    print(f"{'python -c pass':<32} {wall_ms(['-c', 'pass'], args.repeat):>11.1f} ms")
@@ -0,0 +1,41 @@
+"""
+Benchmark: ReadLaterStorage.save_tabs as the archive grows.
+"""
+import json
+import tempfile
+from pathlib import Path
+from common import measure
+
+from ram_sentinel.core.config import settings
+
+def make_tabs(count, offset=0):
+    return [{"title": f"Tab {offset + i}", "url": f"https://example.com/{offset + i}",
+             "timestamp": "2025-01-01T00:00:00", "fingerprint": "Ghost"} for i in range(count)]
+
+def run(quick=False):
+    from ram_sentinel.optimizer.storage import ReadLaterStorage
+
+    results = []
+    archive_sizes = [0, 1000, 10000] if quick else [0, 1000, 10000, 50000]
+    # Suites share one process and one settings object: put the archive back afterwards
+    saved = settings.READ_LATER_DIR
+    try:
+        for archived in archive_sizes:
+            with tempfile.TemporaryDirectory(prefix="bench_storage_") as base:
+                settings.READ_LATER_DIR = base
+                storage = ReadLaterStorage()
+                batches = [{"batch_id": f"b{n}", "count": 10, "tabs": make_tabs(10, n * 10)}
+                           for n in range(archived // 10)]
+                seed = json.dumps(batches)
+
+                def setup():
+                    # Reset the archive so every run appends to the same size
+                    Path(base, "index.json").write_text(seed, encoding="utf-8")
+
+                new_tabs = make_tabs(10, archived)
+                results.append({'suite': 'storage', 'name': 'save_tabs',
+                                'params': {'archived_tabs': archived, 'new_tabs': 10},
+                                **measure(lambda _: storage.save_tabs(new_tabs), repeat=5, setup=setup)})
+    finally:
+        settings.READ_LATER_DIR = saved
+    return results
@@ -0,0 +1,174 @@
+"""
+Benchmark: TabPurger scan and HPCE scoring against fake Page objects.
+The latency cases give every browser call a fixed delay, as a CDP round
+trip has, so they show what the number of round trips per scan costs.
+The engine cases compare the sync engine with the async one
+(AsyncTabPurger), including a few hung pages the async engine skips.
+The pushed case has every page push its activity first, so the scan is
+decided from the activity table without asking any page. The tiered case
+runs RECLAIM_MODE = "tiered" over tabs spread across the confidence tiers
+and reports the actions taken and the JS heap they freed. plan_purge
+times the purge planner choosing tabs to cover a memory target.
+
+`--check` breaks the discard of one tab partway (set_content raising on
+the sync engine, hanging past the page timeout on the async one) and
+fails unless its URL still reaches the read-later archive.
+
+    python benchmarks/bench_tab_purger.py --check
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from common import AsyncFakeContext, FakeContext, measure
+
+from ram_sentinel.core.config import settings
+
+def run(quick=False):
+    # Suites share one process and one settings object: put the archive back afterwards
+    saved = settings.READ_LATER_DIR
+    with tempfile.TemporaryDirectory(prefix="bench_readlater_") as archive:
+        settings.READ_LATER_DIR = archive
+        try:
+            return _run(quick)
+        finally:
+            settings.READ_LATER_DIR = saved
+
+def _run(quick):
+    from ram_sentinel.optimizer.async_tab_purger import AsyncTabPurger
+    from ram_sentinel.optimizer.lifecycle import TIERS
+    from ram_sentinel.optimizer.planner import plan_purge
+    from ram_sentinel.optimizer.tab_purger import TabPurger
+
+    results = []
+    purger = TabPurger()
+    async_purger = AsyncTabPurger(concurrency=8, page_timeout=0.1)
+    tab_counts = [10, 50] if quick else [10, 50, 150]
+    for tabs in tab_counts:
+        def setup(tabs=tabs):
+            purger.context = FakeContext(tabs)
+            return purger.context
+
+        results.append({'suite': 'tab_purger', 'name': 'scan_and_purge', 'params': {'tabs': tabs},
+                        **measure(lambda ctx: purger.scan_and_purge(dry_run=False), repeat=3, warmup=0, setup=setup),
+                        'round_trips': purger.last_scan['round_trips']})
+
+        for hung in (0, 3):
+            for engine, target, context_class in (('sync', purger, FakeContext),
+                                                  ('async', async_purger, AsyncFakeContext)):
+                def engine_setup(tabs=tabs, hung=hung, target=target, context_class=context_class):
+                    target.context = context_class(tabs, latency=0.002, hung=hung, hung_latency=0.5)
+                    return target.context
+
+                results.append({'suite': 'tab_purger', 'name': f'scan_{engine}',
+                                'params': {'tabs': tabs, 'latency_ms': 2, 'hung': hung},
+                                **measure(lambda ctx, target=target: target.scan_and_purge(dry_run=True),
+                                          repeat=3, warmup=0, setup=engine_setup),
+                                'round_trips': target.last_scan['round_trips'],
+                                'skipped': target.last_scan.get('skipped', 0)})
+
+        def pushed_setup(tabs=tabs):
+            purger.context = FakeContext(tabs, latency=0.002)
+            purger.inject_tracker()
+            purger.context.push_activity()
+            return purger.context
+
+        results.append({'suite': 'tab_purger', 'name': 'scan_pushed', 'params': {'tabs': tabs, 'latency_ms': 2},
+                        **measure(lambda ctx: purger.scan_and_purge(dry_run=True), repeat=3, warmup=0,
+                                  setup=pushed_setup),
+                        'round_trips': purger.last_scan['round_trips']})
+
+        def tiered_setup(tabs=tabs):
+            purger.context = FakeContext(tabs)
+            now_ms = time.time() * 1000
+            for page in purger.context.pages:
+                # Idle 10 to 38 minutes: spans keep, freeze, discard and close for a "Ghost" tab
+                idle_minutes = 10 + 28 * page.index / tabs
+                page._hpce.update(clicks=0, keys=0, scrolls=0, lastActive=now_ms - idle_minutes * 60000)
+            return purger.context
+
+        settings.RECLAIM_MODE = 'tiered'
+        try:
+            timing = measure(lambda ctx: purger.scan_and_purge(dry_run=False), repeat=3, warmup=0,
+                             setup=tiered_setup)
+        finally:
+            settings.RECLAIM_MODE = 'close'
+        reclaimed = purger.last_scan['reclaimed']
+        results.append({'suite': 'tab_purger', 'name': 'scan_tiered', 'params': {'tabs': tabs}, **timing,
+                        'round_trips': purger.last_scan['round_trips'],
+                        'actions': {tier: sum(1 for r in reclaimed if r['action'] == tier) for tier in TIERS},
+                        'freed_heap_mb': sum(r['freed_heap'] or 0 for r in reclaimed) / 1024 ** 2})
+
+        candidates = [{'title': page._title, 'url': page.url, 'confidence': (page.index * 37 % 100) / 200,
+                       'bytes': page.heap_bytes} for page in FakeContext(tabs).pages]
+        need = sum(t['bytes'] for t in candidates) // 4
+        chosen, expected = plan_purge(candidates, need, max_confidence=1.0)
+        results.append({'suite': 'tab_purger', 'name': 'plan_purge', 'params': {'tabs': tabs},
+                        **measure(lambda: plan_purge(candidates, need, max_confidence=1.0), repeat=20),
+                        'chosen': len(chosen), 'overshoot_pct': (expected - need) / need * 100,
+                        'confidence_lost': sum(t['confidence'] for t in chosen)})
+
+        vectors = [(page._hpce, 60.0 * page.index) for page in FakeContext(tabs).pages]
+        results.append({'suite': 'tab_purger', 'name': 'run_hpce_analysis', 'params': {'tabs': tabs},
+                        **measure(lambda: [purger.run_hpce_analysis(v, idle) for v, idle in vectors],
+                                  repeat=20)})
+    async_purger.stop_session()
+    return results
+
+def check_failed_discard():
+    """Engines whose partly failed discard lost the tab's URL (empty list if none)."""
+    from ram_sentinel.optimizer.async_tab_purger import AsyncTabPurger
+    from ram_sentinel.optimizer.tab_purger import TabPurger
+
+    async def hang(html):
+        await asyncio.sleep(1)
+
+    def fail(html):
+        raise RuntimeError("set_content failed")
+
+    lost = []
+    saved = settings.READ_LATER_DIR, settings.RECLAIM_MODE
+    try:
+        settings.RECLAIM_MODE = 'tiered'
+        for engine, purger_class, context_class, broken in (('sync', TabPurger, FakeContext, fail),
+                                                             ('async', AsyncTabPurger, AsyncFakeContext, hang)):
+            with tempfile.TemporaryDirectory(prefix="bench_readlater_") as archive:
+                settings.READ_LATER_DIR = archive
+                purger = purger_class(page_timeout=0.1) if engine == 'async' else purger_class()
+                purger.context = context_class(2)
+                page = purger.context.pages[1]
+                url = page.url
+                # Idle long enough to be discarded, not yet closed
+                page._hpce.update(clicks=0, keys=0, scrolls=0, lastActive=time.time() * 1000 - 25 * 60000)
+                page.set_content = broken
+                scanned = purger.scan_and_purge(dry_run=False)
+                if asyncio.iscoroutine(scanned):
+                    asyncio.run(scanned)
+                index = purger.storage.json_path
+                urls = [tab['url'] for batch in json.loads(index.read_text()) for tab in batch['tabs']] \
+                    if index.exists() else []
+                if url not in urls:
+                    lost.append(engine)
+    finally:
+        settings.READ_LATER_DIR, settings.RECLAIM_MODE = saved
+    return lost
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tab purger benchmark")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if a discard failing partway loses the tab's URL")
+    args = parser.parse_args()
+
+    if args.check:
+        lost = check_failed_discard()
+        if lost:
+            print(f"Failed discard lost the tab's URL ({', '.join(lost)} engine)")
+            sys.exit(1)
+        print("Failed discards keep the tab's URL in the archive")
+        sys.exit(0)
+
+    for result in run(args.quick):
+        print(result)
@@ -0,0 +1,229 @@
+"""
+Shared helpers for the RAM Sentinel benchmark suite: timing, synthetic
+process populations and fake Playwright objects.
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ram_sentinel.core.process_table import NamePool, ProcessTable
+
+NAMES = ["chrome", "python3", "code", "systemd", "bash", "postgres", "nginx", "java",
+         "firefox", "slack", "node", "dockerd", "Xorg", "pulseaudio", "gnome-shell"]
+
+def measure(fn, repeat=5, warmup=1, setup=None):
+    """
+    Run fn() `repeat` times and return timing stats in milliseconds.
+    setup(), if given, runs before every call and is not timed; its return
+    value is passed to fn.
+    """
+    for _ in range(warmup):
+        fn(setup()) if setup else fn()
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'mean_ms': statistics.fmean(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'min_ms': samples[0],
+        'max_ms': samples[-1]
+    }
+
+class FakeSampler:
+    """
+    Process sampler returning a synthetic, slightly changing population.
+    churn is the share of processes replaced by new pids on every sample.
+    """
+    name = 'fake'
+
+    def __init__(self, count, seed=42, churn=0.0):
+        self.count = count
+        self.churn = churn
+        self.rng = random.Random(seed)
+        self.name_pool = NamePool()
+        self.population = [self._process(pid) for pid in range(1, count + 1)]
+        self.next_pid = count + 1
+
+    def _process(self, pid):
+        return (pid, self.rng.choice(NAMES), self.rng.lognormvariate(3.5, 1.5), max(1, pid // 8))
+
+    def sample(self):
+        for _ in range(int(self.count * self.churn)):
+            self.population[self.rng.randrange(self.count)] = self._process(self.next_pid)
+            self.next_pid += 1
+        table = ProcessTable(self.name_pool)
+        jitter = self.rng.random
+        for pid, name, rss, ppid in self.population:
+            table.append(pid, name, rss * (0.98 + jitter() * 0.04), jitter() * 5, ppid)
+        return table
+
+class FakePage:
+    """Stands in for a Playwright Page: title(), url, evaluate(), wait_for_timeout(), close()."""
+    def __init__(self, context, index, idle_seconds, latency=0.0):
+        self.context = context
+        self.index = index
+        self.url = f"https://example.com/article/{index}"
+        self._title = f"Example article {index}"
+        self.latency = latency
+        self.evaluate_calls = 0
+        now_ms = time.time() * 1000
+        self._hpce = {
+            'clicks': index % 7,
+            'keys': index % 23,
+            'scrolls': index % 60,
+            'mouseDistance': index,
+            'startTime': now_ms - idle_seconds * 1000 - 60000,
+            'lastActive': now_ms - idle_seconds * 1000
+        }
+        self.closed = False
+        self.heap_bytes = (20 + index % 40) * 1024 ** 2
+        self.lifecycle = 'active'
+
+    def title(self):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._title
+
+    def evaluate(self, script, arg=None):
+        self.evaluate_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(script)
+
+    def _result(self, script):
+        if 'visibilityState' in script:
+            return 'visible' if self.index == 0 else 'hidden'
+        if 'document.title' in script:
+            return {'title': self._title, 'hpce': dict(self._hpce)}
+        return dict(self._hpce)
+
+    def goto(self, url):
+        self.url = url
+        self.heap_bytes = 1024 ** 2
+
+    def set_content(self, html):
+        self.content = html
+
+    def wait_for_timeout(self, timeout):
+        time.sleep(timeout / 1000)
+
+    def close(self):
+        self.closed = True
+        self.context._pages.remove(self)
+
+class FakeCDPSession:
+    """CDP session on a FakePage: heap metrics and lifecycle state."""
+    def __init__(self, page):
+        self.page = page
+
+    def send(self, method, params=None):
+        if method == 'Performance.getMetrics':
+            return {'metrics': [{'name': 'JSHeapUsedSize', 'value': self.page.heap_bytes}]}
+        if method == 'Page.setWebLifecycleState':
+            self.page.lifecycle = params['state']
+        return {}
+
+class FakeContext:
+    """
+    Stands in for a BrowserContext with N tabs; a share of them long idle.
+    `hung` of the pages take hung_latency seconds per call instead.
+    """
+    page_class = FakePage
+
+    def __init__(self, tabs, idle_share=0.3, latency=0.0, seed=7, hung=0, hung_latency=5.0):
+        rng = random.Random(seed)
+        self.init_scripts = []
+        self.bindings = {}
+        self._pages = []
+        for i in range(tabs):
+            idle = rng.uniform(3 * 3600, 6 * 3600) if rng.random() < idle_share else rng.uniform(0, 600)
+            self._pages.append(self.page_class(self, i, idle, latency))
+        for page in rng.sample(self._pages, hung):
+            page.latency = hung_latency
+
+    def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    def expose_binding(self, name, callback):
+        self.bindings[name] = callback
+
+    def new_cdp_session(self, page):
+        return FakeCDPSession(page)
+
+    def push_activity(self):
+        """Every page calls every exposed binding once, as the tracker does when a page loads."""
+        for page in self.pages:
+            for callback in self.bindings.values():
+                callback({'page': page, 'context': self}, dict(page._hpce, title=page._title))
+
+    @property
+    def pages(self):
+        # Playwright returns a fresh list, so closing while iterating is safe
+        return list(self._pages)
+
+class AsyncFakePage(FakePage):
+    """FakePage with the async Page API; latency is awaited, not slept."""
+    async def title(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._title
+
+    async def evaluate(self, script, arg=None):
+        self.evaluate_calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(script)
+
+    async def close(self):
+        FakePage.close(self)
+
+    async def goto(self, url):
+        FakePage.goto(self, url)
+
+    async def set_content(self, html):
+        FakePage.set_content(self, html)
+
+class AsyncFakeCDPSession(FakeCDPSession):
+    async def send(self, method, params=None):
+        return FakeCDPSession.send(self, method, params)
+
+class AsyncFakeContext(FakeContext):
+    """FakeContext of AsyncFakePages."""
+    page_class = AsyncFakePage
+
+    async def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    async def expose_binding(self, name, callback):
+        self.bindings[name] = callback
+
+    async def new_cdp_session(self, page):
+        return AsyncFakeCDPSession(page)
+
+def environment():
+    """Metadata stored with every result file."""
+    import platform
+    import subprocess
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
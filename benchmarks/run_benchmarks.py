@@ -0,0 +1,87 @@
+"""
+RAM Sentinel benchmark suite
+Runs the monitoring and purging hot-path benchmarks and writes the results
+as JSON so they can be compared release to release.
+
+    python benchmarks/run_benchmarks.py                     # everything
+    python benchmarks/run_benchmarks.py --quick --only api  # subset
+    python benchmarks/run_benchmarks.py --compare old.json  # diff against a previous run
+    python benchmarks/run_benchmarks.py --only dashboard_load  # concurrent HTTP load
+    python benchmarks/run_benchmarks.py --only loadtest  # simulated machine, server CPU/RSS
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import environment
+
+SUITES = ['process_monitor', 'proc_sampler', 'tab_purger', 'storage', 'api', 'dashboard_load', 'fleet', 'startup', 'concurrency', 'loadtest']
+
+def run_suite(name, quick):
+    if name == 'proc_sampler':
+        if not sys.platform.startswith('linux'):
+            return []
+        import bench_proc_sampler
+        sizes = [1000, 5000] if quick else [1000, 5000, 20000]
+        return [{'suite': 'proc_sampler', 'name': backend, 'params': {'processes': r['processes']},
+                 'min_ms': r[f'{backend}_ms']}
+                for r in bench_proc_sampler.run(sizes) for backend in ('psutil', 'procfs')]
+    module = __import__(f"bench_{name}")
+    return module.run(quick=quick)
+
+def result_key(result):
+    return (result['suite'], result['name'], json.dumps(result['params'], sort_keys=True))
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    print(f"\n{'Benchmark':<70} {'Before':>10} {'After':>10} {'Change':>8}")
+    print("-" * 101)
+    for result in results:
+        old = baseline.get(result_key(result))
+        if not old:
+            continue
+        metric = 'median_ms' if 'median_ms' in result else 'min_ms'
+        before, after = old.get(metric), result.get(metric)
+        if not before or after is None:
+            continue
+        label = f"{result['suite']}.{result['name']} {result['params']}"
+        print(f"{label[:70]:<70} {before:>10.2f} {after:>10.2f} {(after - before) / before * 100:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="RAM Sentinel benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=SUITES, help="Suites to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="Smaller populations and fewer repeats")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    args = parser.parse_args()
+
+    # Purge/save log lines would drown the results
+    logging.getLogger("ram_sentinel").setLevel(logging.WARNING)
+
+    results = []
+    for suite in args.only or SUITES:
+        print(f"Running {suite}...")
+        for result in run_suite(suite, args.quick):
+            results.append(result)
+            metric = 'median_ms' if 'median_ms' in result else 'min_ms'
+            value = f"{result[metric]:>10.2f} ms" if result[metric] is not None else f"{'-':>10}"
+            if 'rps' in result:
+                value += f" {result['rps']:>8.0f} req/s"
+            if 'cpu_percent_mean' in result:
+                value += f" cpu {result['cpu_percent_mean']:.1f}% rss {result['rss_peak_mb']:.0f} MB"
+            print(f"  {result['name']:<28} {str(result['params']):<45} {value}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
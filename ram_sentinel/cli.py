@@ -1,28 +1,34 @@
 import argparse
 import sys
-import time
-from rich.console import Console
-from rich.table import Table
 from .core.config import settings
-from .core.logger import logger
-from .optimizer.tab_purger import TabPurger
-from .vault.manager import get_vault
+from .core.logger import console
 
-console = Console()
+# Subcommands import what they need (Playwright, Flask) when they run, and
+# Rich loads on first output, so e.g. `panic` and `vault --unmount` don't pay
+# for the browser stack.
 
 def cmd_optimize(args):
     """Handle optimize command (Tab Purger)."""
+    from .optimizer.tab_purger import create_tab_purger
+    from .core.pressure import ReclaimScheduler
     console.print("[bold blue]RAM Sentinel | Neural Tab-Purger[/bold blue]")
-    purger = TabPurger()
+    if args.tiered:
+        settings.RECLAIM_MODE = 'tiered'
+    if args.target_free:
+        settings.PURGE_TARGET_FREE_MB = args.target_free
+    purger = create_tab_purger('async' if args.use_async else None)
     try:
         purger.start_session(headless=not args.visible)
         
         if args.auto:
+            # Sleeps between scans, backing off when idle and waking on memory pressure
+            scheduler = ReclaimScheduler()
             while True:
-                purger.scan_and_purge(dry_run=args.dry_run)
+                purged = purger.scan_and_purge(dry_run=args.dry_run)
                 if args.once:
                     break
-                time.sleep(60)
+                # A dry run reclaims nothing, so its candidates must not reset the backoff
+                scheduler.wait(0 if args.dry_run else purged, idle=purger.idle)
         else:
             # Single scan
             purger.scan_and_purge(dry_run=args.dry_run)
@@ -36,6 +42,7 @@ def cmd_optimize(args):
 
 def cmd_vault(args):
     """Handle vault command (Ghost Drive)."""
+    from .vault.manager import get_vault
     console.print("[bold green]RAM Sentinel | Ghost Drive[/bold green]")
     vault = get_vault()
     
@@ -59,10 +66,23 @@ def cmd_vault(args):
 
 def cmd_panic(args):
     """System-wide panic."""
+    # 1. Destroy Vault first: it needs nothing heavy, so it runs within
+    # milliseconds of launch instead of after Playwright has loaded
+    vault_error = None
+    try:
+        from .vault.manager import get_vault
+        vault = get_vault()
+        vault.panic()
+    except Exception as e:
+        vault_error = e
+
     console.print("[bold red]PANIC PROTOCOL INITIATED[/bold red]")
-    
-    # 1. Purge tabs
+    if vault_error:
+        console.print(f"Vault wipe failed: {vault_error}")
+
+    # 2. Purge tabs
     try:
+        from .optimizer.tab_purger import TabPurger
         purger = TabPurger()
         purger.start_session()
         console.print("Closing all tabs...")
@@ -74,12 +94,14 @@ def cmd_panic(args):
     except Exception as e:
         console.print(f"Purge failed: {e}")
 
-    # 2. Destroy Vault
-    try:
-        vault = get_vault()
-        vault.panic()
-    except Exception as e:
-        console.print(f"Vault wipe failed: {e}")
+def cmd_dashboard(args):
+    """Run the web dashboard."""
+    # Flask is only needed here, so import it on demand
+    from .dashboard.server import run_server
+    console.print(f"[bold blue]RAM Sentinel | Dashboard[/bold blue] http://{args.host}:{args.port}")
+    from .dashboard.fleet import parse_agents
+    run_server(host=args.host, port=args.port, production=args.production, threads=args.threads,
+               agents=parse_agents(args.agents) if args.agents else None)
 
 def main():
     parser = argparse.ArgumentParser(description="RAM Sentinel - Memory Optimization & Secure Storage")
@@ -91,6 +113,12 @@ def main():
     opt_parser.add_argument("--once", action="store_true", help="Run once then exit (used with --auto)")
     opt_parser.add_argument("--dry-run", action="store_true", help="Scan but do not close tabs")
     opt_parser.add_argument("--visible", action="store_true", help="Show browser window")
+    opt_parser.add_argument("--async", dest="use_async", action="store_true",
+                            help="Evaluate tabs concurrently, skipping slow ones (PURGER_ENGINE=async)")
+    opt_parser.add_argument("--tiered", action="store_true",
+                            help="Freeze, then discard, then close idle tabs (RECLAIM_MODE=tiered)")
+    opt_parser.add_argument("--target-free", type=int, metavar="MB",
+                            help="Close only enough tabs to get this much memory available (PURGE_TARGET_FREE_MB)")
 
     # Vault Command
     vault_parser = subparsers.add_parser("vault", help="Manage Ghost Drive")
@@ -100,6 +128,14 @@ def main():
     vault_parser.add_argument("--size", help="Size of vault (e.g. 500M)")
     vault_parser.add_argument("--mount-point", help="Drive letter (win) or path (unix)")
 
+    # Dashboard Command
+    dash_parser = subparsers.add_parser("dashboard", help="Run the web dashboard")
+    dash_parser.add_argument("--production", action="store_true", help="Serve with waitress (multi-threaded)")
+    dash_parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    dash_parser.add_argument("--port", type=int, default=5000)
+    dash_parser.add_argument("--threads", type=int, help="Worker threads in production mode")
+    dash_parser.add_argument("--agents", help="Fleet mode: agents to aggregate (host:port,... or @file)")
+
     # Panic Command
     subparsers.add_parser("panic", help="Emergency system-wide wipe")
 
@@ -109,6 +145,8 @@ def main():
         cmd_optimize(args)
     elif args.command == "vault":
         cmd_vault(args)
+    elif args.command == "dashboard":
+        cmd_dashboard(args)
     elif args.command == "panic":
         cmd_panic(args)
     else:
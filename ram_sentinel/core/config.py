@@ -9,11 +9,76 @@ class Config:
     INACTIVE_THRESHOLD_MINUTES: int = 30
     READ_LATER_DIR: str = str(Path.home() / "Documents" / "RAM_Sentinel_ReadLater")
     
+    SCAN_INTERVAL_SECONDS: int = 60  # Purger cadence when tabs are being reclaimed
+    SCAN_MAX_INTERVAL_SECONDS: int = 600  # Idle backoff ceiling
+    PURGER_ENGINE: str = "sync"  # "sync" (one page at a time) or "async" (concurrent, per-page timeout)
+    PURGER_CONCURRENCY: int = 8  # Pages evaluated at once by the async engine
+    PURGER_PAGE_TIMEOUT_SECONDS: float = 5.0  # Async engine skips a page for the cycle after this
+    ACTIVITY_PUSH: bool = True  # Pages push activity through a binding instead of being polled per scan
+    ACTIVITY_PUSH_INTERVAL_MS: int = 2000  # Pages push at most this often (activity is coalesced)
+    RECLAIM_MODE: str = "close"  # "close" or "tiered" (freeze, then discard, then close)
+    FREEZE_LEAD_MINUTES: float = 20.0  # Tiered mode: freeze background tabs this long before their close is due
+    DISCARD_LEAD_MINUTES: float = 10.0  # Tiered mode: archive and unload tabs this long before their close is due
+    PURGE_TARGET_FREE_MB: int = 0  # If set, close only enough tabs to get this much memory available
+    PLANNER_MAX_CONFIDENCE: float = 0.5  # The planner never closes tabs at or above this confidence
+
+    # Memory Pressure (Linux PSI / cgroup v2)
+    PRESSURE_ENABLED: bool = True
+    PRESSURE_PSI_STALL_MS: int = 150  # Trigger when tasks stall this long...
+    PRESSURE_PSI_WINDOW_MS: int = 2000  # ...within this window
+    PRESSURE_AVG10_THRESHOLD: float = 10.0  # Used when triggers can't be registered
+    PRESSURE_MIN_WAKE_SECONDS: int = 10  # Debounce between wakeups
+
     # Vault Settings
     DEFAULT_VAULT_SIZE: str = "500M"
     DEFAULT_MOUNT_POINT_WIN: str = "R:"
     DEFAULT_MOUNT_POINT_UNIX: str = "/mnt/ram_vault"
+    VAULT_INDEX_TOP_FILES: int = 10  # Largest files / directories reported by /api/vault/stats
+    VAULT_INDEX_RECONCILE_SECONDS: int = 600  # Full rescan to correct drift while inotify is active
+    VAULT_INDEX_SCAN_SECONDS: int = 30  # Rescan interval where inotify is unavailable
     
+    # Process Monitor
+    PROCESS_SNAPSHOT_MAX_AGE: float = 1.0  # Seconds a process walk is reused
+    PROCESS_SAMPLER: str = "auto"  # "auto" (/proc on Linux), "procfs" or "psutil"
+    ACCURATE_MEMORY: bool = False  # Rank by PSS/USS from smaps_rollup (Linux)
+    SMAPS_WORKERS: int = 4  # Threads reading smaps_rollup
+    SMAPS_BUDGET_MS: int = 200  # Time budget per measurement cycle
+    SMAPS_MAX_PROCESSES: int = 50  # Only the largest processes (by RSS) are measured
+    SAMPLER_INTERVAL_SECONDS: float = 1.0  # Background system stats cadence
+    SAMPLER_PROCESS_EVERY: int = 2  # Walk processes every N sampler ticks
+
+    # Dashboard server
+    COLLECTOR_INTERVAL_SECONDS: float = 2.0  # How often API snapshots are rebuilt
+    COLLECTOR_PROCESS_COUNT: int = 50  # Processes kept per snapshot (/api/processes?count= up to this)
+    DASHBOARD_THREADS: int = 16  # Worker threads in production mode (waitress)
+    DASHBOARD_MAX_STREAMS: int = 8  # Open /api/stream connections (each holds a worker); others poll instead
+    DASHBOARD_RESERVED_THREADS: int = 4  # Workers streams can never take, kept for API and control requests
+    DASHBOARD_GZIP_MIN_BYTES: int = 1024  # Compress JSON responses at least this large
+    METRICS_TOP_PROCESSES: int = 10  # Processes exported individually on /metrics
+
+    # Fleet mode (one dashboard aggregating many agents)
+    FLEET_AGENTS: str = ""  # Comma separated host:port list, or @file with one agent per line
+    FLEET_INTERVAL_SECONDS: float = 2.0
+    FLEET_TIMEOUT_SECONDS: float = 1.5  # Per-agent request timeout
+    FLEET_MAX_BACKOFF_SECONDS: float = 60.0  # Retry ceiling for unreachable agents
+
+    # History (fed by the background sampler)
+    HISTORY_ENABLED: bool = True
+    HISTORY_PATH: str = str(Path.home() / ".ram_sentinel" / "history.bin")
+    HISTORY_RAW_SECONDS: int = 300  # Raw samples kept for 5 minutes
+    HISTORY_MINUTE_HOURS: int = 72  # 1-minute rollups kept for 3 days
+    HISTORY_HOUR_DAYS: int = 30  # 1-hour rollups kept for 30 days
+    HISTORY_MAX_PROCESSES: int = 32  # Hard cap on per-process series
+    HISTORY_TRACK_TOP: int = 10  # Processes recorded per sample (by RSS)
+    HISTORY_TRACK_GROWING: int = 5  # Plus the processes that grew most since first seen
+    HISTORY_FLUSH_SECONDS: int = 300  # Spill to disk this often
+
+    # Leak Detector (runs over recorded history)
+    LEAK_WINDOW_MINUTES: int = 60  # Sliding window the growth slope is fitted on
+    LEAK_MIN_POINTS: int = 10  # Samples needed before a process is judged
+    LEAK_MIN_GROWTH_MB_PER_HOUR: float = 10.0
+    LEAK_MIN_R2: float = 0.8  # How steady the growth must be
+
     # System
     DEBUG_MODE: bool = False
 
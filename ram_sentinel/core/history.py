@@ -0,0 +1,380 @@
+"""
+Time-Series History for RAM Sentinel
+Fixed-memory ring buffers of system RAM/CPU and per-process RSS.
+Each series keeps raw samples plus 1-minute and 1-hour rollups
+(avg/min/max), and the whole store, including the rollup buckets still
+being filled, can be spilled to a compact binary file so history
+survives restarts. query() serves arbitrary time ranges
+downsampled to a fixed number of min/avg/max buckets.
+"""
+import heapq
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from ..core.config import settings
+from ..core.logger import logger
+
+MAGIC = b'RSHIST1\n'
+
+class Tier:
+    """Ring buffer of (timestamp, avg, min, max) points at one resolution."""
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        # Preallocated so memory use never grows after construction
+        self.ts = array('d', bytes(8 * capacity))
+        self.avg = array('f', bytes(4 * capacity))
+        self.min = array('f', bytes(4 * capacity))
+        self.max = array('f', bytes(4 * capacity))
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def append(self, ts, avg, lo, hi):
+        i = self.head
+        self.ts[i] = ts
+        self.avg[i] = avg
+        self.min[i] = lo
+        self.max[i] = hi
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def indices(self):
+        """Slot indices in chronological order."""
+        start = (self.head - self.count) % self.capacity
+        for n in range(self.count):
+            yield (start + n) % self.capacity
+
+    def points(self, start=None, end=None):
+        """(ts, avg, min, max) tuples within [start, end], oldest first."""
+        for i in self.indices():
+            ts = self.ts[i]
+            if (start is None or ts >= start) and (end is None or ts <= end):
+                yield ts, self.avg[i], self.min[i], self.max[i]
+
+    def window(self, start, end):
+        """(ts, avg, min, max) arrays of the points within [start, end], oldest first."""
+        first = (self.head - self.count) % self.capacity
+        if first + self.count <= self.capacity:
+            segments = [(first, first + self.count)]
+        else:
+            segments = [(first, self.capacity), (0, self.head)]
+        # Chronological copies of each column (two slices at most), then bisect on time
+        columns = []
+        for column in (self.ts, self.avg, self.min, self.max):
+            joined = column[segments[0][0]:segments[0][1]]
+            if len(segments) > 1:
+                joined += column[segments[1][0]:segments[1][1]]
+            columns.append(joined)
+        lo = bisect_left(columns[0], start)
+        hi = bisect_right(columns[0], end)
+        return tuple(column[lo:hi] for column in columns)
+
+    @property
+    def oldest(self):
+        return self.ts[(self.head - self.count) % self.capacity] if self.count else None
+
+    @property
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.ts, self.avg, self.min, self.max))
+
+class Series:
+    """
+    One metric at several resolutions. Every value goes into the raw tier
+    and into a pending bucket per coarser tier, which is written out when
+    a value for the next bucket arrives.
+    """
+    def __init__(self, tier_specs):
+        self.tiers = [Tier(resolution, capacity) for resolution, capacity in tier_specs]
+        self._pending = [None] * (len(self.tiers) - 1)  # [bucket, sum, n, min, max]
+        self.last_seen = 0.0
+
+    def add(self, ts, value):
+        self.last_seen = ts
+        self.tiers[0].append(ts, value, value, value)
+        for n, tier in enumerate(self.tiers[1:]):
+            bucket = ts - ts % tier.resolution
+            acc = self._pending[n]
+            if acc is not None and acc[0] != bucket:
+                tier.append(acc[0], acc[1] / acc[2], acc[3], acc[4])
+                acc = None
+            if acc is None:
+                self._pending[n] = [bucket, value, 1, value, value]
+            else:
+                acc[1] += value
+                acc[2] += 1
+                if value < acc[3]:
+                    acc[3] = value
+                if value > acc[4]:
+                    acc[4] = value
+
+    def window(self, tier_n, start, end):
+        """Tier.window() plus the still-open rollup bucket, so coarse tiers reach up to now."""
+        ts, avg, lo, hi = self.tiers[tier_n].window(start, end)
+        acc = self._pending[tier_n - 1] if tier_n else None
+        if acc is not None and start <= acc[0] <= end:
+            ts.append(acc[0])
+            avg.append(acc[1] / acc[2])
+            lo.append(acc[3])
+            hi.append(acc[4])
+        return ts, avg, lo, hi
+
+    def restore_pending(self, pending):
+        """Merge rollup buckets saved by HistoryStore.save() into the open ones."""
+        for n, saved in enumerate(pending[:len(self._pending)]):
+            acc = self._pending[n]
+            if saved is None or (acc is not None and acc[0] > saved[0]):
+                continue
+            if acc is None or acc[0] < saved[0]:
+                if acc is not None:
+                    self.tiers[n + 1].append(acc[0], acc[1] / acc[2], acc[3], acc[4])
+                self._pending[n] = list(saved)
+            else:
+                acc[1] += saved[1]
+                acc[2] += saved[2]
+                acc[3] = min(acc[3], saved[3])
+                acc[4] = max(acc[4], saved[4])
+
+    @property
+    def nbytes(self):
+        return sum(tier.nbytes for tier in self.tiers)
+
+class HistoryStore:
+    """
+    System and per-process series with a hard memory cap: at most
+    max_processes process series exist at once, the least recently seen
+    one is evicted when a new process needs a slot. Each sample records
+    the track_top largest processes plus the track_growing ones that have
+    grown most since first seen, so a slow leak below the top is caught too.
+    """
+    SYSTEM_SERIES = ('ram_percent', 'ram_used_gb', 'cpu_percent')
+
+    def __init__(self, raw_seconds=None, raw_interval=None, minute_hours=None,
+                 hour_days=None, max_processes=None, track_top=None, track_growing=None):
+        raw_seconds = raw_seconds or settings.HISTORY_RAW_SECONDS
+        raw_interval = raw_interval or settings.SAMPLER_INTERVAL_SECONDS
+        minute_hours = minute_hours or settings.HISTORY_MINUTE_HOURS
+        hour_days = hour_days or settings.HISTORY_HOUR_DAYS
+        self.tier_specs = [
+            (raw_interval, max(1, int(raw_seconds / raw_interval))),
+            (60, int(minute_hours * 60)),
+            (3600, int(hour_days * 24))
+        ]
+        self.max_processes = max_processes or settings.HISTORY_MAX_PROCESSES
+        self.track_top = track_top or settings.HISTORY_TRACK_TOP
+        self.track_growing = settings.HISTORY_TRACK_GROWING if track_growing is None else track_growing
+        self._baseline = {}  # pid -> RSS when first seen, for growth ranking
+        self.system = {name: Series(self.tier_specs) for name in self.SYSTEM_SERIES}
+        self.processes = OrderedDict()  # "name:pid" -> Series, least recently seen first
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def process_key(pid, name):
+        return f"{name}:{pid}"
+
+    def record_system(self, ts, stats):
+        """Record one system stats sample (as produced by get_system_stats)."""
+        with self.lock:
+            self.system['ram_percent'].add(ts, stats['percent'])
+            self.system['ram_used_gb'].add(ts, stats['used_gb'])
+            self.system['cpu_percent'].add(ts, stats['cpu_percent'])
+
+    def _growing(self, table, exclude):
+        """Rows of the track_growing processes that gained the most RSS since first seen."""
+        baseline, seen = self._baseline, {}
+        growth = []
+        for i, (pid, rss) in enumerate(zip(table.pids, table.rss_mb)):
+            first = seen[pid] = baseline.get(pid, rss)
+            if rss > first and i not in exclude:
+                growth.append((rss - first, i))
+        self._baseline = seen  # Exited processes drop out
+        return [i for _, i in heapq.nlargest(self.track_growing, growth)]
+
+    def record_processes(self, ts, table):
+        """Record RSS of the top and the fastest-growing processes of a ProcessTable."""
+        names = table.name_pool.names
+        with self.lock:
+            rows = table.top_k(self.track_top)
+            if self.track_growing:
+                rows += self._growing(table, set(rows))
+            for i in rows:
+                key = self.process_key(table.pids[i], names[table.name_idx[i]])
+                series = self.processes.get(key)
+                if series is None:
+                    if len(self.processes) >= self.max_processes:
+                        self.processes.popitem(last=False)
+                    series = self.processes[key] = Series(self.tier_specs)
+                else:
+                    self.processes.move_to_end(key)
+                series.add(ts, table.rss_mb[i])
+
+    def series_keys(self):
+        """Names of every system and process series currently held."""
+        with self.lock:
+            return list(self.system) + list(self.processes)
+
+    def _pick_tier(self, series, start, bucket):
+        """Coarsest tier that still has data back to start and is finer than a bucket."""
+        covering = [t for t in series.tiers if t.count and t.oldest <= start]
+        if not covering:
+            # Nothing reaches back that far: use whichever tier goes back furthest
+            with_data = [t for t in series.tiers if t.count]
+            return min(with_data, key=lambda t: t.oldest) if with_data else series.tiers[0]
+        fine_enough = [t for t in covering if t.resolution <= bucket]
+        return fine_enough[-1] if fine_enough else covering[0]
+
+    def query(self, keys, start, end, points=300):
+        """
+        Downsample series to at most `points` buckets over [start, end].
+        Each series comes back as columns: bucket ts, avg (mean of the point
+        averages), min and max; empty buckets are left out.
+        """
+        points = max(1, int(points))
+        bucket = max((end - start) / points, 1e-9)
+        result = {'start': start, 'end': end, 'bucket_seconds': bucket, 'series': {}}
+        with self.lock:
+            for key in keys:
+                series = self.system.get(key) or self.processes.get(key)
+                if series is None:
+                    continue
+                tier = self._pick_tier(series, start, bucket)
+                ts, avg, lo, hi = series.window(series.tiers.index(tier), start, end)
+                out_ts, out_avg, out_min, out_max = array('d'), array('f'), array('f'), array('f')
+                current, total, n, b_min, b_max = None, 0.0, 0, 0.0, 0.0
+                for t, a, mn, mx in zip(ts, avg, lo, hi):
+                    b = int((t - start) / bucket)
+                    if b != current:
+                        if n:
+                            out_ts.append(start + current * bucket)
+                            out_avg.append(total / n)
+                            out_min.append(b_min)
+                            out_max.append(b_max)
+                        current, total, n, b_min, b_max = b, 0.0, 0, mn, mx
+                    total += a
+                    n += 1
+                    if mn < b_min:
+                        b_min = mn
+                    if mx > b_max:
+                        b_max = mx
+                if n:
+                    out_ts.append(start + current * bucket)
+                    out_avg.append(total / n)
+                    out_min.append(b_min)
+                    out_max.append(b_max)
+                result['series'][key] = {'resolution': tier.resolution, 'ts': out_ts,
+                                         'avg': out_avg, 'min': out_min, 'max': out_max}
+        return result
+
+    def memory_bytes(self):
+        """Upper bound of buffer memory, independent of process churn."""
+        per_series = sum((8 + 4 * 3) * capacity for _, capacity in self.tier_specs)
+        return per_series * (len(self.SYSTEM_SERIES) + self.max_processes)
+
+    def save(self, path):
+        """Write every series to a compact binary file (atomic replace)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            entries = [('system', k, s) for k, s in self.system.items()]
+            entries += [('process', k, s) for k, s in self.processes.items()]
+            header = {'series': [], 'saved_at': time.time(), 'byteorder': sys.byteorder}
+            blobs = []
+            for kind, key, series in entries:
+                tiers = []
+                for tier in series.tiers:
+                    rows = list(tier.indices())
+                    tiers.append({'resolution': tier.resolution, 'count': len(rows)})
+                    for column, code in ((tier.ts, 'd'), (tier.avg, 'f'), (tier.min, 'f'), (tier.max, 'f')):
+                        blobs.append(array(code, (column[i] for i in rows)).tobytes())
+                header['series'].append({'kind': kind, 'key': key, 'last_seen': series.last_seen, 'tiers': tiers,
+                                         'pending': [list(acc) if acc else None for acc in series._pending]})
+
+        meta = json.dumps(header).encode('utf-8')
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(meta)))
+            f.write(meta)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """
+        Restore series saved by save(). Points beyond current capacities are
+        dropped, and so are tiers saved at a resolution the store no longer
+        uses. Columns written on a host of the other byte order are swapped.
+        """
+        path = Path(path)
+        if not path.exists():
+            return False
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    logger.warning(f"Ignoring history file with unknown format: {path}")
+                    return False
+                (meta_len,) = struct.unpack('<I', f.read(4))
+                header = json.loads(f.read(meta_len).decode('utf-8'))
+                # Files from before the byte order was recorded were written on this host
+                swap = header.get('byteorder', sys.byteorder) != sys.byteorder
+                with self.lock:
+                    for entry in header['series']:
+                        if entry['kind'] == 'system':
+                            series = self.system.get(entry['key'])
+                        elif len(self.processes) < self.max_processes:
+                            series = self.processes.setdefault(entry['key'], Series(self.tier_specs))
+                        else:
+                            series = None
+                        kept = set()  # Tiers whose resolution still matches
+                        for n, spec in enumerate(entry['tiers']):
+                            columns = []
+                            for code in ('d', 'f', 'f', 'f'):
+                                column = array(code)
+                                column.frombytes(f.read(column.itemsize * spec['count']))
+                                if swap:
+                                    column.byteswap()
+                                columns.append(column)
+                            if series is None or n >= len(series.tiers):
+                                continue
+                            tier = series.tiers[n]
+                            if spec['resolution'] != tier.resolution:
+                                continue  # Points at another spacing would be misread
+                            kept.add(n)
+                            for point in zip(*columns):
+                                tier.append(*point)
+                        if series is not None:
+                            series.last_seen = entry['last_seen']
+                            # Pending bucket n belongs to tier n + 1
+                            series.restore_pending([acc if n + 1 in kept else None
+                                                    for n, acc in enumerate(entry.get('pending', []))])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load history from {path}: {e}")
+            return False
+
+def pack_query(result):
+    """
+    Binary columnar encoding of a query() result: a little-endian uint32
+    header length, a JSON header (ranges and per-series point counts), then
+    per series the ts column as float64 and avg/min/max as float32.
+    """
+    header = {k: result[k] for k in ('start', 'end', 'bucket_seconds')}
+    header['series'] = []
+    blobs = []
+    for key, series in result['series'].items():
+        header['series'].append({'key': key, 'count': len(series['ts']), 'resolution': series['resolution']})
+        for name in ('ts', 'avg', 'min', 'max'):
+            column = series[name]
+            if sys.byteorder != 'little':
+                column = array(column.typecode, column)
+                column.byteswap()
+            blobs.append(column.tobytes())
+    meta = json.dumps(header).encode('utf-8')
+    return struct.pack('<I', len(meta)) + meta + b''.join(blobs)
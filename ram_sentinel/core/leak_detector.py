@@ -0,0 +1,149 @@
+"""
+Memory Leak Detector for RAM Sentinel
+Fits RSS growth slopes for every recorded process at once and flags the
+ones that keep growing steadily, with an estimate of when they will hit
+the alert threshold.
+"""
+import math
+import time
+from ..core.config import settings
+
+class LeakDetector:
+    """
+    Least-squares slope per process over a sliding window of history.
+    All series are gathered into flat columns and reduced in a single pass,
+    accumulating the regression sums per (series, segment). The window is
+    split into segments and every segment must grow for a leak to count
+    as sustained, so one-off spikes are ignored.
+    """
+    def __init__(self, history, window_minutes=None, segments=3, min_points=None,
+                 min_growth_mb_per_hour=None, min_r2=None):
+        self.history = history
+        self.window_minutes = window_minutes or settings.LEAK_WINDOW_MINUTES
+        self.segments = segments
+        # An explicit 0 is a valid threshold, so only None means the default
+        self.min_points = settings.LEAK_MIN_POINTS if min_points is None else min_points
+        self.min_growth = settings.LEAK_MIN_GROWTH_MB_PER_HOUR if min_growth_mb_per_hour is None else min_growth_mb_per_hour
+        self.min_r2 = settings.LEAK_MIN_R2 if min_r2 is None else min_r2
+
+    def _tier_index(self):
+        """Raw samples for short windows, 1-minute rollups otherwise."""
+        raw = self.history.tier_specs[0]
+        return 0 if self.window_minutes * 60 <= raw[0] * raw[1] else 1
+
+    def history_minutes(self, now=None):
+        """Minutes of the window covered by recorded process history (0 if none)."""
+        now = now or time.time()
+        tier_n = self._tier_index()
+        with self.history.lock:
+            oldest = min((series.tiers[tier_n].oldest for series in self.history.processes.values()
+                          if series.tiers[tier_n].count), default=None)
+        if oldest is None:
+            return 0.0
+        return max(0.0, min(self.window_minutes, (now - oldest) / 60))
+
+    def _gather(self, start):
+        """Flatten every process series in the window into parallel columns."""
+        tier_n = self._tier_index()
+        keys, ids, ts, values = [], [], [], []
+        with self.history.lock:
+            for key, series in self.history.processes.items():
+                tier = series.tiers[tier_n]
+                sid = len(keys)
+                keys.append(key)
+                for t, avg, _, _ in tier.points(start=start):
+                    ids.append(sid)
+                    ts.append(t)
+                    values.append(avg)
+        return keys, ids, ts, values
+
+    def fit(self, now=None):
+        """Slope (MB/hour), r^2 and per-segment slopes for every process series."""
+        now = now or time.time()
+        window = self.window_minutes * 60
+        start = now - window
+        keys, ids, ts, values = self._gather(start)
+        n_series, segs = len(keys), self.segments
+        seg_len = window / segs
+
+        # Columns of regression sums; one row per series, one extra per segment
+        size = n_series * (segs + 1)
+        n = [0] * size
+        st = [0.0] * size
+        sv = [0.0] * size
+        stt = [0.0] * size
+        stv = [0.0] * size
+        svv = [0.0] * size
+        last = [0.0] * n_series
+
+        for sid, t, v in zip(ids, ts, values):
+            x = (t - start) / 3600.0  # Hours into the window
+            seg = min(segs - 1, int((t - start) / seg_len))
+            for row in (sid * (segs + 1), sid * (segs + 1) + 1 + seg):
+                n[row] += 1
+                st[row] += x
+                sv[row] += v
+                stt[row] += x * x
+                stv[row] += x * v
+                svv[row] += v * v
+            last[sid] = v
+
+        def slope(row):
+            denom = n[row] * stt[row] - st[row] * st[row]
+            if n[row] < 2 or denom <= 0:
+                return None
+            return (n[row] * stv[row] - st[row] * sv[row]) / denom
+
+        fits = []
+        for sid, key in enumerate(keys):
+            row = sid * (segs + 1)
+            if n[row] < self.min_points:
+                continue
+            b = slope(row)
+            if b is None:
+                continue
+            var_t = n[row] * stt[row] - st[row] ** 2
+            var_v = n[row] * svv[row] - sv[row] ** 2
+            cov = n[row] * stv[row] - st[row] * sv[row]
+            r2 = (cov * cov) / (var_t * var_v) if var_v > 0 else 0.0
+            name, _, pid = key.rpartition(':')
+            fits.append({
+                'key': key,
+                'pid': int(pid),
+                'name': name,
+                'current_mb': last[sid],
+                'slope_mb_per_hour': b,
+                'r2': r2,
+                'segment_slopes': [slope(row + 1 + s) for s in range(segs)],
+                'points': n[row]
+            })
+        return fits
+
+    def detect(self, threshold_mb, available_mb=None, now=None):
+        """
+        Processes growing steadily. Each result carries hours_to_threshold
+        (None if already above threshold_mb) and hours_to_exhaustion
+        (time until it consumes all currently available RAM).
+        """
+        suspects = []
+        for fit in self.fit(now):
+            b = fit['slope_mb_per_hour']
+            sustained = all(s is not None and s > 0 for s in fit['segment_slopes'])
+            if b < self.min_growth or fit['r2'] < self.min_r2 or not sustained:
+                continue
+            current = fit['current_mb']
+            fit['hours_to_threshold'] = (threshold_mb - current) / b if current < threshold_mb else None
+            fit['hours_to_exhaustion'] = available_mb / b if available_mb is not None else None
+            suspects.append(fit)
+        suspects.sort(key=lambda f: f['slope_mb_per_hour'], reverse=True)
+        return suspects
+
+def format_hours(hours):
+    """Human readable duration for report/console output."""
+    if hours is None or math.isinf(hours):
+        return "-"
+    if hours < 1:
+        return f"{hours * 60:.0f} min"
+    if hours < 48:
+        return f"{hours:.1f} h"
+    return f"{hours / 24:.1f} d"
@@ -1,16 +1,42 @@
-from rich.console import Console
-from rich.logging import RichHandler
 import logging
 from .config import settings
 
+class LazyRichHandler(logging.Handler):
+    """
+    Logging handler that imports Rich on the first record it emits, so
+    entry points that never log (or log nothing before exiting) don't pay
+    for importing it.
+    """
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self._handler = None
+
+    def emit(self, record):
+        if self._handler is None:
+            from rich.logging import RichHandler
+            self._handler = RichHandler(rich_tracebacks=True)
+            self._handler.setFormatter(self.formatter)
+        self._handler.handle(record)
+
 def setup_logger():
     logging.basicConfig(
         level="DEBUG" if settings.DEBUG_MODE else "INFO",
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True)]
+        handlers=[LazyRichHandler()]
     )
     return logging.getLogger("ram_sentinel")
 
-console = Console()
+class LazyConsole:
+    """Stands in for rich.console.Console and creates it on first use."""
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+console = LazyConsole()
 logger = setup_logger()
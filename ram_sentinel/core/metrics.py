@@ -0,0 +1,180 @@
+"""
+Internal Metrics for RAM Sentinel
+Counters and latency histograms for the hot paths (process sampling, HPCE
+scans, page evaluation, tab archiving, vault operations), rendered in the
+OpenMetrics text format by the dashboard's /metrics endpoint.
+
+Recording is a perf_counter() pair, a bisect over a dozen bucket bounds
+and a few integer additions under a lock, so it stays on permanently.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; spans a /proc walk (~ms) up to a slow vault mount (~s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Browser round trips per scan; roughly one per open tab
+COUNT_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 150.0, 250.0, 500.0, 1000.0)
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    """{k="v",...} for a dict of labels ('' when empty)."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Unlabelled counters are exported as 0 before the first increment
+        self._values = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, '') for n in self.labelnames), 0)
+
+    def render(self):
+        lines = [f"# TYPE {self.name} counter", f"# HELP {self.name} {self.help}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}_total{format_labels(dict(zip(self.labelnames, key)))} {value}")
+        return lines
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Per label set it keeps one count per bucket
+    (cumulated only when rendered), the total count and the sum.
+    """
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} of one label set, for tests and the benchmark suite."""
+        series = self._series.get(tuple(labels.get(n, '') for n in self.labelnames))
+        if series is None:
+            return {'count': 0, 'sum': 0.0}
+        return {'count': sum(series[:-1]), 'sum': series[-1]}
+
+    def render(self):
+        lines = [f"# TYPE {self.name} histogram", f"# HELP {self.name} {self.help}"]
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {series[-1]}")
+        return lines
+
+class timed:
+    """
+    Time a block or function into a Histogram:
+
+        with timed(SAVE_TABS_SECONDS):
+            ...
+
+        @timed(VAULT_OPERATION_SECONDS, operation='mount')
+        def mount(...): ...
+    """
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+    def __call__(self, fn):
+        histogram, labels = self.histogram, self.labels
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+
+def render_gauge(name, help, samples):
+    """OpenMetrics lines for a gauge family; samples are (labels dict, value) pairs."""
+    lines = [f"# TYPE {name} gauge", f"# HELP {name} {help}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+def render_metrics(extra_lines=()):
+    """Every registered counter/histogram plus extra families, in OpenMetrics text."""
+    lines = list(extra_lines)
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+# Hot paths
+PROCESS_SAMPLE_SECONDS = Histogram(
+    "ram_sentinel_process_sample_seconds", "Time to walk the process table.", ('sampler',))
+HPCE_SCAN_SECONDS = Histogram(
+    "ram_sentinel_hpce_scan_seconds", "Time for one HPCE scan over all open tabs.")
+PAGE_EVALUATE_SECONDS = Histogram(
+    "ram_sentinel_page_evaluate_seconds", "Round trip of one page.evaluate() call.")
+HPCE_SCAN_ROUND_TRIPS = Histogram(
+    "ram_sentinel_hpce_scan_round_trips", "Browser round trips made by one HPCE scan.", buckets=COUNT_BUCKETS)
+SAVE_TABS_SECONDS = Histogram(
+    "ram_sentinel_save_tabs_seconds", "Time to archive purged tabs to the read-later store.")
+VAULT_OPERATION_SECONDS = Histogram(
+    "ram_sentinel_vault_operation_seconds", "Time to mount or unmount the vault.", ('operation',))
+
+# Purge counters
+HPCE_SCANS = Counter("ram_sentinel_hpce_scans", "HPCE scans run.")
+BROWSER_ROUND_TRIPS = Counter("ram_sentinel_browser_round_trips", "Round trips to the browser made by HPCE scans.")
+TABS_PURGED = Counter("ram_sentinel_tabs_purged", "Tabs closed by the purger.")
+TABS_PURGE_CANDIDATES = Counter("ram_sentinel_tabs_purge_candidates", "Tabs a dry run would have closed.")
+ACTIVITY_PUSHES = Counter("ram_sentinel_activity_pushes", "Activity updates pushed by pages.")
+TABS_RECLAIMED = Counter("ram_sentinel_tabs_reclaimed", "Tabs frozen, discarded or closed in tiered mode.",
+                         labelnames=('action',))
+RECLAIMED_BYTES = Counter("ram_sentinel_reclaimed_bytes", "Bytes measured freed by tiered reclaim actions.",
+                          labelnames=('action', 'kind'))
+STREAMS_REJECTED = Counter("ram_sentinel_streams_rejected", "Stream requests turned away to polling.")
+TABS_SKIPPED = Counter("ram_sentinel_tabs_skipped", "Tabs a scan skipped because they did not answer in time.")
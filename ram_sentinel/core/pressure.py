@@ -0,0 +1,252 @@
+"""
+Memory Pressure Watcher for RAM Sentinel
+Wakes reclaim loops (tab purger) as soon as the kernel reports memory
+pressure instead of letting them sleep a fixed 60 seconds, and lets them
+back off while the system is idle.
+
+Linux sources, in order of preference:
+- PSI trigger on /proc/pressure/memory ("some <stall> <window>", POLLPRI)
+- cgroup v2 memory.events (POLLPRI when high/max/oom counters change)
+- Polling PSI avg10 when triggers cannot be registered
+Elsewhere the watcher is inactive and loops simply use the backoff timer.
+"""
+import os
+import select
+import sys
+import threading
+import time
+from ..core.config import settings
+from ..core.logger import logger
+
+PSI_PATH = "/proc/pressure/memory"
+
+class PressureWatcher:
+    def __init__(self, psi_path=PSI_PATH, cgroup_events_path=None):
+        self.psi_path = psi_path
+        self.cgroup_events_path = cgroup_events_path or self._find_cgroup_events()
+        self.mode = 'inactive'
+        self.last_pressure = 0.0
+        self.last_source = None
+        self.wakeups = 0
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._event_counts = {}
+
+    @staticmethod
+    def is_available():
+        return sys.platform.startswith('linux') and (
+            os.path.exists(PSI_PATH) or os.path.exists("/sys/fs/cgroup/cgroup.controllers"))
+
+    @staticmethod
+    def _find_cgroup_events():
+        """memory.events of our own cgroup v2 group, if there is one."""
+        try:
+            with open("/proc/self/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        path = os.path.join("/sys/fs/cgroup", line[3:].strip().lstrip("/"), "memory.events")
+                        if os.path.exists(path):
+                            return path
+        except OSError:
+            pass
+        return None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or not self.is_available():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ram-sentinel-pressure", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def under_pressure(self, within=None):
+        """True if pressure was reported in the last `within` seconds."""
+        within = within if within is not None else settings.SCAN_INTERVAL_SECONDS
+        return bool(self.last_pressure) and time.monotonic() - self.last_pressure <= within
+
+    def read_psi(self):
+        """Current 'some' averages from PSI, or None."""
+        try:
+            with open(self.psi_path) as f:
+                some = f.readline().split()
+        except OSError:
+            return None
+        return {k: float(v) for k, v in (field.split('=') for field in some[1:]) if k != 'total'}
+
+    def wait(self, timeout):
+        """Block up to timeout seconds. Returns True if woken by memory pressure."""
+        with self._cond:
+            generation = self._generation
+            self._cond.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation != generation
+
+    def _fire(self, source):
+        now = time.monotonic()
+        # Debounce so a sustained stall doesn't turn into a tight purge loop
+        if now - self.last_pressure < settings.PRESSURE_MIN_WAKE_SECONDS:
+            return
+        self.last_pressure = now
+        self.last_source = source
+        self.wakeups += 1
+        logger.info(f"Memory pressure detected ({source}), waking reclaim")
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _open_psi_trigger(self):
+        try:
+            fd = os.open(self.psi_path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError:
+            return None
+        trigger = f"some {settings.PRESSURE_PSI_STALL_MS * 1000} {settings.PRESSURE_PSI_WINDOW_MS * 1000}"
+        try:
+            os.write(fd, trigger.encode() + b'\0')
+            return fd
+        except OSError as e:
+            logger.debug(f"PSI trigger unavailable: {e}")
+            os.close(fd)
+            return None
+
+    def _read_cgroup_events(self):
+        """True if any of the high/max/oom counters went up since the last read."""
+        try:
+            with open(self.cgroup_events_path) as f:
+                counts = dict(line.split() for line in f if line.strip())
+        except OSError:
+            return False
+        increased = any(int(counts.get(k, 0)) > int(self._event_counts.get(k, 0))
+                        for k in ('high', 'max', 'oom', 'oom_kill'))
+        self._event_counts = counts
+        return increased
+
+    def _run(self):
+        poller = select.poll()
+        psi_fd = events_fd = None
+        try:
+            psi_fd = self._open_psi_trigger()
+            if psi_fd is not None:
+                poller.register(psi_fd, select.POLLPRI)
+            if self.cgroup_events_path:
+                try:
+                    self._read_cgroup_events()
+                    events_fd = os.open(self.cgroup_events_path, os.O_RDONLY)
+                    poller.register(events_fd, select.POLLPRI)
+                except OSError as e:
+                    # PSI alone still works
+                    logger.debug(f"cgroup memory.events unavailable: {e}")
+                    if events_fd is not None:
+                        os.close(events_fd)
+                        events_fd = None
+
+            self.mode = 'psi-trigger' if psi_fd is not None else 'psi-poll'
+            if events_fd is not None:
+                self.mode += '+cgroup'
+            logger.debug(f"Pressure watcher running ({self.mode})")
+
+            while not self._stop_event.is_set():
+                psi = self.read_psi() if psi_fd is None else None
+                if psi is not None:
+                    avg10 = psi.get('avg10', 0.0)
+                    if avg10 >= settings.PRESSURE_AVG10_THRESHOLD:
+                        self._fire(f"psi avg10={avg10:.1f}")
+                # Short poll timeout so stop() is honoured promptly
+                for fd, event in poller.poll(1000):
+                    if fd == psi_fd:
+                        if event & select.POLLERR:
+                            logger.warning("PSI trigger closed by kernel, falling back to polling")
+                            poller.unregister(psi_fd)
+                            os.close(psi_fd)
+                            psi_fd = None
+                            self.mode = self.mode.replace('psi-trigger', 'psi-poll')
+                        else:
+                            self._fire("psi trigger")
+                    elif fd == events_fd:
+                        if self._read_cgroup_events():
+                            self._fire("cgroup memory.events")
+                        # kernfs needs a re-read from the start to re-arm
+                        os.lseek(events_fd, 0, os.SEEK_SET)
+                        os.read(events_fd, 4096)
+        except Exception as e:
+            logger.error(f"Pressure watcher error: {e}")
+        finally:
+            for fd in (psi_fd, events_fd):
+                if fd is not None:
+                    os.close(fd)
+            self.mode = 'inactive'
+
+class ReclaimScheduler:
+    """
+    Replaces time.sleep(60) in reclaim loops. Each consecutive cycle that
+    reclaimed nothing doubles the wait, up to SCAN_MAX_INTERVAL_SECONDS;
+    reclaiming something or memory pressure resets it. Pressure also ends
+    the wait early, as does the loop's own idle hook reporting work due.
+    """
+    def __init__(self, watcher=None, base_interval=None, max_interval=None):
+        self.watcher = watcher if watcher is not None else get_pressure_watcher()
+        self.base_interval = base_interval or settings.SCAN_INTERVAL_SECONDS
+        self.max_interval = max(self.base_interval, max_interval or settings.SCAN_MAX_INTERVAL_SECONDS)
+        self.interval = self.base_interval
+        self.idle_cycles = 0
+        self._stop = threading.Event()
+
+    def wait(self, reclaimed=0, idle=None):
+        """
+        Sleep until the next cycle is due. Returns True if woken early.
+        idle(seconds), if given, is called instead of sleeping for each slice
+        of the wait (e.g. to let Playwright deliver pushed activity); the
+        wait ends early when it returns True.
+        """
+        if reclaimed or (self.watcher and self.watcher.under_pressure()):
+            self.idle_cycles = 0
+        else:
+            self.idle_cycles = min(self.idle_cycles + 1, 16)
+        self.interval = min(self.base_interval * 2 ** max(0, self.idle_cycles - 1), self.max_interval)
+
+        deadline = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Wake at least every second to notice stop()
+            if idle is not None:
+                pressure_seen = self.watcher.last_pressure if self.watcher else 0.0
+                due = idle(min(remaining, 1.0))
+                if self.watcher and self.watcher.last_pressure != pressure_seen:
+                    self.idle_cycles = 0
+                    return True
+                if due:
+                    return True
+            elif self.watcher and self.watcher.running:
+                if self.watcher.wait(min(remaining, 1.0)):
+                    self.idle_cycles = 0
+                    return True
+            else:
+                self._stop.wait(min(remaining, 1.0))
+        return False
+
+    def stop(self):
+        """Interrupt a pending wait()."""
+        self._stop.set()
+
+_shared_watcher = None
+
+def get_pressure_watcher():
+    """Shared, started PressureWatcher, or None if disabled/unsupported."""
+    global _shared_watcher
+    if not settings.PRESSURE_ENABLED or not PressureWatcher.is_available():
+        return None
+    if _shared_watcher is None:
+        _shared_watcher = PressureWatcher()
+    _shared_watcher.start()
+    return _shared_watcher
@@ -0,0 +1,131 @@
+"""
+Process Samplers for RAM Sentinel
+Collect one row per running process (pid, name, memory_mb, cpu_percent)
+into a columnar ProcessTable.
+psutil works everywhere; on Linux /proc is read directly instead, which
+skips building a psutil.Process object and several syscalls per pid.
+"""
+import os
+import sys
+import time
+import psutil
+from ..core.config import settings
+from ..core.metrics import PROCESS_SAMPLE_SECONDS, timed
+from ..core.process_table import NamePool, ProcessTable
+
+class PsutilSampler:
+    """Portable sampler built on psutil.process_iter."""
+    name = 'psutil'
+
+    def __init__(self):
+        self.name_pool = NamePool()
+
+    @timed(PROCESS_SAMPLE_SECONDS, sampler='psutil')
+    def sample(self):
+        table = ProcessTable(self.name_pool)
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'memory_info', 'cpu_percent']):
+            try:
+                info = proc.info
+                if info['memory_info'] is None:
+                    continue  # Access denied while collecting attrs
+                table.append(
+                    info['pid'],
+                    info['name'],
+                    info['memory_info'].rss / (1024 * 1024),
+                    info['cpu_percent'] or 0.0,
+                    info['ppid'] or 0
+                )
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return table
+
+class ProcfsSampler:
+    """
+    Linux sampler reading /proc/[pid]/stat directly.
+    One read per pid gives name, ppid, utime/stime and resident pages (the same
+    rss value psutil gets from statm). CPU percent is computed from the
+    tick delta since the previous sample, like psutil's cpu_percent().
+    """
+    name = 'procfs'
+
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self._page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+        self._clk_tck = os.sysconf('SC_CLK_TCK')
+        self._last_ticks = {}
+        self._last_time = None
+        self.name_pool = NamePool()
+
+    @staticmethod
+    def is_available(proc_root='/proc'):
+        return sys.platform.startswith('linux') and os.path.exists(os.path.join(proc_root, 'self', 'stat'))
+
+    def _full_name(self, pid, comm):
+        """comm is truncated to 15 chars; recover the real name from cmdline."""
+        try:
+            with open(f"{self.proc_root}/{pid}/cmdline", 'rb') as f:
+                exe = f.read().split(b'\0', 1)[0]
+        except OSError:
+            return comm
+        exe = os.path.basename(exe.decode('utf-8', 'replace'))
+        return exe if exe.startswith(comm) else comm
+
+    @timed(PROCESS_SAMPLE_SECONDS, sampler='procfs')
+    def sample(self):
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else 0.0
+        # Ticks -> percent of one CPU over the elapsed interval
+        tick_scale = 100.0 / (elapsed * self._clk_tck) if elapsed > 0 else 0.0
+        last_ticks = self._last_ticks
+        ticks_now = {}
+        page_mb = self._page_mb
+        root = self.proc_root
+        table = ProcessTable(self.name_pool)
+
+        for entry in os.listdir(root):
+            if not entry.isdigit():
+                continue
+            try:
+                fd = os.open(f"{root}/{entry}/stat", os.O_RDONLY)
+                try:
+                    data = os.read(fd, 4096)
+                finally:
+                    os.close(fd)
+            except OSError:
+                continue  # Process exited or access denied
+
+            # comm may contain spaces and parentheses, so split around the last ')'
+            rparen = data.rfind(b')')
+            if rparen < 0:
+                continue
+            comm = data[data.find(b'(') + 1:rparen].decode('utf-8', 'replace')
+            fields = data[rparen + 2:].split()
+            pid = int(entry)
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            ticks_now[pid] = ticks
+            prev = last_ticks.get(pid)
+
+            table.append(
+                pid,
+                self._full_name(pid, comm) if len(comm) >= 15 else comm,
+                int(fields[21]) * page_mb,
+                (ticks - prev) * tick_scale if prev is not None and ticks >= prev else 0.0,
+                int(fields[1])
+            )
+
+        self._last_ticks = ticks_now
+        self._last_time = now
+        return table
+
+_shared_sampler = None
+
+def get_sampler():
+    """Return the process sampler selected by settings.PROCESS_SAMPLER."""
+    global _shared_sampler
+    if _shared_sampler is None:
+        choice = settings.PROCESS_SAMPLER
+        if choice == 'procfs' or (choice == 'auto' and ProcfsSampler.is_available()):
+            _shared_sampler = ProcfsSampler()
+        else:
+            _shared_sampler = PsutilSampler()
+    return _shared_sampler
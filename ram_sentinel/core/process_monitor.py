@@ -2,60 +2,219 @@
 Process Monitor for RAM Sentinel
 Monitors all system processes and identifies RAM hogs.
 """
+import threading
+import time
 import psutil
 from datetime import datetime
+from ..core.config import settings
 from ..core.logger import logger
+from ..core.proc_sampler import get_sampler
+from ..core.system_sampler import SystemSampler
+from ..core.history import HistoryStore
+from ..core.leak_detector import LeakDetector, format_hours
+from ..core.smaps import get_smaps_sampler
+from ..core.process_tree import ProcessTreeIndex
+
+class ProcessSnapshot:
+    """
+    Process table collected once and shared by every ProcessMonitor.
+    Callers within max_age seconds of the last walk reuse it instead of
+    rescanning; hits/misses count how many walks were avoided.
+    """
+    def __init__(self, max_age=None):
+        self.max_age = settings.PROCESS_SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.hits = 0
+        self.misses = 0
+        self._processes = None
+        self._collected_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, collect, max_age=None):
+        """Return the cached process table, calling collect() if it is stale."""
+        if max_age is None:
+            max_age = self.max_age
+        # Holding the lock while collecting makes concurrent callers wait
+        # for the in-flight walk instead of starting their own.
+        with self._lock:
+            if self._processes is not None and time.monotonic() - self._collected_at <= max_age:
+                self.hits += 1
+                return self._processes
+            self.misses += 1
+            self._processes = collect()
+            self._collected_at = time.monotonic()
+            return self._processes
+
+    def refresh(self, collect):
+        """
+        Walk now whatever the age, under the same lock as get(), so the
+        background sampler never runs collect() alongside a request thread.
+        """
+        with self._lock:
+            self._processes = collect()
+            self._collected_at = time.monotonic()
+            return self._processes
+
+    def invalidate(self):
+        """Force the next get() to walk the process list again."""
+        with self._lock:
+            self._processes = None
+
+    def stats(self):
+        """Cache counters and age of the current snapshot."""
+        with self._lock:
+            age = time.monotonic() - self._collected_at if self._processes is not None else None
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'max_age': self.max_age,
+                'age_seconds': age,
+                'process_count': len(self._processes) if self._processes is not None else 0
+            }
+
+# Shared by the dashboard, tray and CLI so they never walk the same processes twice
+shared_snapshot = ProcessSnapshot()
+shared_tree_index = ProcessTreeIndex()
+_system_sampler = None
+
+def get_system_sampler():
+    """The process-wide background sampler feeding shared_snapshot."""
+    global _system_sampler
+    if _system_sampler is None:
+        history = HistoryStore() if settings.HISTORY_ENABLED else None
+        smaps = get_smaps_sampler() if settings.ACCURATE_MEMORY else None
+        _system_sampler = SystemSampler(shared_snapshot, get_sampler(), history=history, smaps=smaps)
+    return _system_sampler
 
 class ProcessMonitor:
-    def __init__(self):
+    def __init__(self, snapshot=None, sampler=None, accurate=None):
         self.threshold_mb = 500  # Alert if process uses > 500MB
+        # Accurate mode adds PSS/USS and ranks by PSS instead of RSS
+        self.accurate = settings.ACCURATE_MEMORY if accurate is None else accurate
+        self.snapshot = snapshot or shared_snapshot
+        self.sampler = sampler or get_sampler()  # /proc on Linux, psutil elsewhere
+        self.system_sampler = get_system_sampler() if self.snapshot is shared_snapshot else None
+        self.tree_index = shared_tree_index if self.snapshot is shared_snapshot else ProcessTreeIndex()
         # Prime CPU counter
         try:
             psutil.cpu_percent(interval=None)
         except:
             pass
         
-    def get_all_processes(self):
-        """Get all running processes with RAM usage."""
-        processes = []
-        
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'cpu_percent']):
-            try:
-                info = proc.info
-                mem_mb = info['memory_info'].rss / (1024 * 1024)  # Convert to MB
-                
-                processes.append({
-                    'pid': info['pid'],
-                    'name': info['name'],
-                    'memory_mb': mem_mb,
-                    'cpu_percent': info['cpu_percent']
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        
-        # Sort by memory usage (highest first)
-        processes.sort(key=lambda x: x['memory_mb'], reverse=True)
-        return processes
+    def get_process_table(self, max_age=None):
+        """Columnar ProcessTable from the shared snapshot (do not modify)."""
+        if max_age is None and self.system_sampler and self.system_sampler.running:
+            # The background sampler refreshes the snapshot; don't race it
+            max_age = max(self.snapshot.max_age, self.system_sampler.process_period * 2)
+        return self.snapshot.get(self.sampler.sample, max_age)
+
+    def get_all_processes(self, max_age=None):
+        """Get all running processes with RAM usage, highest first."""
+        table = self.get_process_table(max_age)
+        return table.to_records(table.sorted_indices())
+
+    def get_snapshot_stats(self):
+        """Hit/miss counters of the shared process snapshot."""
+        return self.snapshot.stats()
     
     def get_top_processes(self, count=10):
         """Get top N processes by RAM usage."""
-        all_procs = self.get_all_processes()
-        return all_procs[:count]
+        table = self.get_process_table()
+        if self.accurate:
+            return self.get_accurate_processes(count, table)
+        return table.to_records(table.top_k(count))
+
+    def get_top_applications(self, count=10):
+        """Top N application trees (same-executable process chains) by total RAM."""
+        self.tree_index.update(self.get_process_table())
+        return self.tree_index.top_applications(count)
+
+    def get_top_executables(self, count=10):
+        """Top N executable names by total RAM across all their processes."""
+        self.tree_index.update(self.get_process_table())
+        return self.tree_index.top_executables(count)
+
+    def get_accurate_processes(self, count=10, table=None):
+        """
+        Top N processes ranked by PSS, with pss_mb/uss_mb/swap_mb added.
+        Processes not measured within the time budget keep their RSS rank.
+        Falls back to RSS ranking where smaps_rollup is unavailable. With the
+        background sampler measuring, its latest results are served as-is.
+        """
+        table = table or self.get_process_table()
+        smaps = get_smaps_sampler()
+        if smaps is None:
+            return table.to_records(table.top_k(count))
+        sampler = self.system_sampler
+        if sampler and sampler.running and sampler.smaps is smaps:
+            measured = smaps.latest
+        else:
+            measured = smaps.sample(table)
+        records = table.to_records(table.top_k(max(count, smaps.max_processes)))
+        for record in records:
+            detail = measured.get(record['pid'])
+            if detail:
+                record.update(detail)
+        records.sort(key=lambda r: r.get('pss_mb', r['memory_mb']), reverse=True)
+        return records[:count]
     
     def get_ram_hogs(self):
         """Get processes using more than threshold."""
-        all_procs = self.get_all_processes()
-        return [p for p in all_procs if p['memory_mb'] > self.threshold_mb]
+        table = self.get_process_table()
+        return table.to_records(table.above(self.threshold_mb))
     
+    def start_sampler(self):
+        """Start the background sampler so reads never block on sampling."""
+        if self.system_sampler:
+            self.system_sampler.start()
+
+    def stop_sampler(self):
+        if self.system_sampler:
+            self.system_sampler.stop()
+
+    def get_sampler_stats(self):
+        """Cadence and overhead of the background sampler."""
+        return self.system_sampler.stats() if self.system_sampler else {'running': False}
+
+    def get_history(self):
+        """
+        The HistoryStore fed by the background sampler (None if disabled).
+        Without the sampler running (CLI report, tray) it holds what earlier
+        runs saved to HISTORY_PATH.
+        """
+        if not self.system_sampler:
+            return None
+        if not self.system_sampler.running:
+            self.system_sampler.load_history()
+        return self.system_sampler.history
+
+    def get_leak_suspects(self, window_minutes=None):
+        """Processes whose RSS grows steadily over the recorded history."""
+        history = self.get_history()
+        if history is None:
+            return []
+        available_mb = self.get_system_stats()['available_gb'] * 1024
+        return LeakDetector(history, window_minutes).detect(self.threshold_mb, available_mb)
+
+    def get_leak_history_minutes(self, window_minutes=None):
+        """(minutes of process history in the leak window, window minutes)."""
+        history = self.get_history()
+        detector = LeakDetector(history, window_minutes)
+        return (detector.history_minutes() if history is not None else 0.0), detector.window_minutes
+
     def get_system_stats(self):
         """Get overall system RAM statistics."""
+        if self.system_sampler:
+            latest = self.system_sampler.get_latest()
+            if latest is not None:
+                return latest
+        # No sampler running: CPU percent since the previous call, without blocking
         mem = psutil.virtual_memory()
         return {
             'total_gb': mem.total / (1024**3),
             'used_gb': mem.used / (1024**3),
             'available_gb': mem.available / (1024**3),
             'percent': mem.percent,
-            'cpu_percent': psutil.cpu_percent(interval=0.1)
+            'cpu_percent': psutil.cpu_percent(interval=None)
         }
     
     def kill_process(self, pid):
@@ -64,6 +223,7 @@ class ProcessMonitor:
             proc = psutil.Process(pid)
             proc_name = proc.name()
             proc.terminate()
+            self.snapshot.invalidate()
             logger.info(f"Terminated process: {proc_name} (PID: {pid})")
             return True
         except psutil.NoSuchProcess:
@@ -101,6 +261,25 @@ class ProcessMonitor:
                 f"{proc['cpu_percent']:<8.1f} {proc['name']:<30}"
             )
         
+        leaks = self.get_leak_suspects()
+        if leaks:
+            report.append("")
+            report.append("POSSIBLE MEMORY LEAKS (steady RSS growth):")
+            report.append(f"{'PID':<8} {'Memory (MB)':<12} {'MB/hour':<9} {'To limit':<10} {'Name':<20}")
+            report.append("-" * 60)
+            for leak in leaks:
+                report.append(
+                    f"{leak['pid']:<8} {leak['current_mb']:<12.1f} "
+                    f"{leak['slope_mb_per_hour']:<9.1f} {format_hours(leak['hours_to_threshold']):<10} "
+                    f"{leak['name']:<20}"
+                )
+        else:
+            recorded, window = self.get_leak_history_minutes()
+            if recorded < window:
+                report.append("")
+                report.append(f"LEAK CHECK: only {recorded:.0f} of {window} minutes of process history recorded;")
+                report.append("  leaks show up once the dashboard's background sampler has run longer.")
+        
         report.append("=" * 60)
         return "\n".join(report)
     
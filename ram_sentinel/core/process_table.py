@@ -0,0 +1,72 @@
+"""
+Columnar Process Table for RAM Sentinel
+Stores one sample of the process list as parallel arrays instead of a
+list of dicts, and answers top-K / threshold queries without sorting
+the whole table.
+"""
+import heapq
+from array import array
+from itertools import compress
+
+class NamePool:
+    """Interned process names shared by consecutive samples."""
+    def __init__(self):
+        self.names = []
+        self._index = {}
+
+    def intern(self, name):
+        idx = self._index.get(name)
+        if idx is None:
+            idx = len(self.names)
+            self.names.append(name)
+            self._index[name] = idx
+        return idx
+
+class ProcessTable:
+    """
+    Parallel arrays of pid, parent pid, rss (MB), cpu percent and name index.
+    Records are only materialised as dicts for the rows a caller asks for.
+    """
+    def __init__(self, name_pool=None):
+        self.pids = array('q')
+        self.ppids = array('q')
+        self.rss_mb = array('d')
+        self.cpu = array('d')
+        self.name_idx = array('I')
+        self.name_pool = name_pool or NamePool()
+
+    def __len__(self):
+        return len(self.pids)
+
+    def append(self, pid, name, memory_mb, cpu_percent, ppid=0):
+        self.pids.append(pid)
+        self.ppids.append(ppid)
+        self.rss_mb.append(memory_mb)
+        self.cpu.append(cpu_percent)
+        self.name_idx.append(self.name_pool.intern(name))
+
+    def top_k(self, k):
+        """Row indices of the k largest processes by RSS, largest first. O(n log k)."""
+        return heapq.nlargest(k, range(len(self.pids)), key=self.rss_mb.__getitem__)
+
+    def above(self, threshold_mb):
+        """Row indices of processes using more than threshold_mb, largest first."""
+        rows = list(compress(range(len(self.pids)), map(float(threshold_mb).__lt__, self.rss_mb)))
+        rows.sort(key=self.rss_mb.__getitem__, reverse=True)
+        return rows
+
+    def sorted_indices(self):
+        """All row indices ordered by RSS, largest first."""
+        return sorted(range(len(self.pids)), key=self.rss_mb.__getitem__, reverse=True)
+
+    def record(self, i):
+        return {
+            'pid': self.pids[i],
+            'name': self.name_pool.names[self.name_idx[i]],
+            'memory_mb': self.rss_mb[i],
+            'cpu_percent': self.cpu[i]
+        }
+
+    def to_records(self, rows):
+        """Materialise the given rows as the dicts the rest of the app uses."""
+        return [self.record(i) for i in rows]
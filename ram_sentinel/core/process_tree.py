@@ -0,0 +1,163 @@
+"""
+Process Tree Index for RAM Sentinel
+Rolls memory and CPU up per application and per executable name, so a
+browser or worker pool split across dozens of pids shows up as one entry.
+The index is updated with the differences between samples (processes
+created, exited, re-parented or changed) instead of being rebuilt.
+"""
+import threading
+
+class ProcessTreeIndex:
+    """
+    An application is the topmost ancestor chain of processes sharing the
+    same executable name: chrome renderers under the chrome browser process,
+    python workers under the python master, and so on. Totals per
+    application root and per name are adjusted by deltas on every update.
+    """
+    def __init__(self):
+        self.procs = {}  # pid -> [ppid, name, rss_mb, cpu_percent, root]
+        self.children = {}  # pid -> set of child pids
+        self.app_totals = {}  # root pid -> [rss_mb, cpu_percent, count]
+        self.name_totals = {}  # name -> [rss_mb, cpu_percent, count]
+        self.last_table = None
+        self.created = 0
+        self.exited = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _add(totals, key, rss, cpu, count):
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = [0.0, 0.0, 0]
+        entry[0] += rss
+        entry[1] += cpu
+        entry[2] += count
+        if entry[2] <= 0:
+            del totals[key]
+
+    def _link(self, pid, ppid):
+        self.children.setdefault(ppid, set()).add(pid)
+
+    def _unlink(self, pid, ppid):
+        siblings = self.children.get(ppid)
+        if siblings is not None:
+            siblings.discard(pid)
+            if not siblings:
+                del self.children[ppid]
+
+    def _find_root(self, pid):
+        """Walk up while the parent runs the same executable."""
+        proc = self.procs[pid]
+        seen = {pid}
+        while True:
+            parent = self.procs.get(proc[0])
+            if parent is None or parent[1] != proc[1] or proc[0] in seen:
+                return pid
+            pid = proc[0]
+            seen.add(pid)
+            proc = parent
+
+    def _reroot(self, pid):
+        """Recompute the root of pid (and its same-name descendants if it moved)."""
+        stack = [pid]
+        while stack:
+            current = stack.pop()
+            proc = self.procs.get(current)
+            if proc is None:
+                continue
+            root = self._find_root(current)
+            if root != proc[4]:
+                if proc[4] is not None:
+                    self._add(self.app_totals, proc[4], -proc[2], -proc[3], -1)
+                self._add(self.app_totals, root, proc[2], proc[3], 1)
+                proc[4] = root
+                # Same-name children inherit the root; other children are roots themselves
+                stack.extend(c for c in self.children.get(current, ())
+                             if c in self.procs and self.procs[c][1] == proc[1])
+
+    def _remove(self, pid):
+        ppid, name, rss, cpu, root = self.procs.pop(pid)
+        self._unlink(pid, ppid)
+        self._add(self.name_totals, name, -rss, -cpu, -1)
+        if root is not None:
+            self._add(self.app_totals, root, -rss, -cpu, -1)
+        self.exited += 1
+        return self.children.get(pid, ())
+
+    def update(self, table):
+        """Apply the differences between the indexed state and a new ProcessTable."""
+        with self._lock:
+            if table is self.last_table:
+                return
+            names = table.name_pool.names
+            seen = set()
+            dirty = []
+
+            for i in range(len(table)):
+                pid = table.pids[i]
+                ppid = table.ppids[i]
+                name = names[table.name_idx[i]]
+                rss = table.rss_mb[i]
+                cpu = table.cpu[i]
+                seen.add(pid)
+                proc = self.procs.get(pid)
+
+                if proc is not None and proc[1] != name:
+                    # Pid reused by a different program
+                    dirty.extend(self._remove(pid))
+                    proc = None
+
+                if proc is None:
+                    self.procs[pid] = [ppid, name, rss, cpu, None]
+                    self._link(pid, ppid)
+                    self._add(self.name_totals, name, rss, cpu, 1)
+                    dirty.append(pid)
+                    # Children already indexed may now belong under this process
+                    dirty.extend(self.children.get(pid, ()))
+                    self.created += 1
+                    continue
+
+                if proc[0] != ppid:
+                    # Re-parented (e.g. orphaned and adopted by init)
+                    self._unlink(pid, proc[0])
+                    self._link(pid, ppid)
+                    proc[0] = ppid
+                    dirty.append(pid)
+
+                d_rss = rss - proc[2]
+                d_cpu = cpu - proc[3]
+                if d_rss or d_cpu:
+                    proc[2] = rss
+                    proc[3] = cpu
+                    self._add(self.name_totals, name, d_rss, d_cpu, 0)
+                    self._add(self.app_totals, proc[4], d_rss, d_cpu, 0)
+
+            for pid in [p for p in self.procs if p not in seen]:
+                dirty.extend(self._remove(pid))
+
+            for pid in dirty:
+                self._reroot(pid)
+            self.last_table = table
+
+    def top_applications(self, count=15):
+        """Largest application trees by total RSS."""
+        with self._lock:
+            top = sorted(self.app_totals.items(), key=lambda kv: kv[1][0], reverse=True)[:count]
+            return [{
+                'root_pid': root,
+                'name': self.procs[root][1] if root in self.procs else '?',
+                'memory_mb': rss,
+                'cpu_percent': cpu,
+                'process_count': n
+            } for root, (rss, cpu, n) in top]
+
+    def top_executables(self, count=15):
+        """Largest executables by total RSS across all their processes."""
+        with self._lock:
+            top = sorted(self.name_totals.items(), key=lambda kv: kv[1][0], reverse=True)[:count]
+            return [{
+                'name': name,
+                'memory_mb': rss,
+                'cpu_percent': cpu,
+                'process_count': n
+            } for name, (rss, cpu, n) in top]
@@ -0,0 +1,118 @@
+"""
+PSS/USS Accounting for RAM Sentinel
+RSS counts shared pages once per process, so 40 browser renderers look
+like several times their real footprint. /proc/[pid]/smaps_rollup gives
+PSS (shared pages split between users) and USS (private pages only), but
+it is expensive to read, so reads run on a small thread pool within a
+per-cycle time budget, largest processes first, and are cached while a
+process's RSS stays the same. With the background sampler running, the
+measuring happens in its cycle and requests read the latest results.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from ..core.config import settings
+
+class SmapsSampler:
+    def __init__(self, proc_root='/proc', workers=None, budget_ms=None, max_processes=None):
+        self.proc_root = proc_root
+        self.budget = (budget_ms or settings.SMAPS_BUDGET_MS) / 1000
+        self.max_processes = max_processes or settings.SMAPS_MAX_PROCESSES
+        self._pool = ThreadPoolExecutor(max_workers=workers or settings.SMAPS_WORKERS,
+                                        thread_name_prefix="ram-sentinel-smaps")
+        self._cache = {}  # pid -> (rss_mb, result)
+        self._lock = threading.Lock()  # Cache and counters; pool callbacks and callers both update them
+        self.latest = {}  # {pid: result} of the last sample()
+        self.hits = 0
+        self.reads = 0
+        self.skipped = 0
+
+    @staticmethod
+    def is_available(proc_root='/proc'):
+        return sys.platform.startswith('linux') and os.path.exists(os.path.join(proc_root, 'self', 'smaps_rollup'))
+
+    def read(self, pid):
+        """PSS/USS/swap of one process in MB, or None if it can't be read."""
+        try:
+            with open(f"{self.proc_root}/{pid}/smaps_rollup", 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        kb = {}
+        for line in data.splitlines()[1:]:
+            key, _, rest = line.partition(b':')
+            if key in (b'Pss', b'Private_Clean', b'Private_Dirty', b'Swap'):
+                kb[key] = int(rest.split()[0])
+        if b'Pss' not in kb:
+            return None
+        return {
+            'pss_mb': kb[b'Pss'] / 1024,
+            'uss_mb': (kb.get(b'Private_Clean', 0) + kb.get(b'Private_Dirty', 0)) / 1024,
+            'swap_mb': kb.get(b'Swap', 0) / 1024
+        }
+
+    def _store(self, pid, rss_mb, future):
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                self._cache[pid] = (rss_mb, future.result())
+
+    def sample(self, table):
+        """
+        Measure the top processes of a ProcessTable. Returns {pid: result}
+        for every process measured or cached within the budget; reads still
+        running when the budget expires land in the cache for the next cycle.
+        """
+        rows = table.top_k(self.max_processes)
+        results = {}
+        futures = []
+        for i in rows:
+            pid, rss_mb = table.pids[i], table.rss_mb[i]
+            with self._lock:
+                cached = self._cache.get(pid)
+            if cached is not None and cached[0] == rss_mb:
+                with self._lock:
+                    self.hits += 1
+                if cached[1] is not None:
+                    results[pid] = cached[1]
+                continue
+            # Submitted largest first, so the pool works on the biggest hogs first
+            future = self._pool.submit(self.read, pid)
+            future.add_done_callback(lambda f, pid=pid, rss_mb=rss_mb: self._store(pid, rss_mb, f))
+            futures.append((pid, future))
+
+        if futures:
+            done, _ = wait([f for _, f in futures], timeout=self.budget)
+            reads = skipped = 0
+            for pid, future in futures:
+                if future in done:
+                    reads += 1
+                    if future.exception() is None and future.result() is not None:
+                        results[pid] = future.result()
+                elif future.cancel():
+                    skipped += 1
+            with self._lock:
+                self.reads += reads
+                self.skipped += skipped
+
+        # Forget processes that have exited
+        live = set(table.pids)
+        with self._lock:
+            for pid in [pid for pid in self._cache if pid not in live]:
+                del self._cache[pid]
+        self.latest = results
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {'cache_hits': self.hits, 'reads': self.reads, 'skipped': self.skipped,
+                    'cached': len(self._cache), 'budget_ms': self.budget * 1000}
+
+_shared_smaps = None
+
+def get_smaps_sampler():
+    """Shared SmapsSampler, or None where smaps_rollup is unavailable."""
+    global _shared_smaps
+    if _shared_smaps is None and SmapsSampler.is_available():
+        _shared_smaps = SmapsSampler()
+    return _shared_smaps
@@ -0,0 +1,158 @@
+"""
+Background System Sampler for RAM Sentinel
+Samples system RAM/CPU and the process table on a fixed cadence so
+request handlers only read the latest values instead of blocking on
+psutil.cpu_percent(interval=...) or walking every process themselves.
+Every sample is also recorded into the history store, if one is attached.
+In accurate mode each process walk is followed by the PSS/USS measurement,
+so requests never read smaps_rollup themselves.
+"""
+import threading
+import time
+import psutil
+from ..core.config import settings
+from ..core.logger import logger
+
+class SystemSampler:
+    def __init__(self, snapshot, process_sampler, interval=None, process_every=None, history=None, smaps=None):
+        self.snapshot = snapshot
+        self.process_sampler = process_sampler
+        self.history = history
+        self.smaps = smaps  # SmapsSampler measuring PSS/USS after each process walk (accurate mode)
+        self.interval = interval or settings.SAMPLER_INTERVAL_SECONDS
+        # Walking processes is the expensive part; do it every N ticks only
+        self.process_every = max(1, process_every or settings.SAMPLER_PROCESS_EVERY)
+        self.latest = None
+        self.latest_at = 0.0
+        self.cycles = 0
+        self.last_cycle_ms = 0.0
+        self._busy_seconds = 0.0
+        self._started_at = None
+        self._last_flush = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._history_loaded = False
+        self._history_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def process_period(self):
+        """Seconds between two process walks."""
+        return self.interval * self.process_every
+
+    def start(self):
+        """Start the sampler thread (no-op if already running)."""
+        with self._lock:
+            if self.running:
+                return
+            # A fresh event per thread: a previous thread still finishing a slow walk
+            # after stop() timed out keeps seeing its own event set and exits
+            self._stop_event = threading.Event()
+            self._started_at = self._last_flush = time.monotonic()
+            if self.cycles == 0:
+                self.load_history()
+            psutil.cpu_percent(interval=None)  # Prime the system CPU counter
+            self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                            name="ram-sentinel-sampler", daemon=True)
+            self._thread.start()
+        logger.debug(f"System sampler started ({self.interval}s cadence)")
+
+    def stop(self):
+        """Stop the sampler thread and wait for it to exit."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+        if thread:
+            thread.join(timeout=self.interval * 2)
+        self.flush_history()
+
+    def load_history(self):
+        """Restore the saved history store once, so it can be read without the sampler running."""
+        with self._history_lock:
+            if self.history and not self._history_loaded:
+                self._history_loaded = True
+                self.history.load(settings.HISTORY_PATH)
+
+    def flush_history(self):
+        """Spill the history store to disk."""
+        if not self.history:
+            return
+        try:
+            self.history.save(settings.HISTORY_PATH)
+        except OSError as e:
+            logger.error(f"Failed to save history: {e}")
+        self._last_flush = time.monotonic()
+
+    def get_latest(self, max_age=None):
+        """Latest system stats, or None if the sampler is not producing fresh data."""
+        if max_age is None:
+            max_age = self.interval * 3
+        latest = self.latest
+        if latest is None or time.monotonic() - self.latest_at > max_age:
+            return None
+        return dict(latest)
+
+    def stats(self):
+        """Sampler cadence and its own CPU overhead."""
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'process_every': self.process_every,
+            'cycles': self.cycles,
+            'last_cycle_ms': self.last_cycle_ms,
+            'avg_cycle_ms': (self._busy_seconds / self.cycles * 1000) if self.cycles else 0.0,
+            'duty_percent': (self._busy_seconds / uptime * 100) if uptime else 0.0
+        }
+
+    def sample_once(self):
+        """Take one sample. Called by the thread; usable directly for a single refresh."""
+        start = time.perf_counter()
+        now = time.time()
+        if self.cycles % self.process_every == 0:
+            # Under the snapshot lock: request threads may be sampling through snapshot.get()
+            table = self.snapshot.refresh(self.process_sampler.sample)
+            if self.smaps:
+                self.smaps.sample(table)
+            if self.history:
+                self.history.record_processes(now, table)
+
+        mem = psutil.virtual_memory()
+        self.latest = {
+            'total_gb': mem.total / (1024**3),
+            'used_gb': mem.used / (1024**3),
+            'available_gb': mem.available / (1024**3),
+            'percent': mem.percent,
+            'cpu_percent': psutil.cpu_percent(interval=None)
+        }
+        self.latest_at = time.monotonic()
+        if self.history:
+            self.history.record_system(now, self.latest)
+
+        elapsed = time.perf_counter() - start
+        self.last_cycle_ms = elapsed * 1000
+        self._busy_seconds += elapsed
+        self.cycles += 1
+
+    def _run(self, stop_event):
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.error(f"Sampler error: {e}")
+            if (self.history and not stop_event.is_set()
+                    and time.monotonic() - self._last_flush >= settings.HISTORY_FLUSH_SECONDS):
+                self.flush_history()
+            # Fixed cadence: schedule from the previous tick, not from now
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            stop_event.wait(delay)
@@ -0,0 +1,183 @@
+"""
+Stats Collector for the RAM Sentinel Dashboard
+One background thread gathers system stats, top processes and tabs into
+versioned, immutable snapshots. API handlers serve those snapshots (with
+ETags) instead of sampling per request, so request cost no longer depends
+on how many dashboards are polling.
+
+Push clients (/api/stream) block on the collector until a new snapshot is
+published and then receive row-level deltas computed by diff_rows().
+"""
+import gzip
+import json
+import socket
+import threading
+import time
+import zlib
+from ..core.config import settings
+from ..core.logger import logger
+from .state import SingleFlight
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def encode_json(obj):
+    """Compact JSON bytes; orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+class StatsSnapshot:
+    """
+    Result of one collection. Never mutated after creation; rendered
+    response bodies are memoised on it, so each body is serialised once
+    per snapshot no matter how many clients ask for it.
+    """
+    def __init__(self, version, system, processes, tabs, extra=None):
+        self.version = version
+        self.created_at = time.time()
+        self.system = system
+        self.processes = processes
+        self.tabs = tabs
+        self.extra = extra or {}
+        self._rendered = {}
+
+    def render(self, key, build):
+        """(body bytes, etag) for key, building and serialising it on first use."""
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            body = encode_json(build(self))
+            # Content-based, so an unchanged payload keeps its ETag across versions
+            rendered = self._rendered[key] = (body, f"{zlib.crc32(body):08x}")
+        return rendered
+
+    def render_gzip(self, key, build):
+        """Gzip-compressed variant of render(); compressed once per snapshot."""
+        rendered = self._rendered.get(('gzip', key))
+        if rendered is None:
+            body, etag = self.render(key, build)
+            rendered = self._rendered[('gzip', key)] = (gzip.compress(body, compresslevel=5), etag + '-gz')
+        return rendered
+
+class StatsCollector:
+    def __init__(self, process_monitor, tabs_provider, interval=None, process_count=None):
+        self.process_monitor = process_monitor
+        self.tabs_provider = tabs_provider
+        self.interval = interval or settings.COLLECTOR_INTERVAL_SECONDS
+        self.process_count = process_count or settings.COLLECTOR_PROCESS_COUNT
+        self.hostname = socket.gethostname()
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._published = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ram-sentinel-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        self._thread = None
+
+    def collect(self):
+        """Build and publish a new snapshot."""
+        monitor = self.process_monitor
+        try:
+            tabs = self.tabs_provider()
+        except Exception as e:
+            logger.debug(f"Tab listing failed: {e}")
+            tabs = []
+        extra = {
+            'host': self.hostname,
+            'snapshot': monitor.get_snapshot_stats(),
+            'sampler': monitor.get_sampler_stats()
+        }
+        system = monitor.get_system_stats()
+        processes = monitor.get_top_processes(self.process_count)
+        with self._lock:
+            self.version += 1
+            snapshot = self._snapshot = StatsSnapshot(self.version, system, processes, tabs, extra)
+        with self._published:
+            self._published.notify_all()
+        return snapshot
+
+    def get_snapshot(self):
+        """
+        Latest snapshot. Without the background thread (tests, embedded use)
+        a stale snapshot is refreshed here; concurrent callers wait for one
+        collection rather than each running their own.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        return self._flight.do('collect', self._collect_if_stale)
+
+    def _collect_if_stale(self):
+        snapshot = self._snapshot
+        return snapshot if self._is_fresh(snapshot) else self.collect()
+
+    def peek(self):
+        """Latest published snapshot without ever collecting (None before the first)."""
+        return self._snapshot
+
+    def wait_for_update(self, version, timeout):
+        """
+        Block until a snapshot newer than version is published (or timeout).
+        Returns it, or None if nothing new arrived in time.
+        """
+        if self.running:
+            with self._published:
+                self._published.wait_for(lambda: self.version != version, timeout)
+        else:
+            # No publisher thread: pace on-demand collections at the interval
+            self._stop_event.wait(min(timeout, self.interval))
+        snapshot = self.get_snapshot()
+        return snapshot if snapshot.version != version else None
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None:
+            return False
+        return self.running or time.time() - snapshot.created_at < self.interval
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"Collector error: {e}")
+            self._stop_event.wait(self.interval)
+
+def diff_rows(old, new, key):
+    """
+    Row-level delta between two lists of dicts identified by key.
+    Returns {'added': [...], 'changed': [...], 'removed': [ids]}, or None
+    if nothing changed.
+    """
+    old_rows = {row[key]: row for row in old}
+    added, changed = [], []
+    for row in new:
+        previous = old_rows.pop(row[key], None)
+        if previous is None:
+            added.append(row)
+        elif previous != row:
+            changed.append(row)
+    if not (added or changed or old_rows):
+        return None
+    return {'added': added, 'changed': changed, 'removed': list(old_rows)}
@@ -0,0 +1,251 @@
+"""
+Fleet Aggregator for the RAM Sentinel Dashboard
+Polls the /api/stats endpoint of many RAM Sentinel agents and merges them
+into one fleet view: hosts ranked by memory pressure and the largest
+processes across every host.
+
+All agents are polled concurrently from a single asyncio loop on a
+background thread, over one keep-alive HTTP/1.1 connection per agent
+(stdlib only). Polls send If-None-Match, so agents whose stats haven't
+changed answer 304 with no body. Each poll has a timeout, and failing
+agents are retried with exponential backoff instead of every cycle.
+"""
+import asyncio
+import gzip
+import heapq
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+from ..core.config import settings
+from ..core.logger import logger
+
+class AgentState:
+    """Connection and last known stats of one agent."""
+    def __init__(self, url):
+        if '://' not in url:
+            url = 'http://' + url
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.path = (parts.path.rstrip('/') or '') + '/api/stats'
+        self.name = f"{self.host}:{self.port}"
+        self.reader = None
+        self.writer = None
+        self.etag = None
+        self.stats = None
+        self.last_ok = None
+        self.latency_ms = None
+        self.failures = 0
+        self.next_due = 0.0
+        self.error = None
+        self.polls = 0
+        self.not_modified = 0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    def status(self):
+        if self.stats is None:
+            return 'down' if self.failures else 'pending'
+        return 'ok' if not self.failures else 'stale'
+
+class FleetAggregator:
+    def __init__(self, agents, interval=None, timeout=None, max_backoff=None, top_processes=50):
+        self.agents = [AgentState(url) for url in agents]
+        self.interval = interval or settings.FLEET_INTERVAL_SECONDS
+        self.timeout = timeout or settings.FLEET_TIMEOUT_SECONDS
+        self.max_backoff = max_backoff or settings.FLEET_MAX_BACKOFF_SECONDS
+        self.top_processes = top_processes
+        self.cycles = 0
+        self.last_cycle_ms = 0.0
+        self._view = None
+        self._loop = None
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_loop, name="ram-sentinel-fleet", daemon=True)
+        self._thread.start()
+        logger.info(f"Fleet aggregator polling {len(self.agents)} agents every {self.interval}s")
+
+    def stop(self):
+        self._stopping = True
+        if self._thread:
+            self._thread.join(timeout=self.interval + self.timeout + 1)
+        self._thread = None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._poll_forever())
+        finally:
+            for agent in self.agents:
+                agent.close()
+            self._loop.close()
+            self._loop = None
+
+    async def _poll_forever(self):
+        next_tick = time.monotonic()
+        while not self._stopping:
+            await self.poll_once()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def poll_once(self):
+        """Poll every agent that is due, then rebuild the fleet view."""
+        start = time.perf_counter()
+        now = time.monotonic()
+        due = [agent for agent in self.agents if agent.next_due <= now]
+        await asyncio.gather(*(self._poll(agent) for agent in due))
+        self._view = self._build_view()
+        self.cycles += 1
+        self.last_cycle_ms = (time.perf_counter() - start) * 1000
+
+    async def _poll(self, agent):
+        started = time.perf_counter()
+        try:
+            status, body = await asyncio.wait_for(self._request(agent), self.timeout)
+            if status == 200:
+                agent.stats = json.loads(body)
+            elif status != 304:
+                raise ConnectionError(f"HTTP {status}")
+            else:
+                agent.not_modified += 1
+        except (OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError) as e:
+            agent.close()
+            agent.failures += 1
+            agent.error = str(e) or type(e).__name__
+            backoff = min(self.interval * 2 ** agent.failures, self.max_backoff)
+            agent.next_due = time.monotonic() + backoff
+            if agent.failures == 1:
+                logger.warning(f"Fleet agent {agent.name} unreachable ({agent.error}), backing off")
+            return
+        agent.polls += 1
+        agent.failures = 0
+        agent.error = None
+        agent.last_ok = time.time()
+        agent.latency_ms = (time.perf_counter() - started) * 1000
+        agent.next_due = 0.0
+
+    async def _request(self, agent):
+        """GET the stats path on the agent's keep-alive connection. Returns (status, body)."""
+        if agent.writer is None:
+            agent.reader, agent.writer = await asyncio.open_connection(agent.host, agent.port)
+        request = (f"GET {agent.path} HTTP/1.1\r\nHost: {agent.name}\r\n"
+                   f"Accept-Encoding: gzip\r\nConnection: keep-alive\r\n")
+        if agent.etag:
+            request += f"If-None-Match: {agent.etag}\r\n"
+        agent.writer.write((request + "\r\n").encode('latin-1'))
+
+        reader = agent.reader
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        version, status = lines[0].split(' ', 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, _, value = line.partition(':')
+                headers[key.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b';')[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if not size:
+                    break
+                body += chunk[:-2]
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        elif status == '304':
+            body = b''
+        else:
+            body = await reader.read()  # Delimited by close
+            agent.close()
+
+        if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+            agent.close()
+        if headers.get('content-encoding') == 'gzip':
+            body = gzip.decompress(body)
+        if 'etag' in headers:
+            agent.etag = headers['etag']
+        return int(status), body
+
+    def _build_view(self):
+        hosts = []
+        process_lists = []
+        for agent in self.agents:
+            stats = agent.stats
+            system = stats.get('system', {}) if stats else {}
+            processes = stats.get('processes', []) if stats else []
+            top = processes[0] if processes else None
+            hosts.append({
+                'agent': agent.name,
+                'host': (stats or {}).get('host', agent.name),
+                'status': agent.status(),
+                'ram_percent': system.get('percent'),
+                'used_gb': system.get('used_gb'),
+                'total_gb': system.get('total_gb'),
+                'available_gb': system.get('available_gb'),
+                'cpu_percent': system.get('cpu_percent'),
+                'top_process': {'name': top['name'], 'memory_mb': top['memory_mb']} if top else None,
+                'tab_count': (stats or {}).get('tab_count'),
+                'latency_ms': agent.latency_ms,
+                'last_ok': agent.last_ok,
+                'error': agent.error
+            })
+            if processes:
+                host = hosts[-1]['host']
+                process_lists.append([dict(proc, host=host) for proc in processes])
+        # Most pressure first; agents without data at the end
+        hosts.sort(key=lambda h: (h['ram_percent'] is not None, h['ram_percent'] or 0.0), reverse=True)
+        processes = heapq.nlargest(self.top_processes, (p for plist in process_lists for p in plist),
+                                   key=lambda p: p.get('pss_mb', p['memory_mb']))
+        up = sum(1 for h in hosts if h['status'] == 'ok')
+        return {
+            'generated_at': time.time(),
+            'agents': len(self.agents),
+            'agents_up': up,
+            'hosts': hosts,
+            'processes': processes,
+            'cycle_ms': self.last_cycle_ms
+        }
+
+    def get_view(self):
+        """Latest merged fleet view (None before the first poll completes)."""
+        return self._view
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'agents': len(self.agents),
+            'cycles': self.cycles,
+            'last_cycle_ms': self.last_cycle_ms,
+            'polls': sum(a.polls for a in self.agents),
+            'not_modified': sum(a.not_modified for a in self.agents),
+            'backing_off': sum(1 for a in self.agents if a.failures)
+        }
+
+def parse_agents(value):
+    """Agent list from a comma/whitespace separated string, or @file with one per line (# comments)."""
+    if not value:
+        return []
+    if value.startswith('@'):
+        with open(value[1:], encoding='utf-8') as f:
+            value = "\n".join(line.split('#', 1)[0] for line in f)
+    return value.replace(',', ' ').split()
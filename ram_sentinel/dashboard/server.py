@@ -2,8 +2,10 @@
 Flask Dashboard Server for RAM Sentinel
 Provides REST API and web interface for monitoring.
 """
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, render_template, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import gzip
 import threading
 import time
 import shutil
@@ -16,157 +18,362 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ram_sentinel.core.process_monitor import ProcessMonitor
 from ram_sentinel.core.config import settings
-from ram_sentinel.optimizer.tab_purger import TabPurger
+from ram_sentinel.core.logger import logger
+from ram_sentinel.core.metrics import render_gauge, render_metrics
+from ram_sentinel.core.history import pack_query
 from ram_sentinel.vault.manager import get_vault
+from ram_sentinel.vault.usage_index import get_usage_index, stop_usage_index
+from ram_sentinel.dashboard.collector import StatsCollector, diff_rows, encode_json
+from ram_sentinel.dashboard.fleet import FleetAggregator, parse_agents
+from ram_sentinel.dashboard.state import DashboardState
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through encode_json (orjson when installed)."""
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj).decode('utf-8')
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Global state
-process_monitor = ProcessMonitor()
-tab_purger = None
-purger_running = False
-vault = get_vault()
-vault_mounted = False
-connection_mode = 'offline'  # 'offline' or 'online'
-
-# Stats cache
-stats_cache = {
-    'system': {},
-    'processes': [],
-    'tabs': [],
-    'last_update': 0
-}
-
-def update_stats():
-    """Update statistics cache."""
-    global stats_cache
-    
-    # System stats
-    stats_cache['system'] = process_monitor.get_system_stats()
-    
-    # Top processes
-    stats_cache['processes'] = process_monitor.get_top_processes(15)
-    
-    # Tab stats (if purger is running)
-    if tab_purger and tab_purger.context:
-        try:
-            tabs = []
-            for page in tab_purger.context.pages:
-                try:
-                    title = page.title if isinstance(page.title, str) else page.title()
-                    url = page.url if isinstance(page.url, str) else page.url()
-                    tabs.append({'title': title, 'url': url})
-                except:
-                    pass
-            stats_cache['tabs'] = tabs
-        except:
-            stats_cache['tabs'] = []
-    else:
-        stats_cache['tabs'] = []
-    
-    stats_cache['last_update'] = time.time()
+# Control state shared by every request thread (optimizer, vault, connection mode)
+state = DashboardState()
+list_tabs = state.list_tabs
+
+# Created on first use, so importing this module stays cheap
+process_monitor = None
+collector = None
+vault = None
+_init_lock = threading.Lock()
+
+def get_monitor():
+    global process_monitor
+    if process_monitor is None:
+        with _init_lock:
+            if process_monitor is None:
+                process_monitor = ProcessMonitor()
+    return process_monitor
+
+def get_collector():
+    """Background collector; API handlers only serve its snapshots."""
+    global collector
+    if collector is None:
+        monitor = get_monitor()
+        with _init_lock:
+            if collector is None:
+                collector = StatsCollector(monitor, list_tabs)
+    return collector
+
+def get_vault_backend():
+    global vault
+    if vault is None:
+        with _init_lock:
+            if vault is None:
+                vault = get_vault()
+    return vault
+
+fleet = None  # FleetAggregator when started with agents
+
+def accepts_gzip():
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+def snapshot_response(key, build):
+    """
+    Serve a rendered snapshot body with an ETag, answering 304 when
+    unchanged. Large bodies go out gzip-compressed, compressed once per
+    snapshot rather than per request.
+    """
+    snap = get_collector().get_snapshot()
+    body, etag = snap.render(key, build)
+    gzipped = len(body) >= settings.DASHBOARD_GZIP_MIN_BYTES and accepts_gzip()
+    if gzipped:
+        body, etag = snap.render_gzip(key, build)
+    response = app.response_class(body, mimetype='application/json')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Snapshot-Version'] = str(snap.version)
+    return response.make_conditional(request)
+
+@app.after_request
+def compress_response(response):
+    """Gzip large JSON responses that weren't served from a snapshot."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers
+            or not accepts_gzip()):
+        return response
+    data = response.get_data()
+    if len(data) >= settings.DASHBOARD_GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+    return response
+
+def control_state():
+    return state.control_state()
 
 # API Endpoints
 @app.route('/api/stats')
 def get_stats():
-    """Get all statistics."""
-    update_stats()
-    return jsonify({
-        'system': stats_cache['system'],
-        'processes': stats_cache['processes'],
-        'tabs': stats_cache['tabs'],
-        'purger_running': purger_running,
-        'vault_mounted': vault_mounted,
-        'connection_mode': connection_mode,
-        'tab_count': len(stats_cache['tabs'])
+    """
+    Get all statistics. The body holds only what the dashboard shows, at
+    the precision it shows it, so the ETag survives collections that change
+    nothing visible; the snapshot version goes in X-Snapshot-Version and the
+    collector/sampler bookkeeping is at /api/stats/internals.
+    """
+    state = control_state()
+    # Control state is part of the key so toggles invalidate the ETag
+    return snapshot_response(('stats',) + tuple(state.values()), lambda snap: {
+        'system': display_system(snap.system),
+        'processes': stream_rows(snap)[0],
+        'tabs': snap.tabs,
+        **state,
+        'tab_count': len(snap.tabs),
+        'host': snap.extra.get('host')
     })
 
+@app.route('/api/stats/internals')
+def get_stats_internals():
+    """Snapshot version and age, snapshot cache and sampler stats; changes on every collection."""
+    snap = get_collector().get_snapshot()
+    return jsonify({'version': snap.version, 'age_seconds': round(time.time() - snap.created_at, 3),
+                    'snapshot': snap.extra.get('snapshot'), 'sampler': snap.extra.get('sampler')})
+
+def display_system(system):
+    """System stats rounded to what the dashboard displays."""
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in system.items()}
+
+def stream_rows(snap):
+    """
+    Process and tab rows as pushed to stream clients. Values are rounded to
+    what the dashboard displays so sampling noise doesn't mark every row as
+    changed; tabs get an id because several tabs can share a URL.
+    """
+    processes = [dict(proc, memory_mb=round(proc['memory_mb'], 1),
+                      cpu_percent=round(proc['cpu_percent'] or 0, 1),
+                      **({'pss_mb': round(proc['pss_mb'], 1)} if 'pss_mb' in proc else {}))
+                 for proc in snap.processes[:15]]
+    seen = {}
+    tabs = []
+    for tab in snap.tabs:
+        n = seen[tab['url']] = seen.get(tab['url'], -1) + 1
+        tabs.append(dict(tab, id=f"{n}:{tab['url']}"))
+    return processes, tabs
+
+def sse_event(event, version, body):
+    return b'event: ' + event.encode() + b'\nid: ' + str(version).encode() + b'\ndata: ' + body + b'\n\n'
+
+@app.route('/api/stream')
+def stream():
+    """
+    Server-Sent Events: one full 'snapshot' event, then a 'delta' event per
+    collected snapshot with only added/changed/removed process and tab rows.
+    Deltas are rendered once per snapshot and shared by every client that
+    is up to date. Each stream holds a worker thread, so past
+    DASHBOARD_MAX_STREAMS the answer is 503 and the page polls instead.
+    """
+    streams = state.streams
+    if not streams.acquire():
+        response = jsonify({'error': 'too many open streams, poll /api/stats instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    def full(snap, state):
+        processes, tabs = stream_rows(snap)
+        return {'system': snap.system, 'processes': processes, 'tabs': tabs, **state}
+
+    def delta(prev, snap, state):
+        prev_processes, prev_tabs = stream_rows(prev)
+        processes, tabs = stream_rows(snap)
+        return {
+            'system': snap.system,
+            'processes': diff_rows(prev_processes, processes, 'pid'),
+            'tabs': diff_rows(prev_tabs, tabs, 'id'),
+            **state
+        }
+
+    def events():
+        snap = get_collector().get_snapshot()
+        state = control_state()
+        body, _ = snap.render(('stream',) + tuple(state.values()), lambda s: full(s, state))
+        yield sse_event('snapshot', snap.version, body)
+        while True:
+            latest = get_collector().wait_for_update(snap.version, timeout=15)
+            if latest is None:
+                # Comment line keeps proxies and the browser from timing out
+                yield b': keepalive\n\n'
+                continue
+            state = control_state()
+            prev = snap
+            body, _ = latest.render(('delta', prev.version) + tuple(state.values()),
+                                    lambda s: delta(prev, s, state))
+            snap = latest
+            yield sse_event('delta', snap.version, body)
+
+    response = app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    # Runs when the server closes the response (client gone), whether or not the generator started
+    response.call_on_close(streams.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """
+    OpenMetrics exposition. Gauges come from the collector's latest
+    snapshot as-is, so a scrape never walks the process table.
+    """
+    families = render_gauge('ram_sentinel_optimizer_running', 'Whether the tab optimizer loop is running.',
+                            [({}, int(state.purger_running))])
+    families += render_gauge('ram_sentinel_vault_mounted', 'Whether the vault is mounted.',
+                             [({}, int(state.vault_mounted))])
+    families += render_gauge('ram_sentinel_streams_open', 'Open /api/stream connections.',
+                             [({}, state.streams.open)])
+    snap = get_collector().peek()
+    if snap is not None:
+        gib = 1024 ** 3
+        system = snap.system
+        families += render_gauge('ram_sentinel_memory_total_bytes', 'Total system RAM.',
+                                 [({}, int(system['total_gb'] * gib))])
+        families += render_gauge('ram_sentinel_memory_used_bytes', 'Used system RAM.',
+                                 [({}, int(system['used_gb'] * gib))])
+        families += render_gauge('ram_sentinel_memory_available_bytes', 'Available system RAM.',
+                                 [({}, int(system['available_gb'] * gib))])
+        families += render_gauge('ram_sentinel_memory_used_percent', 'Used system RAM in percent.',
+                                 [({}, system['percent'])])
+        families += render_gauge('ram_sentinel_cpu_percent', 'System CPU utilisation in percent.',
+                                 [({}, system.get('cpu_percent', 0.0))])
+        families += render_gauge('ram_sentinel_process_rss_bytes', 'Resident memory of the top processes.',
+                                 [({'pid': p['pid'], 'name': p['name']}, int(p['memory_mb'] * 1024 * 1024))
+                                  for p in snap.processes[:settings.METRICS_TOP_PROCESSES]])
+        families += render_gauge('ram_sentinel_tabs_open', 'Browser tabs seen by the last HPCE scan.',
+                                 [({}, len(snap.tabs))])
+        families += render_gauge('ram_sentinel_snapshot_age_seconds', 'Age of the data behind these gauges.',
+                                 [({}, round(time.time() - snap.created_at, 3))])
+    return app.response_class(render_metrics(families),
+                              mimetype='application/openmetrics-text; version=1.0.0; charset=utf-8')
+
 @app.route('/api/control/connection/<mode>', methods=['POST'])
 def control_connection(mode):
     """Control the connection mode."""
-    global connection_mode
     if mode in ['online', 'offline']:
-        connection_mode = mode
-        return jsonify({'status': 'success', 'mode': connection_mode})
+        state.set_connection_mode(mode)
+        return jsonify({'status': 'success', 'mode': mode})
     return jsonify({'error': 'invalid_mode'}), 400
 
 @app.route('/api/system')
 def get_system():
     """Get system RAM stats."""
-    return jsonify(process_monitor.get_system_stats())
+    return snapshot_response('system', lambda snap: snap.system)
 
 @app.route('/api/processes')
 def get_processes():
     """Get top processes."""
     count = request.args.get('count', 15, type=int)
-    return jsonify(process_monitor.get_top_processes(count))
+    if count > get_collector().process_count:
+        # Beyond the snapshot: concurrent identical requests share one walk
+        return jsonify(state.flight.do(('processes', count), lambda: get_monitor().get_top_processes(count)))
+    return snapshot_response(('processes', count), lambda snap: snap.processes[:count])
+
+@app.route('/api/applications')
+def get_applications():
+    """Get memory rolled up per application tree or per executable name."""
+    count = request.args.get('count', 15, type=int)
+    if request.args.get('by', 'tree') == 'name':
+        return jsonify(state.flight.do(('executables', count), lambda: get_monitor().get_top_executables(count)))
+    return jsonify(state.flight.do(('applications', count), lambda: get_monitor().get_top_applications(count)))
+
+@app.route('/api/leaks')
+def get_leaks():
+    """Get processes with steady RSS growth."""
+    window = request.args.get('window', None, type=int)
+    return jsonify(state.flight.do(('leaks', window), lambda: get_monitor().get_leak_suspects(window)))
+
+RANGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_range(value):
+    """'90s', '15m', '24h', '7d' (or plain seconds) -> seconds."""
+    value = value.strip().lower()
+    if value and value[-1] in RANGE_UNITS:
+        return float(value[:-1]) * RANGE_UNITS[value[-1]]
+    return float(value)
+
+@app.route('/api/history')
+def get_history():
+    """
+    Downsampled history: ?series=ram_percent,chrome:1234&range=24h (or
+    start/end epoch seconds)&points=300&format=json|bin. Each series comes
+    back as ts/avg/min/max columns with at most `points` buckets.
+    """
+    history = get_monitor().get_history()
+    if history is None:
+        return jsonify({'error': 'history_disabled'}), 404
+    try:
+        end = request.args.get('end', type=float) or time.time()
+        start = request.args.get('start', type=float) or end - parse_range(request.args.get('range', '1h'))
+    except ValueError:
+        return jsonify({'error': 'invalid_range'}), 400
+    points = min(max(request.args.get('points', 300, type=int), 1), 2000)
+    keys = [k for k in request.args.get('series', 'ram_percent').split(',') if k]
+    result = history.query(keys, start, end, points)
+
+    if request.args.get('format') == 'bin':
+        return app.response_class(pack_query(result), mimetype='application/octet-stream')
+    result['series'] = {key: {name: (column.tolist() if name != 'resolution' else column)
+                              for name, column in series.items()}
+                        for key, series in result['series'].items()}
+    return jsonify(result)
+
+@app.route('/api/history/series')
+def get_history_series():
+    """Names of the series /api/history can return."""
+    history = get_monitor().get_history()
+    return jsonify(history.series_keys() if history else [])
+
+@app.route('/api/fleet')
+def get_fleet():
+    """Merged view of every fleet agent: hosts by memory pressure, largest processes."""
+    if fleet is None:
+        return jsonify({'error': 'fleet_disabled'}), 404
+    view = fleet.get_view()
+    if view is None:
+        return jsonify({'agents': len(fleet.agents), 'agents_up': 0, 'hosts': [], 'processes': []})
+    return jsonify({**view, 'aggregator': fleet.stats()})
 
 @app.route('/api/tabs')
 def get_tabs():
     """Get monitored tabs."""
-    update_stats()
-    return jsonify(stats_cache['tabs'])
+    return snapshot_response('tabs', lambda snap: snap.tabs)
 
 @app.route('/api/control/optimizer/<action>', methods=['POST'])
 def control_optimizer(action):
-    """Control the tab optimizer."""
-    global tab_purger, purger_running
-    
+    """Control the tab optimizer. Repeated starts/stops are no-ops."""
     if action == 'start':
-        if not purger_running:
-            def run_purger():
-                global tab_purger, purger_running
-                try:
-                    from playwright.sync_api import sync_playwright
-                    tab_purger = TabPurger()
-                    tab_purger.start_session(headless=True)
-                    purger_running = True
-                    
-                    while purger_running:
-                        try:
-                            tab_purger.scan_and_purge(dry_run=False)
-                            time.sleep(60)
-                        except Exception as e:
-                            print(f"Scan error: {e}")
-                            if not purger_running:
-                                break
-                except Exception as e:
-                    print(f"Purger error: {e}")
-                    purger_running = False
-            
-            thread = threading.Thread(target=run_purger, daemon=True)
-            thread.start()
-            time.sleep(1)  # Give it a moment to start
-            return jsonify({'status': 'started', 'message': 'Optimizer starting in background'})
-        return jsonify({'status': 'already_running'})
+        if state.purger_running:
+            return jsonify({'status': 'already_running', 'state': state.optimizer})
+        return jsonify({'status': 'started', 'state': state.start_optimizer(),
+                        'message': 'Optimizer starting in background'})
     
     elif action == 'stop':
-        if purger_running:
-            purger_running = False
-            time.sleep(1)  # Give it time to stop
-            if tab_purger:
-                try:
-                    tab_purger.stop_session()
-                except:
-                    pass
-            return jsonify({'status': 'stopped'})
-        return jsonify({'status': 'not_running'})
+        if not state.purger_running:
+            return jsonify({'status': 'not_running', 'state': state.optimizer})
+        # The purger thread closes its own browser session; give it a moment
+        return jsonify({'status': 'stopped', 'state': state.stop_optimizer(timeout=2.0)})
     
     return jsonify({'error': 'invalid_action'}), 400
 
 @app.route('/api/control/vault/<action>', methods=['POST'])
 def control_vault(action):
     """Control the vault."""
-    global vault_mounted
-    
     if action == 'mount':
         try:
             mount_point = settings.DEFAULT_MOUNT_POINT_WIN
             size = settings.DEFAULT_VAULT_SIZE
-            success = vault.mount(size, mount_point)
+            success = state.vault_transition(True, lambda: get_vault_backend().mount(size, mount_point))
             if success:
-                vault_mounted = True
                 return jsonify({'status': 'mounted', 'mount_point': mount_point})
             return jsonify({'error': 'mount_failed'}), 500
         except Exception as e:
@@ -175,9 +382,9 @@ def control_vault(action):
     elif action == 'unmount':
         try:
             mount_point = settings.DEFAULT_MOUNT_POINT_WIN
-            success = vault.unmount(mount_point)
+            success = state.vault_transition(False, lambda: get_vault_backend().unmount(mount_point))
             if success:
-                vault_mounted = False
+                stop_usage_index(mount_point)
                 return jsonify({'status': 'unmounted'})
             return jsonify({'error': 'unmount_failed'}), 500
         except Exception as e:
@@ -188,7 +395,7 @@ def control_vault(action):
 @app.route('/api/control/process/kill/<int:pid>', methods=['POST'])
 def kill_process(pid):
     """Kill a process."""
-    if process_monitor.kill_process(pid):
+    if get_monitor().kill_process(pid):
         return jsonify({'status': 'killed', 'pid': pid})
     return jsonify({'error': 'kill_failed'}), 500
 
@@ -201,9 +408,9 @@ def get_vault_stats():
          return jsonify({"status": "unmounted"})
     
     try:
-        total, used, free = shutil.disk_usage(mount_point)
-        # Get count of files
-        file_count = sum([len(files) for r, d, files in os.walk(mount_point)])
+        total, used, free = state.flight.do(('disk_usage', mount_point), lambda: shutil.disk_usage(mount_point))
+        # File counts and per-directory usage come from the incremental index, not a walk
+        usage = get_usage_index(mount_point).stats()
         
         return jsonify({
             "status": "mounted",
@@ -212,7 +419,7 @@ def get_vault_stats():
             "used_size": used,
             "free_size": free,
             "percent": (used/total) * 100,
-            "file_count": file_count
+            **usage
         })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
@@ -222,8 +429,35 @@ def index():
     """Serve the dashboard."""
     return render_template('dashboard.html')
 
-def run_server(host='127.0.0.1', port=5000):
-    """Run the Flask server."""
+def run_server(host='127.0.0.1', port=5000, production=False, threads=None, agents=None):
+    """
+    Run the dashboard. production=True serves the app with waitress (a
+    multi-threaded WSGI server that also runs on Windows); without waitress
+    installed it falls back to Flask's development server. With agents
+    (or FLEET_AGENTS) it also aggregates those agents under /api/fleet.
+    """
+    global fleet
+    get_monitor().start_sampler()
+    get_collector().start()
+    agents = agents if agents is not None else parse_agents(settings.FLEET_AGENTS)
+    if agents:
+        fleet = FleetAggregator(agents)
+        fleet.start()
+    if production:
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.warning("waitress is not installed (pip install waitress), using the development server")
+        else:
+            # One process, many threads: sampler, collector and control state are process-global
+            threads = threads or settings.DASHBOARD_THREADS
+            # Waitress runs a stream on one of its fixed workers until the client leaves
+            state.streams.limit = max(0, min(settings.DASHBOARD_MAX_STREAMS,
+                                             threads - settings.DASHBOARD_RESERVED_THREADS))
+            logger.info(f"Serving dashboard with waitress on http://{host}:{port} "
+                        f"({threads} threads, up to {state.streams.limit} streams)")
+            serve(app, host=host, port=port, threads=threads, ident='ram-sentinel')
+            return
     app.run(host=host, port=port, debug=False, threaded=True)
 
 if __name__ == '__main__':
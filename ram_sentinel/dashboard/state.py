@@ -0,0 +1,226 @@
+"""
+Dashboard State for RAM Sentinel
+The control state the dashboard's request threads share (optimizer, vault,
+connection mode) behind one lock, and single-flight coalescing so a burst
+of identical requests runs the underlying work once.
+
+The optimizer is a small state machine: stopped -> starting -> running ->
+stopping -> stopped. Start and stop are idempotent: repeating one while it
+is already in effect changes nothing. The purger thread owns its TabPurger
+from creation to stop_session(), because Playwright's sync objects must
+stay on the thread that created them.
+"""
+import threading
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import STREAMS_REJECTED
+
+STOPPED = 'stopped'
+STARTING = 'starting'
+RUNNING = 'running'
+STOPPING = 'stopping'
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs
+    fn(), later callers arriving while it runs wait and get its result (or
+    its exception). Nothing is cached once the call returns.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.executions += 1
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'executions': self.executions, 'shared': self.shared, 'in_flight': len(self._calls)}
+
+class StreamSlots:
+    """
+    Counts open /api/stream connections against a limit. A stream holds a
+    server worker thread for as long as it stays open, so without a cap
+    enough open dashboards would take every worker.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.open = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a slot; False if all are in use."""
+        with self._lock:
+            if self.open >= self.limit:
+                self.rejected += 1
+                STREAMS_REJECTED.inc()
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+def default_purger():
+    # Playwright loads only once the optimizer actually starts
+    from ..optimizer.tab_purger import create_tab_purger
+    return create_tab_purger()
+
+def default_scheduler():
+    from ..core.pressure import ReclaimScheduler
+    return ReclaimScheduler()
+
+class DashboardState:
+    def __init__(self, purger_factory=default_purger, scheduler_factory=default_scheduler):
+        self.purger_factory = purger_factory
+        self.scheduler_factory = scheduler_factory
+        self.optimizer = STOPPED
+        self.tab_purger = None
+        self.vault_mounted = False
+        self.connection_mode = 'offline'  # 'offline' or 'online'
+        self.optimizer_starts = 0
+        self.flight = SingleFlight()
+        self.streams = StreamSlots(settings.DASHBOARD_MAX_STREAMS)
+        self._scheduler = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._vault_lock = threading.Lock()
+
+    @property
+    def purger_running(self):
+        return self.optimizer in (STARTING, RUNNING)
+
+    def control_state(self):
+        """Consistent copy of the control flags for one response."""
+        with self._lock:
+            return {'purger_running': self.purger_running, 'optimizer_state': self.optimizer,
+                    'vault_mounted': self.vault_mounted, 'connection_mode': self.connection_mode}
+
+    def list_tabs(self):
+        """Tabs seen by the purger's last scan (Playwright objects stay on its thread)."""
+        purger = self.tab_purger
+        if purger and purger.context:
+            return list(purger.last_tabs)
+        return []
+
+    def start_optimizer(self):
+        """Start the purger loop unless it is already starting or running. Returns the resulting state."""
+        with self._lock:
+            if self.purger_running:
+                return self.optimizer
+            # A loop still stopping notices it was replaced; the new one waits for it to let go of the browser
+            previous = self._thread
+            self.optimizer = STARTING
+            self.optimizer_starts += 1
+            scheduler = self._scheduler = self.scheduler_factory()
+            thread = self._thread = threading.Thread(target=self._run_optimizer, args=(scheduler, previous),
+                                                     name="ram-sentinel-dashboard-purger", daemon=True)
+            # Started under the lock so no one can join() it before it has started
+            thread.start()
+        return STARTING
+
+    def stop_optimizer(self, timeout=None):
+        """
+        Ask the purger loop to stop; with a timeout, wait up to that long for
+        it to close its browser session. Returns the resulting state.
+        """
+        with self._lock:
+            if not self.purger_running:
+                return self.optimizer
+            self.optimizer = STOPPING
+            scheduler, thread = self._scheduler, self._thread
+        scheduler.stop()
+        if timeout:
+            thread.join(timeout)
+        return self.optimizer
+
+    def _is_current(self):
+        return self._thread is threading.current_thread() and self.optimizer in (STARTING, RUNNING)
+
+    def _run_optimizer(self, scheduler, previous):
+        purger = None
+        try:
+            if previous is not None:
+                previous.join()
+            purger = self.purger_factory()
+            purger.start_session(headless=True)
+            with self._lock:
+                if not self._is_current():
+                    return
+                self.tab_purger = purger
+                self.optimizer = RUNNING
+            while self._is_current():
+                try:
+                    purged = purger.scan_and_purge(dry_run=False)
+                except Exception as e:
+                    logger.error(f"Scan error: {e}")
+                    purged = 0
+                scheduler.wait(purged, idle=purger.idle)
+        except Exception as e:
+            logger.error(f"Purger error: {e}")
+        finally:
+            if purger is not None:
+                try:
+                    purger.stop_session()
+                except Exception as e:
+                    logger.debug(f"Purger session close failed: {e}")
+            with self._lock:
+                if self.tab_purger is purger:
+                    self.tab_purger = None
+                if self._thread is threading.current_thread():
+                    self._thread = self._scheduler = None
+                    self.optimizer = STOPPED
+
+    def set_connection_mode(self, mode):
+        with self._lock:
+            self.connection_mode = mode
+
+    def vault_transition(self, mount, operation):
+        """
+        Run a vault mount (mount=True) or unmount under the vault lock so
+        concurrent requests can't interleave them. Mounting an already
+        mounted vault is a no-op; unmounting always runs since it also
+        wipes. Returns operation()'s result (True when nothing to do).
+        """
+        with self._vault_lock:
+            if mount and self.vault_mounted:
+                return True
+            success = operation()
+            if success:
+                with self._lock:
+                    self.vault_mounted = mount
+            return success
@@ -0,0 +1,317 @@
+"""
+Async Tab Purger engine for RAM Sentinel
+The same HPCE scan as TabPurger, built on Playwright's async API: pages are
+evaluated and closed concurrently (at most PURGER_CONCURRENCY at a time),
+and a page that doesn't answer within PURGER_PAGE_TIMEOUT_SECONDS is
+skipped for this cycle instead of stalling the scan. Pages that push their
+activity (ACTIVITY_PUSH) are assessed from the activity table without a
+round trip at all.
+
+The sync methods (start_session, scan_and_purge, stop_session) run the
+coroutines on an event loop owned by the calling thread, so the CLI, tray
+and dashboard runners use either engine the same way. They must all be
+called from that one thread, as with the sync engine.
+"""
+import asyncio
+import time
+from datetime import datetime
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import (BROWSER_ROUND_TRIPS, HPCE_SCAN_ROUND_TRIPS, HPCE_SCANS, HPCE_SCAN_SECONDS,
+                            PAGE_EVALUATE_SECONDS, TABS_PURGED, TABS_PURGE_CANDIDATES, TABS_SKIPPED, timed)
+from .hpce import ActivityTable, assess_tab, purge_due_at
+from .lifecycle import CLOSE, DISCARD, FREEZE, TIERS, AsyncTabLifecycle, choose_tier, unloads_first
+from .planner import apply_plan, build_plan, log_plan, memory_needed
+from .storage import ReadLaterStorage
+from .tab_purger import ACTIVITY_BINDING, ACTIVITY_TRACKER_SCRIPT, COLLECT_SCRIPT
+
+class AsyncTabPurger:
+    def __init__(self, concurrency=None, page_timeout=None):
+        self.concurrency = concurrency or settings.PURGER_CONCURRENCY
+        self.page_timeout = page_timeout or settings.PURGER_PAGE_TIMEOUT_SECONDS
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.storage = ReadLaterStorage()
+        self._tracked_context = None
+        self._loop = None
+        self.activity = ActivityTable()
+        self._last_scan_at = 0.0
+        self.lifecycle = None
+        self._reclaim_lock = None
+        # Tabs still open after the last scan, read by the dashboard without touching Playwright
+        self.last_tabs = []
+        self.last_scan = {'tabs': 0, 'round_trips': 0, 'skipped': 0, 'seconds': 0.0, 'next_purge_at': None,
+                          'reclaimed': [], 'plan': None}
+
+    # Sync facade for runner threads
+
+    def _run(self, coro):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def start_session(self, headless=False):
+        """Starts a Playwright session, either connecting to existing or launching new."""
+        self._run(self.open_session(headless))
+
+    def scan_and_purge(self, dry_run=False):
+        """Scans tabs using HPCE logic. Returns the number of tabs reclaimed (or that would be)."""
+        return self._run(self.scan(dry_run))
+
+    def idle(self, seconds):
+        """
+        Run the event loop for `seconds` so pushed activity is delivered.
+        Returns True once a tab has become purgeable since the last scan.
+        """
+        self._run(asyncio.sleep(seconds))
+        return self.activity.due_since(self._last_scan_at)
+
+    def stop_session(self):
+        if self._loop is None:
+            return
+        try:
+            self._run(self.close_session())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    # Coroutines
+
+    async def open_session(self, headless=False):
+        # Imported here: loading Playwright costs more than everything else in the package
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        try:
+            # Try connecting to standard remote debugging port
+            self.browser = await self.playwright.chromium.connect_over_cdp("http://localhost:9222")
+            self.context = self.browser.contexts[0]
+            logger.info("Connected to existing browser session via CDP.")
+        except Exception:
+            logger.warning("Could not connect to existing browser (Port 9222). Launching new instance.")
+            self.browser = await self.playwright.chromium.launch(headless=headless)
+            self.context = await self.browser.new_context()
+
+    async def close_session(self):
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception:
+            pass  # Browser already closed
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception:
+            pass  # Playwright already stopped
+        self.context = None
+
+    async def inject_tracker(self):
+        """Registers the activity binding and tracker init script (once per context)."""
+        if not self.context or self._tracked_context is self.context:
+            return 0
+        round_trips = 0
+        if settings.ACTIVITY_PUSH:
+            try:
+                await self.context.expose_binding(ACTIVITY_BINDING, self.activity.on_push)
+                round_trips += 1
+            except Exception as e:
+                logger.debug(f"Could not expose activity binding: {e}")
+        try:
+            await self.context.add_init_script(ACTIVITY_TRACKER_SCRIPT)
+            round_trips += 1
+        except Exception as e:
+            logger.debug(f"Could not register tracker init script: {e}")
+        self._tracked_context = self.context
+        return round_trips
+
+    async def _evaluate(self, page):
+        with timed(PAGE_EVALUATE_SECONDS):
+            return await page.evaluate(COLLECT_SCRIPT)
+
+    async def _assess_page(self, page, semaphore, now, result):
+        """Evaluate (unless pushed or reclaimed) and assess one page. Returns the assessment, or None."""
+        url = page.url
+        lifecycle = result['lifecycle']
+        async with semaphore:
+            # Frozen pages can't answer and discarded ones have lost their history
+            pushed = self.activity.pushed(page)
+            state = lifecycle.state(page, pushed) if lifecycle else None
+            entry = state or pushed
+            if entry is None:
+                try:
+                    result['round_trips'] += 1
+                    collected = await asyncio.wait_for(self._evaluate(page), self.page_timeout)
+                except asyncio.TimeoutError:
+                    result['skipped'] += 1
+                    logger.debug(f"Skipped slow tab this cycle: {url}")
+                    result['open'].append({'title': url, 'url': url})
+                    return None
+                except Exception as e:
+                    logger.error(f"Error scanning page: {e}")
+                    return None
+                entry = {'title': collected.get('title'), 'hpce': collected.get('hpce')}
+                self.activity.update(page, dict(entry['hpce'] or {}, title=entry['title']), pushed=False)
+
+        title = entry['title'] or url
+        if state:
+            url = state['url']
+        confidence, fingerprint = assess_tab(entry['hpce'], now)
+        tier = choose_tier(confidence, purge_due_at(entry['hpce'], now) - now, settings.RECLAIM_MODE == 'tiered')
+        if tier and state and TIERS.index(tier) <= TIERS.index(state['tier']):
+            tier = None  # Already reclaimed this far
+        logger.debug(f"HPCE: {title[:20]}... | [{fingerprint}] | Conf: {confidence*100:.1f}%")
+        return {'page': page, 'url': url, 'title': title, 'state': state, 'hpce': entry['hpce'],
+                'confidence': confidence, 'fingerprint': fingerprint, 'tier': tier}
+
+    async def _act_page(self, tab_info, semaphore, dry_run, result):
+        """Reclaim one assessed page as its tier says (unless dry_run); record the outcome in result."""
+        page, url, title, tier = tab_info['page'], tab_info['url'], tab_info['title'], tab_info['tier']
+        fingerprint = tab_info['fingerprint']
+        lifecycle = result['lifecycle']
+        if tier is None:
+            result['keep'] += 1
+            result['open'].append({'title': title, 'url': url})
+            return
+        if dry_run:
+            result['candidates'] += 1
+            logger.info(f"[Dry Run] HPCE would {'purge' if tier == CLOSE else tier}: {title}")
+            result['open'].append({'title': title, 'url': url})
+            return
+        # Capture data of what is closed or discarded
+        tab = {
+            "title": title,
+            "url": url,
+            "timestamp": datetime.now().isoformat(),
+            "fingerprint": fingerprint
+        }
+        staged = tier == DISCARD and unloads_first(tier, tab_info['state'])
+        if staged:
+            # Archived before the page navigates away, so a failed or timed-out discard can't lose it
+            result['archived'].append(tab)
+        async with semaphore:
+            try:
+                if lifecycle:
+                    # One at a time, so each before/after renderer RSS pair measures one action
+                    async with self._reclaim_lock:
+                        measurement = await asyncio.wait_for(
+                            self._reclaim(lifecycle, page, tier, title, url, tab_info['hpce']), self.page_timeout)
+                    if measurement is None:
+                        result['keep'] += 1
+                        result['open'].append({'title': title, 'url': url})
+                        return
+                    result['reclaimed'].append(measurement)
+                else:
+                    result['round_trips'] += 1
+                    await asyncio.wait_for(page.close(), self.page_timeout)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    result['skipped'] += 1
+                    result['open'].append({'title': title, 'url': url})
+                else:
+                    logger.error(f"Error reclaiming page: {e}")
+                if staged and lifecycle.states.get(page, {}).get('tier') != DISCARD:
+                    result['archived'].remove(tab)  # Still showing its page; archived once it is discarded
+                return
+        if lifecycle:
+            tab['action'] = tier
+        else:
+            logger.info(f"Purged [{fingerprint}]: {title}")
+        if tier == CLOSE:
+            result['purged'].append(tab)
+        else:
+            result['open'].append({'title': title, 'url': url})
+        if not staged and unloads_first(tier, tab_info['state']):
+            result['archived'].append(tab)
+        result['actions'] += 1
+
+    async def _plan(self, tabs, lifecycle, semaphore, dry_run):
+        """
+        Measure the tabs (only when memory is short of the target) and plan
+        which to close. Returns (plan, ids of the chosen tab dicts).
+        """
+        need, available = memory_needed()
+        heaps, process_info = {}, None
+        if need:
+            sizes = await asyncio.gather(*(self._js_heap(lifecycle, tab['page'], semaphore) for tab in tabs))
+            heaps = dict(enumerate(sizes))
+            try:
+                process_info = await asyncio.wait_for(lifecycle.process_info(), self.page_timeout)
+            except asyncio.TimeoutError:
+                logger.debug("SystemInfo.getProcessInfo timed out")
+        plan, chosen = build_plan(tabs, heaps, process_info, need, available)
+        log_plan(plan, dry_run)
+        return plan, chosen
+
+    async def _js_heap(self, lifecycle, page, semaphore):
+        """A page's JS heap, or None if it doesn't answer within the page timeout."""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(lifecycle.js_heap(page), self.page_timeout)
+            except asyncio.TimeoutError:
+                logger.debug(f"Heap measurement timed out: {page.url}")
+                return None
+
+    async def _reclaim(self, lifecycle, page, tier, title, url, hpce):
+        # Only background tabs are frozen
+        if tier == FREEZE and not await lifecycle.is_hidden(page):
+            return None
+        return await lifecycle.apply(page, tier, title, url, hpce)
+
+    def _lifecycle(self):
+        """AsyncTabLifecycle for the current context in tiered or planned mode, else None."""
+        if settings.RECLAIM_MODE != 'tiered' and not settings.PURGE_TARGET_FREE_MB:
+            return None
+        if self.lifecycle is None or self.lifecycle.context is not self.context:
+            self.lifecycle = AsyncTabLifecycle(self.context, self.browser)
+            self._reclaim_lock = asyncio.Lock()
+        return self.lifecycle
+
+    async def scan(self, dry_run=False):
+        if not self.context:
+            return 0
+
+        started = time.perf_counter()
+        lifecycle = self._lifecycle()
+        lifecycle_trips = lifecycle.round_trips if lifecycle else 0
+        result = {'round_trips': await self.inject_tracker(), 'skipped': 0, 'keep': 0, 'candidates': 0,
+                  'actions': 0, 'open': [], 'purged': [], 'archived': [], 'reclaimed': [], 'lifecycle': lifecycle}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        now = time.time()
+        tabs = await asyncio.gather(*(self._assess_page(page, semaphore, now, result)
+                                      for page in self.context.pages))
+        tabs = [tab for tab in tabs if tab is not None]
+        # With a free-memory target, close only what the plan needs
+        plan = None
+        if settings.PURGE_TARGET_FREE_MB:
+            plan, chosen = await self._plan(tabs, lifecycle, semaphore, dry_run)
+            apply_plan(tabs, chosen, settings.RECLAIM_MODE == 'tiered')
+        await asyncio.gather(*(self._act_page(tab, semaphore, dry_run, result) for tab in tabs))
+
+        purged_tabs = result['purged']
+        # context.pages no longer lists closed pages
+        self.activity.prune(self.context.pages)
+        if lifecycle:
+            lifecycle.prune(self.context.pages)
+            result['round_trips'] += lifecycle.round_trips - lifecycle_trips
+        self.activity.hold(lifecycle.states if lifecycle else {})
+        self._last_scan_at = now
+        self.last_tabs = result['open']
+        elapsed = time.perf_counter() - started
+        self.last_scan = {'tabs': len(result['open']) + len(purged_tabs), 'round_trips': result['round_trips'],
+                          'skipped': result['skipped'], 'seconds': elapsed,
+                          'next_purge_at': self.activity.next_due(after=now), 'reclaimed': result['reclaimed'],
+                          'plan': plan}
+        HPCE_SCAN_SECONDS.observe(elapsed)
+        BROWSER_ROUND_TRIPS.inc(result['round_trips'])
+        HPCE_SCAN_ROUND_TRIPS.observe(result['round_trips'])
+        HPCE_SCANS.inc()
+        TABS_PURGED.inc(len(purged_tabs))
+        TABS_PURGE_CANDIDATES.inc(result['candidates'])
+        TABS_SKIPPED.inc(result['skipped'])
+        if result['archived'] and not dry_run:
+            # File I/O off the loop
+            await asyncio.to_thread(self.storage.save_tabs, result['archived'])
+
+        skipped = f" Skipped: {result['skipped']}." if result['skipped'] else ""
+        logger.info(f"Scan complete. Purged: {len(purged_tabs)}. Active: {result['keep']}.{skipped}")
+        return result['actions'] + result['candidates']
@@ -0,0 +1,164 @@
+"""
+Human Presence Confidence Engine (HPCE) for RAM Sentinel
+Scores how likely it is that the user still needs a tab from its activity
+vector (clicks, keys, scrolls, last activity), and keeps the latest vector
+of every open tab in an ActivityTable fed by the pages themselves.
+
+Because the score only decays with idle time, the moment a tab will cross
+the purge threshold can be solved in advance (purge_due_at), and with it
+the tiered mode's freeze and discard times (action_times), so reclaim
+decisions don't have to wait for the next polling cycle.
+"""
+import math
+import time
+from ..core.config import settings
+from ..core.metrics import ACTIVITY_PUSHES
+
+# Purge threshold: < 5% confidence
+PURGE_CONFIDENCE = 0.05
+HPCE_STEEPNESS = 0.8  # k of the idle decay curve, per minute
+
+def fingerprint_tab(hpce_data):
+    """(fingerprint, minutes idle at which confidence is 50%) for an activity vector."""
+    clicks = hpce_data.get('clicks', 0)
+    keys = hpce_data.get('keys', 0)
+    scrolls = hpce_data.get('scrolls', 0)
+    
+    fingerprint = "Ghost"
+    base_decay_mins = settings.INACTIVE_THRESHOLD_MINUTES
+    
+    if keys > 20 or clicks > 10:
+        fingerprint = "Creator" # High value
+        base_decay_mins *= 2.0 
+    elif scrolls > 50:
+        fingerprint = "Reader" # Medium value
+        base_decay_mins *= 1.5
+    elif clicks > 0:
+        fingerprint = "Browser" # Low value
+    return fingerprint, base_decay_mins
+
+def run_hpce_analysis(hpce_data, idle_seconds):
+    """
+    Human Presence Confidence Engine (HPCE)
+    Calculates a confidence score (0.0-1.0) that user needs this tab.
+    """
+    # 1. Behavior Fingerprinting
+    fingerprint, base_decay_mins = fingerprint_tab(hpce_data)
+    
+    # 2. Idle Decay Curve (Sigmoidal)
+    # P = 1 / (1 + e^(k * (t - t0)))
+    # k = steepness, t0 = inflection point
+    
+    idle_mins = idle_seconds / 60
+    k = HPCE_STEEPNESS
+    t0 = base_decay_mins
+    
+    # Avoid math overflow
+    try:
+        confidence = 1 / (1 + math.exp(k * (idle_mins - t0)))
+    except OverflowError:
+        confidence = 0.0
+        
+    return confidence, fingerprint
+
+def assess_tab(hpce_raw, now):
+    """(confidence, fingerprint) for a tab's HPCE vector at time `now` (epoch seconds)."""
+    last_active_js = (hpce_raw or {}).get('lastActive', 0)
+    # If script wasn't running (new tab), assume active now
+    if last_active_js == 0:
+        last_active_js = now * 1000
+    idle_seconds = now - last_active_js / 1000
+    return run_hpce_analysis(hpce_raw or {}, idle_seconds)
+
+def purge_due_at(hpce_raw, now=None):
+    """
+    Epoch seconds at which the tab's confidence drops below PURGE_CONFIDENCE
+    if it sees no further activity: the idle time solving
+    1 / (1 + e^(k * (t - t0))) = PURGE_CONFIDENCE.
+    """
+    hpce_raw = hpce_raw or {}
+    last_active = hpce_raw.get('lastActive', 0) / 1000 or (now if now is not None else time.time())
+    _, t0 = fingerprint_tab(hpce_raw)
+    idle_mins = t0 + math.log(1 / PURGE_CONFIDENCE - 1) / HPCE_STEEPNESS
+    return last_active + idle_mins * 60
+
+def action_times(due_at, tiered=None):
+    """
+    Times at which a tab whose close is due at due_at calls for an action:
+    the close, and in tiered mode the freeze and discard leading up to it.
+    """
+    if tiered is None:
+        tiered = settings.RECLAIM_MODE == 'tiered'
+    if not tiered:
+        return (due_at,)
+    return (due_at - settings.FREEZE_LEAD_MINUTES * 60, due_at - settings.DISCARD_LEAD_MINUTES * 60, due_at)
+
+class ActivityTable:
+    """
+    Latest activity vector per open page. Pages push theirs through a
+    Playwright binding whenever they see activity; a scan fills in pages
+    that haven't pushed yet. Pushed entries are always current, so a scan
+    can decide on them without asking the page.
+    """
+    def __init__(self):
+        self._entries = {}  # page -> {'title', 'hpce', 'pushed', 'updated', 'held', 'due_at'}
+        self.pushes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, page, payload, pushed=True):
+        hpce = dict(payload or {})
+        title = hpce.pop('title', None)
+        now = time.time()
+        held = (self._entries.get(page) or {}).get('held')
+        self._entries[page] = {'title': title, 'hpce': hpce, 'pushed': pushed, 'updated': now, 'held': held,
+                               'due_at': purge_due_at(held or hpce, now)}
+        if pushed:
+            self.pushes += 1
+
+    def on_push(self, source, payload):
+        """Playwright binding callback: source['page'] pushed its activity vector."""
+        page = source.get('page') if isinstance(source, dict) else getattr(source, 'page', None)
+        if page is not None and isinstance(payload, dict):
+            self.update(page, payload)
+            ACTIVITY_PUSHES.inc()
+
+    def pushed(self, page):
+        """The page's entry if it came from the page itself (None if missing or only polled)."""
+        entry = self._entries.get(page)
+        return entry if entry is not None and entry['pushed'] else None
+
+    def prune(self, pages):
+        """Forget pages that are no longer open."""
+        live = set(pages)
+        for page in [p for p in self._entries if p not in live]:
+            del self._entries[page]
+
+    def hold(self, states):
+        """
+        Time reclaimed pages by the vector they were reclaimed with (states:
+        page -> {'hpce'}) rather than by what they push: a discarded page's
+        placeholder pushes as if freshly opened. Other pages are released.
+        """
+        for page, entry in self._entries.items():
+            held = (states.get(page) or {}).get('hpce')
+            if held is not entry['held']:
+                entry['held'] = held
+                entry['due_at'] = purge_due_at(held or entry['hpce'], entry['updated'])
+
+    def next_due(self, after=0.0):
+        """Earliest time later than `after` (epoch seconds) at which a tab calls for an action, or None."""
+        return min((t for e in self._entries.values() for t in action_times(e['due_at']) if t > after),
+                   default=None)
+
+    def due_since(self, last_scan, now=None):
+        """True if a tab has come due for an action after `last_scan` (and by `now`)."""
+        due = self.next_due(after=last_scan)
+        return due is not None and due <= (now or time.time())
+
+    def deadlines(self, limit=None):
+        """[{'title', 'url', 'due_at'}] soonest first: when each tab becomes purgeable if left idle."""
+        rows = sorted(({'title': e['title'], 'url': getattr(page, 'url', None), 'due_at': e['due_at']}
+                       for page, e in self._entries.items()), key=lambda r: r['due_at'])
+        return rows[:limit] if limit else rows
@@ -0,0 +1,284 @@
+"""
+Tab Lifecycle tiers for RAM Sentinel
+Instead of only closing idle tabs, RECLAIM_MODE = "tiered" reclaims them in
+steps on the way to the time their HPCE confidence drops below the purge
+threshold:
+
+- freeze: Page.setWebLifecycleState(frozen) stops a hidden tab's timers and
+  tasks; its heap is kept and it resumes where it was.
+- discard: the tab is archived and navigated to a placeholder linking back
+  to it, which releases its document and heap but keeps the tab.
+- close: as before, the last resort.
+
+Every action measures the tab's JS heap (Performance.getMetrics) and the
+browser's renderer RSS (SystemInfo.getProcessInfo pids read with psutil)
+before and after, so the bytes each action actually frees are reported.
+All CDP calls are Chromium only; a tier that fails is left for the next one.
+"""
+import html
+import psutil
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import RECLAIMED_BYTES, TABS_RECLAIMED
+from .hpce import PURGE_CONFIDENCE
+
+FREEZE = 'freeze'
+DISCARD = 'discard'
+CLOSE = 'close'
+TIERS = (FREEZE, DISCARD, CLOSE)
+
+PLACEHOLDER_URL = 'about:blank'
+
+def choose_tier(confidence, due_in, tiered=None):
+    """
+    Deepest action a tab calls for, or None to keep it. Close is decided by
+    confidence as in close mode; freeze and discard come FREEZE_LEAD_MINUTES
+    and DISCARD_LEAD_MINUTES before that close is due (due_in seconds from
+    now), since on the confidence curve every tier falls within a few minutes.
+    """
+    if tiered is None:
+        tiered = settings.RECLAIM_MODE == 'tiered'
+    if confidence < PURGE_CONFIDENCE:
+        return CLOSE
+    if not tiered:
+        return None
+    if due_in <= settings.DISCARD_LEAD_MINUTES * 60:
+        return DISCARD
+    if due_in <= settings.FREEZE_LEAD_MINUTES * 60:
+        return FREEZE
+    return None
+
+def unloads_first(tier, state):
+    """
+    Whether this action is the first to unload the page, so the one to
+    archive it: a discard, or a close of a page that wasn't discarded before.
+    """
+    return tier in (DISCARD, CLOSE) and not (state and state['tier'] == DISCARD)
+
+def placeholder_html(title, url):
+    """Content of a discarded tab: its title and a link back to the page."""
+    title, url = html.escape(title or url), html.escape(url, quote=True)
+    return (f"<!doctype html><title>Discarded: {title}</title>"
+            f"<p>RAM Sentinel discarded this tab to free memory.</p><p><a href=\"{url}\">{title}</a></p>")
+
+def heap_size(metrics):
+    """JSHeapUsedSize from a Performance.getMetrics result, or None."""
+    for metric in (metrics or {}).get('metrics', []):
+        if metric.get('name') == 'JSHeapUsedSize':
+            return int(metric['value'])
+    return None
+
+def renderer_rss(process_info):
+    """Total RSS of the renderer processes in a SystemInfo.getProcessInfo result, or None."""
+    total = 0
+    for info in (process_info or {}).get('processInfo', []):
+        if info.get('type') != 'renderer':
+            continue
+        try:
+            total += psutil.Process(info['id']).memory_info().rss
+        except (psutil.Error, KeyError):
+            pass  # Exited, or a remote browser's pid
+    return total or None
+
+def record(action, title, heap_before, heap_after, rss_before, rss_after):
+    """Count one reclaim action and return its measurement."""
+    freed_heap = heap_before - heap_after if heap_before is not None and heap_after is not None else None
+    freed_rss = rss_before - rss_after if rss_before is not None and rss_after is not None else None
+    TABS_RECLAIMED.inc(action=action)
+    if freed_heap and freed_heap > 0:
+        RECLAIMED_BYTES.inc(freed_heap, action=action, kind='js_heap')
+    if freed_rss and freed_rss > 0:
+        RECLAIMED_BYTES.inc(freed_rss, action=action, kind='renderer_rss')
+    logger.info(f"{action.capitalize()}: {title} | heap freed {_mb(freed_heap)} | renderer RSS freed {_mb(freed_rss)}")
+    return {'action': action, 'title': title, 'heap_before': heap_before, 'heap_after': heap_after,
+            'rss_before': rss_before, 'rss_after': rss_after, 'freed_heap': freed_heap, 'freed_rss': freed_rss}
+
+def _mb(value):
+    return f"{value / 1024 ** 2:.1f} MB" if value is not None else "n/a"
+
+class TabLifecycle:
+    """
+    CDP lifecycle actions for the sync engine. Remembers which tier each
+    page is in (states) together with the HPCE vector it was reclaimed
+    with, since a frozen page can't be asked and a discarded one has lost
+    its history.
+    """
+    def __init__(self, context, browser=None):
+        self.context = context
+        self.browser = browser
+        self.states = {}  # page -> {'tier', 'title', 'url', 'hpce'}
+        self.round_trips = 0
+        self._sessions = {}
+        self._browser_session = None
+
+    def _send(self, session, method, params=None):
+        self.round_trips += 1
+        return session.send(method, params or {})
+
+    def _session(self, page):
+        session = self._sessions.get(page)
+        if session is None:
+            session = self.context.new_cdp_session(page)
+            self.round_trips += 1
+            self._send(session, 'Performance.enable')
+            self._sessions[page] = session
+        return session
+
+    def js_heap(self, page):
+        try:
+            return heap_size(self._send(self._session(page), 'Performance.getMetrics'))
+        except Exception as e:
+            logger.debug(f"Performance.getMetrics failed: {e}")
+            return None
+
+    def process_info(self):
+        """SystemInfo.getProcessInfo of the browser, or None."""
+        try:
+            if self._browser_session is None:
+                self._browser_session = self.browser.new_browser_cdp_session()
+            return self._send(self._browser_session, 'SystemInfo.getProcessInfo')
+        except Exception as e:
+            logger.debug(f"SystemInfo.getProcessInfo failed: {e}")
+            return None
+
+    def renderer_rss(self):
+        return renderer_rss(self.process_info())
+
+    def state(self, page, pushed=None):
+        """
+        The page's reclaim state, or None once the user is back: a discarded
+        page navigated away from its placeholder, or a frozen page that has
+        pushed activity newer than the vector it was frozen with.
+        """
+        state = self.states.get(page)
+        if not state:
+            return None
+        if state['tier'] == DISCARD:
+            returned = page.url != PLACEHOLDER_URL
+        else:
+            # The placeholder's own tracker pushes too, so this only applies to frozen pages
+            frozen_at = (state['hpce'] or {}).get('lastActive', 0)
+            returned = pushed is not None and (pushed['hpce'] or {}).get('lastActive', 0) > frozen_at
+        if returned:
+            del self.states[page]
+            return None
+        return state
+
+    def is_hidden(self, page):
+        self.round_trips += 1
+        return page.evaluate("document.visibilityState") == 'hidden'
+
+    def apply(self, page, tier, title, url, hpce):
+        """Run one tier on a page, measured. Returns the measurement."""
+        heap_before, rss_before = self.js_heap(page), self.renderer_rss()
+        frozen = (self.states.get(page) or {}).get('tier') == FREEZE
+        if tier == FREEZE:
+            self._send(self._session(page), 'Page.setWebLifecycleState', {'state': 'frozen'})
+        elif tier == DISCARD:
+            if frozen:
+                self._send(self._session(page), 'Page.setWebLifecycleState', {'state': 'active'})
+            # The session may not survive the navigation to another process
+            self._sessions.pop(page, None)
+            # Recorded first, so a discard failing halfway still knows the real URL
+            self.states[page] = {'tier': DISCARD, 'title': title, 'url': url, 'hpce': hpce}
+            try:
+                page.goto(PLACEHOLDER_URL)
+                page.set_content(placeholder_html(title, url))
+            except BaseException:
+                self._discard_failed(page)
+                raise
+            self.round_trips += 2
+        else:
+            self._sessions.pop(page, None)
+            page.close()
+            self.round_trips += 1
+        heap_after = 0 if tier == CLOSE else self.js_heap(page)
+        measurement = record(tier, title, heap_before, heap_after, rss_before, self.renderer_rss())
+        if tier == CLOSE:
+            self.states.pop(page, None)
+        else:
+            self.states[page] = {'tier': tier, 'title': title, 'url': url, 'hpce': hpce}
+        return measurement
+
+    def _discard_failed(self, page):
+        """
+        A discard raised partway: a page that already left for the
+        placeholder stays recorded as discarded under its real URL; one
+        still showing its page is not discarded at all.
+        """
+        if page.url != PLACEHOLDER_URL:
+            self.states.pop(page, None)
+
+    def prune(self, pages):
+        live = set(pages)
+        for page in [p for p in self.states if p not in live]:
+            del self.states[page]
+        for page in [p for p in self._sessions if p not in live]:
+            del self._sessions[page]
+
+class AsyncTabLifecycle(TabLifecycle):
+    """TabLifecycle for the async engine's Playwright objects."""
+    async def _send(self, session, method, params=None):
+        self.round_trips += 1
+        return await session.send(method, params or {})
+
+    async def _session(self, page):
+        session = self._sessions.get(page)
+        if session is None:
+            session = await self.context.new_cdp_session(page)
+            self.round_trips += 1
+            await self._send(session, 'Performance.enable')
+            self._sessions[page] = session
+        return session
+
+    async def js_heap(self, page):
+        try:
+            return heap_size(await self._send(await self._session(page), 'Performance.getMetrics'))
+        except Exception as e:
+            logger.debug(f"Performance.getMetrics failed: {e}")
+            return None
+
+    async def process_info(self):
+        try:
+            if self._browser_session is None:
+                self._browser_session = await self.browser.new_browser_cdp_session()
+            return await self._send(self._browser_session, 'SystemInfo.getProcessInfo')
+        except Exception as e:
+            logger.debug(f"SystemInfo.getProcessInfo failed: {e}")
+            return None
+
+    async def renderer_rss(self):
+        return renderer_rss(await self.process_info())
+
+    async def is_hidden(self, page):
+        self.round_trips += 1
+        return await page.evaluate("document.visibilityState") == 'hidden'
+
+    async def apply(self, page, tier, title, url, hpce):
+        heap_before, rss_before = await self.js_heap(page), await self.renderer_rss()
+        frozen = (self.states.get(page) or {}).get('tier') == FREEZE
+        if tier == FREEZE:
+            await self._send(await self._session(page), 'Page.setWebLifecycleState', {'state': 'frozen'})
+        elif tier == DISCARD:
+            if frozen:
+                await self._send(await self._session(page), 'Page.setWebLifecycleState', {'state': 'active'})
+            self._sessions.pop(page, None)
+            self.states[page] = {'tier': DISCARD, 'title': title, 'url': url, 'hpce': hpce}
+            try:
+                await page.goto(PLACEHOLDER_URL)
+                await page.set_content(placeholder_html(title, url))
+            except BaseException:  # Including the cancellation of a timed-out wait_for
+                self._discard_failed(page)
+                raise
+            self.round_trips += 2
+        else:
+            self._sessions.pop(page, None)
+            await page.close()
+            self.round_trips += 1
+        heap_after = 0 if tier == CLOSE else await self.js_heap(page)
+        measurement = record(tier, title, heap_before, heap_after, rss_before, await self.renderer_rss())
+        if tier == CLOSE:
+            self.states.pop(page, None)
+        else:
+            self.states[page] = {'tier': tier, 'title': title, 'url': url, 'hpce': hpce}
+        return measurement
@@ -0,0 +1,130 @@
+"""
+Purge Planner for RAM Sentinel
+With PURGE_TARGET_FREE_MB set, the purger stops closing every tab under
+the confidence threshold and instead closes just enough tabs to bring
+available memory back up to the target, choosing the ones whose loss costs
+the least confidence per byte freed.
+
+Bytes per tab are an estimate. CDP reports each page's JS heap
+(Performance.getMetrics) and the browser's renderer pids
+(SystemInfo.getProcessInfo, measured here as PSS where smaps_rollup is
+readable, else RSS), but not which renderer hosts which page. So every tab
+is credited with its own heap plus an even share of the renderer memory the
+heaps don't account for (DOM, layout, code, caches); a discarded tab holds
+only its placeholder, so it gets its heap alone.
+"""
+import psutil
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.smaps import get_smaps_sampler
+from .lifecycle import CLOSE, DISCARD, TIERS
+
+MB = 1024 ** 2
+
+def memory_needed(target_free_mb=None):
+    """(bytes to free to reach the target, bytes available now); (0, available) when met or no target."""
+    target_free_mb = settings.PURGE_TARGET_FREE_MB if target_free_mb is None else target_free_mb
+    available = psutil.virtual_memory().available
+    if not target_free_mb:
+        return 0, available
+    return max(0, int(target_free_mb * MB) - available), available
+
+def renderer_footprint(process_info):
+    """Total bytes held by the renderers in a SystemInfo.getProcessInfo result (PSS if readable, else RSS)."""
+    smaps = get_smaps_sampler()
+    total = 0
+    for info in (process_info or {}).get('processInfo', []):
+        if info.get('type') != 'renderer':
+            continue
+        measured = smaps.read(info['id']) if smaps else None
+        if measured is not None:
+            total += int(measured['pss_mb'] * MB)
+            continue
+        try:
+            total += psutil.Process(info['id']).memory_info().rss
+        except (psutil.Error, KeyError):
+            pass  # Exited, or a remote browser's pid
+    return total
+
+def estimate_tab_bytes(heaps, renderer_total, discarded=()):
+    """
+    Reclaimable bytes per tab: its JS heap plus an even share of renderer
+    memory beyond all heaps. heaps is {key: bytes or None}; a tab whose heap
+    couldn't be read is credited with the average heap. Discarded tabs
+    (keys in discarded) already gave their document back, so they are
+    credited with only their measured placeholder heap and take no share.
+    """
+    known = [h for key, h in heaps.items() if h is not None and key not in discarded]
+    average = sum(known) / len(known) if known else 0
+    heap_bytes = {key: h if h is not None else (0 if key in discarded else average) for key, h in heaps.items()}
+    live = len(heaps) - sum(1 for key in heaps if key in discarded)
+    overhead = max(0, renderer_total - sum(heap_bytes.values())) / live if live else 0
+    return {key: int(h + (0 if key in discarded else overhead)) for key, h in heap_bytes.items()}
+
+def plan_purge(tabs, need_bytes, max_confidence=None):
+    """
+    Tabs to close so their estimated bytes cover need_bytes at the lowest
+    total confidence. tabs are dicts with 'confidence' and 'bytes'; only
+    those below max_confidence are eligible. Greedy by confidence per byte,
+    then tabs the target can do without are dropped again, most confident
+    first. Returns (chosen, expected bytes freed).
+    """
+    if need_bytes <= 0:
+        return [], 0
+    max_confidence = settings.PLANNER_MAX_CONFIDENCE if max_confidence is None else max_confidence
+    eligible = [t for t in tabs if t['bytes'] > 0 and t['confidence'] < max_confidence]
+    eligible.sort(key=lambda t: (t['confidence'] / t['bytes'], -t['bytes']))
+    chosen, freed = [], 0
+    for tab in eligible:
+        if freed >= need_bytes:
+            break
+        chosen.append(tab)
+        freed += tab['bytes']
+    for tab in sorted(chosen, key=lambda t: t['confidence'], reverse=True):
+        if freed - tab['bytes'] >= need_bytes:
+            chosen.remove(tab)
+            freed -= tab['bytes']
+    return chosen, freed
+
+def build_plan(tabs, heaps, process_info, need_bytes, available):
+    """
+    The plan for one scan. tabs are the assessed tabs (dicts with 'title',
+    'url', 'confidence'); heaps maps their index to the measured JS heap.
+    Sets 'bytes' on every tab. Returns (plan, ids of the chosen tab dicts).
+    """
+    discarded = {i for i, tab in enumerate(tabs) if (tab.get('state') or {}).get('tier') == DISCARD}
+    estimates = estimate_tab_bytes(heaps, renderer_footprint(process_info), discarded)
+    for i, tab in enumerate(tabs):
+        tab['bytes'] = estimates.get(i, 0)
+    chosen, expected = plan_purge(tabs, need_bytes)
+    plan = {'need_bytes': need_bytes, 'available_bytes': available, 'expected_bytes': expected,
+            'short_bytes': max(0, need_bytes - expected),
+            'tabs': [{'title': t['title'], 'url': t['url'], 'confidence': t['confidence'], 'bytes': t['bytes']}
+                     for t in chosen]}
+    return plan, {id(t) for t in chosen}
+
+def apply_plan(tabs, chosen, tiered=False):
+    """
+    Make the plan the tiers: chosen tabs are closed and no others. Tabs the
+    confidence threshold alone would have closed are discarded instead in
+    tiered mode, or kept.
+    """
+    for tab in tabs:
+        if id(tab) in chosen:
+            tab['tier'] = CLOSE
+        elif tab['tier'] == CLOSE:
+            state = tab.get('state')
+            already = state and TIERS.index(state['tier']) >= TIERS.index(DISCARD)
+            tab['tier'] = DISCARD if tiered and not already else None
+
+def log_plan(plan, dry_run=False):
+    prefix = "[Dry Run] " if dry_run else ""
+    if not plan['need_bytes']:
+        logger.info(f"{prefix}Plan: {plan['available_bytes'] / MB:.0f} MB available meets the target; nothing to purge")
+        return
+    logger.info(f"{prefix}Plan: need {plan['need_bytes'] / MB:.0f} MB, {len(plan['tabs'])} tabs "
+                f"expected to free {plan['expected_bytes'] / MB:.0f} MB")
+    for tab in plan['tabs']:
+        logger.info(f"{prefix}  {tab['bytes'] / MB:7.1f} MB  conf {tab['confidence'] * 100:5.1f}%  {tab['title']}")
+    if plan['short_bytes']:
+        logger.warning(f"{prefix}Plan falls {plan['short_bytes'] / MB:.0f} MB short: not enough idle tabs")
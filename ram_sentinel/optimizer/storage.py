@@ -4,12 +4,14 @@ from pathlib import Path
 from datetime import datetime
 from ..core.config import settings
 from ..core.logger import logger
+from ..core.metrics import SAVE_TABS_SECONDS, timed
 
 class ReadLaterStorage:
     def __init__(self):
         self.base_dir = Path(settings.READ_LATER_DIR)
         self.json_path = self.base_dir / "index.json"
         
+    @timed(SAVE_TABS_SECONDS)
     def save_tabs(self, tabs: list):
         """
         Save a list of tabs to storage.
@@ -1,10 +1,13 @@
 import time
-import math
 from datetime import datetime, timedelta
-from playwright.sync_api import sync_playwright, BrowserContext, Page
 from ..core.config import settings
 from ..core.logger import logger
+from ..core.metrics import (BROWSER_ROUND_TRIPS, HPCE_SCAN_ROUND_TRIPS, HPCE_SCANS, HPCE_SCAN_SECONDS,
+                            PAGE_EVALUATE_SECONDS, TABS_PURGED, TABS_PURGE_CANDIDATES, timed)
 from .storage import ReadLaterStorage
+from .hpce import ActivityTable, assess_tab, purge_due_at, run_hpce_analysis
+from .lifecycle import CLOSE, DISCARD, FREEZE, TIERS, TabLifecycle, choose_tier, unloads_first
+from .planner import apply_plan, build_plan, log_plan, memory_needed
 
 ACTIVITY_TRACKER_SCRIPT = """
 (function() {
@@ -21,12 +24,27 @@ ACTIVITY_TRACKER_SCRIPT = """
         lastActive: Date.now()
     };
     
+    // Push coalesced activity to the purger through its Playwright binding:
+    // at most one call per interval, carrying the whole vector (top frame only)
+    let pushTimer = null;
+    const push = () => {
+        pushTimer = null;
+        const send = window.__ramSentinelActivity;
+        if (typeof send === 'function') {
+            Promise.resolve(send(Object.assign({title: document.title}, window.__hpce))).catch(() => {});
+        }
+    };
+    const schedulePush = () => {
+        if (window.top === window && pushTimer === null) pushTimer = setTimeout(push, __PUSH_MS__);
+    };
+    
     const update = (evt) => { 
         window.__hpce.lastActive = Date.now();
         if (evt.type === 'click') window.__hpce.clicks++;
         if (evt.type === 'keydown') window.__hpce.keys++;
         if (evt.type === 'scroll') window.__hpce.scrolls++;
         if (evt.type === 'mousemove') window.__hpce.mouseDistance++;
+        schedulePush();
     };
     
     ['click', 'keydown', 'scroll'].forEach(e => window.addEventListener(e, update, {passive: true}));
@@ -37,8 +55,29 @@ ACTIVITY_TRACKER_SCRIPT = """
         const now = Date.now();
         if(now - lastMove > 500) { update(e); lastMove = now; }
     }, {passive: true});
+    
+    // Announce the tab (and its title) as soon as it loads
+    if (window.top === window) setTimeout(push, 0);
 })();
-"""
+""".replace("__PUSH_MS__", str(int(settings.ACTIVITY_PUSH_INTERVAL_MS)))
+
+# Name of the binding pages push activity through
+ACTIVITY_BINDING = "__ramSentinelActivity"
+
+# Everything a scan needs from one page in a single round trip. Pages opened
+# before the context init script was registered get the tracker here, on
+# their first scan (a fresh vector reads as "active now").
+COLLECT_SCRIPT = f"""() => {{
+{ACTIVITY_TRACKER_SCRIPT}
+    return {{title: document.title, hpce: window.__hpce}};
+}}"""
+
+def create_tab_purger(engine=None):
+    """TabPurger or AsyncTabPurger, as selected by engine or settings.PURGER_ENGINE."""
+    if (engine or settings.PURGER_ENGINE) == 'async':
+        from .async_tab_purger import AsyncTabPurger
+        return AsyncTabPurger()
+    return TabPurger()
 
 class TabPurger:
     def __init__(self):
@@ -47,9 +86,19 @@ class TabPurger:
         self.context = None
         self.storage = ReadLaterStorage()
         self._monitoring_start = time.time()
+        self._tracked_context = None
+        self.activity = ActivityTable()
+        self._last_scan_at = 0.0
+        self.lifecycle = None
+        # Tabs still open after the last scan, read by the dashboard without touching Playwright
+        self.last_tabs = []
+        self.last_scan = {'tabs': 0, 'round_trips': 0, 'seconds': 0.0, 'next_purge_at': None, 'reclaimed': [],
+                          'plan': None}
 
     def start_session(self, headless=False):
         """Starts a Playwright session, either connecting to existing or launching new."""
+        # Imported here: loading Playwright costs more than everything else in the package
+        from playwright.sync_api import sync_playwright
         self.playwright = sync_playwright().start()
         try:
             # Try connecting to standard remote debugging port
@@ -74,112 +123,198 @@ class TabPurger:
             pass  # Playwright already stopped
 
     def inject_tracker(self):
-        """Injects activity tracking script into all pages."""
-        if not self.context:
-            return
-        
-        for page in self.context.pages:
+        """
+        Registers the activity tracker as a context init script, so every
+        page opened or navigated from now on runs it before its own scripts,
+        and (with ACTIVITY_PUSH) the binding its pushes arrive through.
+        Returns the number of browser round trips used (0 if already done).
+        """
+        if not self.context or self._tracked_context is self.context:
+            return 0
+        round_trips = 0
+        if settings.ACTIVITY_PUSH:
             try:
-                page.evaluate(ACTIVITY_TRACKER_SCRIPT)
+                self.context.expose_binding(ACTIVITY_BINDING, self.activity.on_push)
+                round_trips += 1
             except Exception as e:
-                # Page might be closed or navigating
-                pass
+                logger.debug(f"Could not expose activity binding: {e}")
+        try:
+            self.context.add_init_script(ACTIVITY_TRACKER_SCRIPT)
+            round_trips += 1
+        except Exception as e:
+            logger.debug(f"Could not register tracker init script: {e}")
+        self._tracked_context = self.context
+        return round_trips
 
-    def run_hpce_analysis(self, hpce_data, idle_seconds):
+    def idle(self, seconds):
         """
-        Human Presence Confidence Engine (HPCE)
-        Calculates a confidence score (0.0-1.0) that user needs this tab.
+        Wait up to `seconds` while Playwright delivers pushed activity
+        (the sync API only dispatches binding calls inside its own calls).
+        Returns True once a tab has become purgeable since the last scan.
         """
-        clicks = hpce_data.get('clicks', 0)
-        keys = hpce_data.get('keys', 0)
-        scrolls = hpce_data.get('scrolls', 0)
-        
-        # 1. Behavior Fingerprinting
-        fingerprint = "Ghost"
-        base_decay_mins = settings.INACTIVE_THRESHOLD_MINUTES
-        
-        if keys > 20 or clicks > 10:
-            fingerprint = "Creator" # High value
-            base_decay_mins *= 2.0 
-        elif scrolls > 50:
-            fingerprint = "Reader" # Medium value
-            base_decay_mins *= 1.5
-        elif clicks > 0:
-            fingerprint = "Browser" # Low value
-        
-        # 2. Idle Decay Curve (Sigmoidal)
-        # P = 1 / (1 + e^(k * (t - t0)))
-        # k = steepness, t0 = inflection point
-        
-        idle_mins = idle_seconds / 60
-        k = 0.8
-        t0 = base_decay_mins
-        
-        # Avoid math overflow
+        pages = self.context.pages if self.context else []
         try:
-            confidence = 1 / (1 + math.exp(k * (idle_mins - t0)))
-        except OverflowError:
-            confidence = 0.0
-            
-        return confidence, fingerprint
+            if pages:
+                pages[0].wait_for_timeout(seconds * 1000)
+            else:
+                time.sleep(seconds)
+        except Exception:
+            time.sleep(seconds)
+        return self.activity.due_since(self._last_scan_at)
 
+    def _lifecycle(self):
+        """TabLifecycle for the current context in tiered or planned mode, else None."""
+        if settings.RECLAIM_MODE != 'tiered' and not settings.PURGE_TARGET_FREE_MB:
+            return None
+        if self.lifecycle is None or self.lifecycle.context is not self.context:
+            self.lifecycle = TabLifecycle(self.context, self.browser)
+        return self.lifecycle
+
+    def _plan(self, tabs, lifecycle, dry_run):
+        """
+        Measure the tabs (only when memory is short of the target) and plan
+        which to close. Returns (plan, ids of the chosen tab dicts).
+        """
+        need, available = memory_needed()
+        heaps, process_info = {}, None
+        if need:
+            heaps = {i: lifecycle.js_heap(tab['page']) for i, tab in enumerate(tabs)}
+            process_info = lifecycle.process_info()
+        plan, chosen = build_plan(tabs, heaps, process_info, need, available)
+        log_plan(plan, dry_run)
+        return plan, chosen
+
+    def run_hpce_analysis(self, hpce_data, idle_seconds):
+        """Human Presence Confidence Engine (HPCE); see run_hpce_analysis() at module level."""
+        return run_hpce_analysis(hpce_data, idle_seconds)
+
+    @timed(HPCE_SCAN_SECONDS)
     def scan_and_purge(self, dry_run=False):
-        """Scans tabs using HPCE logic."""
+        """Scans tabs using HPCE logic. Returns the number of tabs reclaimed (or that would be)."""
         if not self.context:
-            return
+            return 0
 
-        self.inject_tracker()
-        time.sleep(1) # Allow script to run
+        started = time.perf_counter()
+        round_trips = self.inject_tracker()
         
         purged_tabs = []
         keep_tabs = []
+        purge_candidates = 0
+        open_tabs = []
         
         now = time.time()
         
+        lifecycle = self._lifecycle()
+        lifecycle_trips = lifecycle.round_trips if lifecycle else 0
+        tiered = settings.RECLAIM_MODE == 'tiered'
+        reclaimed = []
+        archived = []
+        actions = 0
+        
+        # 1. Assess every tab
+        tabs = []
         for page in self.context.pages:
             try:
-                # Handle both CDP (property) and Playwright (method) access
-                title = page.title if isinstance(page.title, str) else page.title()
+                # page.url is tracked client-side by Playwright
                 url = page.url if isinstance(page.url, str) else page.url()
-                
-                # Retrieve HPCE Vector
-                hpce_raw = page.evaluate("window.__hpce || {}")
-                last_active_js = hpce_raw.get('lastActive', 0)
-                
-                # If script wasn't running (new tab), assume active now
-                if last_active_js == 0:
-                    last_active_js = now * 1000
-                
-                last_active_sec = last_active_js / 1000
-                idle_seconds = now - last_active_sec
+                # Frozen pages can't answer and discarded ones have lost their history
+                pushed = self.activity.pushed(page)
+                state = lifecycle.state(page, pushed) if lifecycle else None
+                entry = state or pushed
+                if entry is None:
+                    # Not pushing (yet): title and HPCE vector in one evaluate, which also installs the tracker
+                    round_trips += 1
+                    with timed(PAGE_EVALUATE_SECONDS):
+                        collected = page.evaluate(COLLECT_SCRIPT)
+                    entry = {'title': collected.get('title'), 'hpce': collected.get('hpce')}
+                    self.activity.update(page, dict(entry['hpce'] or {}, title=entry['title']), pushed=False)
+                title = entry['title'] or url
+                if state:
+                    url = state['url']
                 
                 # Run HPCE Analysis
-                confidence, fingerprint = self.run_hpce_analysis(hpce_raw, idle_seconds)
+                confidence, fingerprint = assess_tab(entry['hpce'], now)
+                tier = choose_tier(confidence, purge_due_at(entry['hpce'], now) - now, tiered)
+                if tier and state and TIERS.index(tier) <= TIERS.index(state['tier']):
+                    tier = None  # Already reclaimed this far
                 
                 logger.debug(f"HPCE: {title[:20]}... | [{fingerprint}] | Conf: {confidence*100:.1f}%")
+                tabs.append({'page': page, 'url': url, 'title': title, 'state': state, 'hpce': entry['hpce'],
+                             'confidence': confidence, 'fingerprint': fingerprint, 'tier': tier})
+            except Exception as e:
+                logger.error(f"Error scanning page: {e}")
 
-                # Purge Threshold: < 5% Confidence
-                if confidence < 0.05:
-                    if not dry_run:
-                        # Capture data before closing
-                        purged_tabs.append({
-                            "title": title,
-                            "url": url,
-                            "timestamp": datetime.now().isoformat(),
-                            "fingerprint": fingerprint
-                        })
+        # 2. With a free-memory target, close only what the plan needs
+        plan = None
+        if settings.PURGE_TARGET_FREE_MB:
+            plan, chosen = self._plan(tabs, lifecycle, dry_run)
+            apply_plan(tabs, chosen, tiered)
+        
+        # 3. Act
+        for tab_info in tabs:
+            page, url, title, tier = tab_info['page'], tab_info['url'], tab_info['title'], tab_info['tier']
+            fingerprint = tab_info['fingerprint']
+            staged = None
+            try:
+                # Only background tabs are frozen
+                if tier is None or (tier == FREEZE and not dry_run and not lifecycle.is_hidden(page)):
+                    keep_tabs.append(title)
+                    open_tabs.append({'title': title, 'url': url})
+                elif dry_run:
+                    purge_candidates += 1
+                    logger.info(f"[Dry Run] HPCE would {'purge' if tier == CLOSE else tier}: {title}")
+                    open_tabs.append({'title': title, 'url': url})
+                else:
+                    # Capture data before closing or discarding
+                    tab = {
+                        "title": title,
+                        "url": url,
+                        "timestamp": datetime.now().isoformat(),
+                        "fingerprint": fingerprint
+                    }
+                    if tier == DISCARD and unloads_first(tier, tab_info['state']):
+                        # Archived before the page navigates away, so a failed discard can't lose it
+                        staged = tab
+                        archived.append(tab)
+                    if lifecycle:
+                        tab['action'] = tier
+                        reclaimed.append(lifecycle.apply(page, tier, title, url, tab_info['hpce']))
+                    else:
                         page.close()
+                        round_trips += 1
                         logger.info(f"Purged [{fingerprint}]: {title}")
+                    if tier == CLOSE:
+                        purged_tabs.append(tab)
                     else:
-                        logger.info(f"[Dry Run] HPCE would purge: {title}")
-                else:
-                    keep_tabs.append(title)
+                        open_tabs.append({'title': title, 'url': url})
+                    if tier != DISCARD and unloads_first(tier, tab_info['state']):
+                        archived.append(tab)
+                    actions += 1
                     
             except Exception as e:
-                logger.error(f"Error scanning page: {e}")
+                logger.error(f"Error reclaiming page: {e}")
+                if staged is not None and lifecycle.states.get(page, {}).get('tier') != DISCARD:
+                    archived.remove(staged)  # Still showing its page; archived once it is discarded
 
-        if purged_tabs and not dry_run:
-            self.storage.save_tabs(purged_tabs)
+        # context.pages no longer lists closed pages
+        self.activity.prune(self.context.pages)
+        if lifecycle:
+            lifecycle.prune(self.context.pages)
+            round_trips += lifecycle.round_trips - lifecycle_trips
+        self.activity.hold(lifecycle.states if lifecycle else {})
+        self._last_scan_at = now
+        self.last_tabs = open_tabs
+        self.last_scan = {'tabs': len(open_tabs) + len(purged_tabs), 'round_trips': round_trips,
+                          'seconds': time.perf_counter() - started, 'next_purge_at': self.activity.next_due(after=now),
+                          'reclaimed': reclaimed, 'plan': plan}
+        BROWSER_ROUND_TRIPS.inc(round_trips)
+        HPCE_SCAN_ROUND_TRIPS.observe(round_trips)
+        HPCE_SCANS.inc()
+        TABS_PURGED.inc(len(purged_tabs))
+        TABS_PURGE_CANDIDATES.inc(purge_candidates)
+        if archived and not dry_run:
+            self.storage.save_tabs(archived)
             
         logger.info(f"Scan complete. Purged: {len(purged_tabs)}. Active: {len(keep_tabs)}")
+        return actions + purge_candidates
 
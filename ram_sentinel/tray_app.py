@@ -3,15 +3,11 @@ System Tray Application for RAM Sentinel
 Provides background service with system tray icon for easy control.
 """
 import threading
-import time
-from PIL import Image, ImageDraw
-import pystray
-from pystray import MenuItem as item
-from ..core.logger import logger, console
-from ..optimizer.tab_purger import TabPurger
-from ..vault.manager import get_vault
-from ..core.config import settings
-from ..core.process_monitor import ProcessMonitor
+from .core.logger import logger, console
+from .vault.manager import get_vault
+from .core.config import settings
+from .core.process_monitor import ProcessMonitor
+from .core.pressure import ReclaimScheduler
 from pathlib import Path
 
 class RAMSentinelTray:
@@ -20,21 +16,14 @@ class RAMSentinelTray:
         self.purger = None
         self.purger_thread = None
         self.purger_running = False
+        self.scheduler = None
         self.vault = get_vault()
         self.vault_mounted = False
         self.process_monitor = ProcessMonitor()
-
-class RAMSentinelTray:
-    def __init__(self):
-        self.icon = None
-        self.purger = None
-        self.purger_thread = None
-        self.purger_running = False
-        self.vault = get_vault()
-        self.vault_mounted = False
         
     def create_icon_image(self, color="green"):
         """Create a simple icon image."""
+        from PIL import Image, ImageDraw
         # Create a 64x64 image
         img = Image.new('RGB', (64, 64), color='white')
         draw = ImageDraw.Draw(img)
@@ -62,20 +51,29 @@ class RAMSentinelTray:
             logger.warning("Optimizer already running")
             return
             
+        self.scheduler = ReclaimScheduler()
+        
         def run_purger():
             try:
-                self.purger = TabPurger()
+                # Playwright loads only once the optimizer is actually started
+                from .optimizer.tab_purger import create_tab_purger
+                self.purger = create_tab_purger()
                 self.purger.start_session(headless=True)
                 self.purger_running = True
                 logger.info("Tab Optimizer started")
                 
                 while self.purger_running:
-                    self.purger.scan_and_purge(dry_run=False)
-                    time.sleep(60)  # Scan every 60 seconds
+                    purged = self.purger.scan_and_purge(dry_run=False)
+                    # Next scan when due, or right away under memory pressure
+                    self.scheduler.wait(purged, idle=self.purger.idle)
                     
             except Exception as e:
                 logger.error(f"Optimizer error: {e}")
                 self.purger_running = False
+            finally:
+                # Closed here: the session belongs to this thread (either engine)
+                if self.purger:
+                    self.purger.stop_session()
         
         self.purger_thread = threading.Thread(target=run_purger, daemon=True)
         self.purger_thread.start()
@@ -88,8 +86,10 @@ class RAMSentinelTray:
             return
             
         self.purger_running = False
-        if self.purger:
-            self.purger.stop_session()
+        if self.scheduler:
+            self.scheduler.stop()
+        if self.purger_thread:
+            self.purger_thread.join(timeout=5)
         logger.info("Tab Optimizer stopped")
         self.update_icon("gray")
     
@@ -192,6 +192,8 @@ class RAMSentinelTray:
     
     def run(self):
         """Run the system tray application."""
+        import pystray
+        from pystray import MenuItem as item
         # Create menu
         menu = pystray.Menu(
             item('Start Optimizer', self.start_optimizer),
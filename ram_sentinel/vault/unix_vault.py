@@ -1,10 +1,12 @@
 import subprocess
 import os
 from .base_vault import BaseVault
+from ..core.metrics import VAULT_OPERATION_SECONDS, timed
 from ..core.logger import logger
 from ..core.os_utils import is_admin
 
 class UnixVault(BaseVault):
+    @timed(VAULT_OPERATION_SECONDS, operation='mount')
     def mount(self, size: str, mount_point: str) -> bool:
         if not is_admin():
             logger.error("Root privileges required to mount tmpfs.")
@@ -25,6 +27,7 @@ class UnixVault(BaseVault):
             logger.error(f"Failed to mount: {result.stderr}")
             return False
 
+    @timed(VAULT_OPERATION_SECONDS, operation='unmount')
     def unmount(self, mount_point: str) -> bool:
         if not is_admin():
             logger.error("Root privileges required to unmount.")
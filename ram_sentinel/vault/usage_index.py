@@ -0,0 +1,352 @@
+"""
+Vault Usage Index for RAM Sentinel
+Keeps file count, bytes per top-level directory and the largest files of
+the Ghost Drive up to date incrementally, so /api/vault/stats answers from
+memory instead of walking the whole mount point on every request.
+
+On Linux an inotify watcher (via ctypes, no extra dependency) applies
+changes as they happen and a slow reconciliation scan corrects any drift;
+elsewhere the reconciliation scan simply runs more often.
+"""
+import ctypes
+import ctypes.util
+import heapq
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from ..core.config import settings
+from ..core.logger import logger
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class Inotify:
+    """Minimal inotify binding: add/remove watches and read raw events."""
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    @staticmethod
+    def is_available():
+        return sys.platform.startswith('linux')
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Yield (wd, mask, name) for everything queued; empty if nothing is."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+class VaultUsageIndex:
+    """
+    In-memory index of every file under root: path -> size, plus running
+    totals per top-level directory. Queries are answered from the totals
+    and a largest-files list kept up to date per change (rebuilt lazily
+    on read when it can't be), never by touching the filesystem.
+    """
+    def __init__(self, root, top_files=None, reconcile_seconds=None, scan_seconds=None):
+        self.root = os.path.abspath(root)
+        self.top_files = top_files or settings.VAULT_INDEX_TOP_FILES
+        self.reconcile_seconds = reconcile_seconds or settings.VAULT_INDEX_RECONCILE_SECONDS
+        self.scan_seconds = scan_seconds or settings.VAULT_INDEX_SCAN_SECONDS
+        self.files = {}  # path relative to root -> bytes
+        self.dir_bytes = {}  # top-level entry ('' for files directly in root) -> bytes
+        self.dir_files = {}  # top-level entry -> file count
+        self.total_bytes = 0
+        self.mode = 'inactive'
+        self.ready = False
+        self.events = 0
+        self.reconciles = 0
+        self.drift = 0  # Files the last reconciliation had to correct
+        self.last_reconcile = None
+        self._largest = []
+        self._largest_dirty = True
+        self._inotify = None
+        self._watches = {}  # wd -> directory path relative to root
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ram-sentinel-vault-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    @staticmethod
+    def _top(rel):
+        head, sep, _ = rel.partition(os.sep)
+        return head if sep else ''
+
+    def _set(self, rel, size):
+        """Record (size) or forget (None) one file, adjusting the totals."""
+        old = self.files.pop(rel, None) if size is None else self.files.get(rel)
+        if size is not None:
+            self.files[rel] = size
+        if old == size:
+            return
+        top = self._top(rel)
+        delta = (size or 0) - (old or 0)
+        self.total_bytes += delta
+        self.dir_bytes[top] = self.dir_bytes.get(top, 0) + delta
+        count = self.dir_files.get(top, 0) + (size is not None) - (old is not None)
+        if count:
+            self.dir_files[top] = count
+        else:
+            self.dir_files.pop(top, None)
+            self.dir_bytes.pop(top, None)
+        self._track_largest(rel, size)
+
+    def _track_largest(self, rel, size):
+        """
+        Keep the cached top-N (largest first) current for one change in
+        O(N). Only a member shrinking or going away can let a file outside
+        the list in, so that case leaves it to be rebuilt on the next read.
+        """
+        if self._largest_dirty:
+            return
+        largest = self._largest
+        for i, (old, path) in enumerate(largest):
+            if path == rel:
+                if size is None or size < old:
+                    self._largest_dirty = True
+                else:
+                    largest[i] = (size, rel)
+                    largest.sort(reverse=True)
+                return
+        if size is None:
+            return
+        if len(largest) < self.top_files:
+            largest.append((size, rel))
+        elif (size, rel) > largest[-1]:
+            largest[-1] = (size, rel)
+        else:
+            return
+        largest.sort(reverse=True)
+
+    def _forget_tree(self, rel_dir):
+        prefix = rel_dir + os.sep
+        for rel in [p for p in self.files if p.startswith(prefix)]:
+            self._set(rel, None)
+
+    def _scan(self, rel_dir=''):
+        """{relative path: size} for every file under rel_dir (watching new dirs if inotify is on)."""
+        found = {}
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            if self._inotify is not None:
+                self._watch(current)
+            try:
+                with os.scandir(os.path.join(self.root, current)) as entries:
+                    for entry in entries:
+                        rel = os.path.join(current, entry.name) if current else entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(rel)
+                            elif entry.is_file(follow_symlinks=False):
+                                found[rel] = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            pass  # Removed while scanning
+            except OSError:
+                pass
+        return found
+
+    def _watch(self, rel_dir):
+        try:
+            wd = self._inotify.add_watch(os.path.join(self.root, rel_dir))
+            self._watches[wd] = rel_dir
+        except OSError as e:
+            logger.debug(f"Vault index: cannot watch {rel_dir or self.root}: {e}")
+
+    def reconcile(self):
+        """Full scan, correcting whatever the incremental updates missed."""
+        found = self._scan()
+        with self._lock:
+            drift = 0
+            for rel in [p for p in self.files if p not in found]:
+                self._set(rel, None)
+                drift += 1
+            for rel, size in found.items():
+                if self.files.get(rel) != size:
+                    drift += self.ready  # The first scan is population, not drift
+                    self._set(rel, size)
+            self.drift = drift
+            self.reconciles += 1
+            self.last_reconcile = time.time()
+            self.ready = True
+        if drift:
+            logger.debug(f"Vault index reconciled {drift} entries")
+
+    def _refresh_largest(self):
+        """Rebuild the top-N from every file, only when _track_largest() couldn't keep it."""
+        if self._largest_dirty:
+            self._largest = heapq.nlargest(self.top_files, ((size, rel) for rel, size in self.files.items()))
+            self._largest_dirty = False
+
+    def _apply(self, events):
+        """Apply one batch of inotify events; each touched path is stat'ed once."""
+        touched = set()
+        new_dirs = []
+        for wd, mask, name in events:
+            self.events += 1
+            if mask & IN_Q_OVERFLOW:
+                return False  # Events were lost: only a full scan can recover
+            rel_dir = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if rel_dir is None or not name:
+                continue
+            rel = os.path.join(rel_dir, name) if rel_dir else name
+            if mask & IN_ISDIR:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    with self._lock:
+                        self._forget_tree(rel)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    new_dirs.append(rel)
+            else:
+                touched.add(rel)
+
+        updates = {}
+        for rel in touched:
+            try:
+                st = os.lstat(os.path.join(self.root, rel))
+                updates[rel] = st.st_size if stat.S_ISREG(st.st_mode) else None
+            except OSError:
+                updates[rel] = None
+        for rel in new_dirs:
+            # Files may have landed before the watch was added; pick them up
+            updates.update(self._scan(rel))
+
+        with self._lock:
+            for rel, size in updates.items():
+                self._set(rel, size)
+        return True
+
+    def _run(self):
+        if Inotify.is_available():
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                logger.warning(f"inotify unavailable, vault index falls back to periodic scans: {e}")
+        self.mode = 'inotify' if self._inotify else 'scan'
+        interval = self.reconcile_seconds if self._inotify else self.scan_seconds
+        try:
+            self.reconcile()
+            next_reconcile = time.monotonic() + interval
+            while not self._stop_event.is_set():
+                timeout = max(0.0, min(1.0, next_reconcile - time.monotonic()))
+                if self._inotify:
+                    readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+                    if readable and not self._apply(list(self._inotify.read_events())):
+                        logger.warning("Vault index: inotify queue overflowed, rescanning")
+                        next_reconcile = 0
+                else:
+                    self._stop_event.wait(timeout)
+                if time.monotonic() >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = time.monotonic() + interval
+        except Exception as e:
+            logger.error(f"Vault index error: {e}")
+        finally:
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+                self._watches.clear()
+            self.mode = 'inactive'
+
+    def stats(self):
+        """Totals, per-directory usage and largest files, from memory only."""
+        with self._lock:
+            self._refresh_largest()
+            return {
+                'file_count': len(self.files),
+                'indexed_bytes': self.total_bytes,
+                'directories': sorted(({'name': name or '.', 'bytes': size, 'files': self.dir_files.get(name, 0)}
+                                       for name, size in self.dir_bytes.items()),
+                                      key=lambda d: d['bytes'], reverse=True)[:self.top_files],
+                'largest_files': [{'path': rel, 'bytes': size} for size, rel in self._largest],
+                'index': {
+                    'mode': self.mode,
+                    'ready': self.ready,
+                    'events': self.events,
+                    'reconciles': self.reconciles,
+                    'drift': self.drift,
+                    'last_reconcile': self.last_reconcile
+                }
+            }
+
+_indexes = {}
+
+def get_usage_index(root):
+    """Shared, started VaultUsageIndex for a mount point."""
+    root = os.path.abspath(root)
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = VaultUsageIndex(root)
+    index.start()
+    return index
+
+def stop_usage_index(root):
+    """Stop and drop the index of an unmounted vault."""
+    index = _indexes.pop(os.path.abspath(root), None)
+    if index:
+        index.stop()
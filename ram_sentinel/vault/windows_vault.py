@@ -2,10 +2,12 @@ import subprocess
 import shutil
 import os
 from .base_vault import BaseVault
+from ..core.metrics import VAULT_OPERATION_SECONDS, timed
 from ..core.logger import logger
 from ..core.os_utils import is_admin
 
 class WindowsVault(BaseVault):
+    @timed(VAULT_OPERATION_SECONDS, operation='mount')
     def mount(self, size: str, mount_point: str = "R:") -> bool:
         if not is_admin():
             logger.error("Admin privileges required to mount ImDisk.")
@@ -48,6 +50,7 @@ class WindowsVault(BaseVault):
             logger.error("ImDisk executable not found in PATH. Please install ImDisk Toolkit.")
             return False
 
+    @timed(VAULT_OPERATION_SECONDS, operation='unmount')
     def unmount(self, mount_point: str = "R:") -> bool:
         if not is_admin():
             logger.error("Admin privileges required to unmount.")
@@ -2,6 +2,7 @@
 Dashboard Launcher for RAM Sentinel
 Run this to start the web dashboard.
 """
+import argparse
 import sys
 import os
 import webbrowser
@@ -13,15 +14,23 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ram_sentinel.dashboard.server import run_server
 
-def open_browser():
+def open_browser(url):
     """Open browser after server starts."""
     time.sleep(2)  # Wait for server to start
-    webbrowser.open('http://127.0.0.1:5000')
+    webbrowser.open(url)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAM Sentinel Dashboard")
+    parser.add_argument("--production", action="store_true", help="Serve with waitress instead of the development server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (0.0.0.0 for LAN access)")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--agents", help="Fleet mode: agents to aggregate (host:port,... or @file)")
+    args = parser.parse_args()
+    url = f"http://127.0.0.1:{args.port}"
+
     print("🛡️  RAM Sentinel Dashboard")
     print("=" * 50)
-    print("Starting server on http://127.0.0.1:5000")
+    print(f"Starting server on {url}" + (" (production mode)" if args.production else ""))
     print("Opening browser...")
     print("\n[TIP] To open this again later, just run 'start_dashboard.bat'")
     print("[TIP] This app runs LOCALLY. It works without Internet.")
@@ -29,8 +38,10 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Open browser in background
-    browser_thread = threading.Thread(target=open_browser, daemon=True)
+    browser_thread = threading.Thread(target=open_browser, args=(url,), daemon=True)
     browser_thread.start()
     
     # Run server
-    run_server()
+    from ram_sentinel.dashboard.fleet import parse_agents
+    run_server(host=args.host, port=args.port, production=args.production,
+               agents=parse_agents(args.agents) if args.agents else None)